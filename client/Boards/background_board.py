@@ -1,5 +1,16 @@
 import pygame
+import numpy as np
 from tile import Tile
+from Boards.map_file import tiles_from_board_data
+
+# Tile attributes kept in dense grids: name -> (dtype, value used when a tile does not define the attribute)
+tile_attribute_grids = {
+    "blocks_movement": (bool, False),
+    "blocks_bullets": (bool, False),
+    "move_speed": (np.float64, 1.0),
+    "visibility": (np.uint8, 255),
+    "destructible": (bool, False),
+}
 
 
 class BackgroundBoard:
@@ -9,6 +20,10 @@ class BackgroundBoard:
         _game: Game object
         _width: width of the board scaled
         _height: height of the board scaled
+        _tile_indices: Tile types of the tiles (indexes of _tile_types, -1 - no tile), indexed [x, y] like the grids
+        _tile_types: Attributes shared by all tiles of a type (flyweights), usually loaded resources
+        _tile_type_indices: Indexes of the tile types by id() of their attributes
+        _attribute_grids: Tile attributes by name, as arrays indexed [x, y] with the grid position
         ...other
     """
     def __init__(self, game, width, height, scale):
@@ -17,31 +32,87 @@ class BackgroundBoard:
         self._width = width // scale
         self._height = height // scale
         self._scale = scale
-        self._background_board = [[None for _ in range(height)] for _ in range(width)]
+        self._tile_indices = np.full((self._width, self._height), -1, dtype=np.int32)
+        self._tile_types = []
+        self._tile_type_indices = {}
         self._background_surface = pygame.Surface((width, height))
         self._updated_tiles = []
+        self._redraw_all = False  # the whole surface changed since the last draw
+        self._attribute_grids = {}
+        self.create_attribute_grids()
+
+    def create_attribute_grids(self):
+        """
+        Creates the tile attribute grids for the current board size, filled with the default values
+        :return: None
+        """
+        self._attribute_grids = {name: np.full((self._width, self._height), default, dtype=dtype)
+                                 for name, (dtype, default) in tile_attribute_grids.items()}
+
+    def tile_type(self, attributes):
+        """
+        Returns the tile type with given attributes, adding it if the board does not have it yet
+        :param dict attributes: Attributes of the tile type
+        :return: Index of the tile type
+        :rtype: int
+        """
+        index = self._tile_type_indices.get(id(attributes))
+        if index is None:
+            index = len(self._tile_types)
+            self._tile_types.append(attributes)  # also keeps id(attributes) from being reused
+            self._tile_type_indices[id(attributes)] = index
+        return index
 
     def set_tile(self, x, y, tile):
         """
-        Sets tile at grid position (x,y). Also updates the background surface
+        Sets tile at grid position (x,y). Only the tile's type is stored, so changes to its attributes apply to all
+        tiles of the type. Also updates the background surface
         :param int x: X coordinate of the tile to be set
         :param int y: Y coordinate of the tile to be set
         :param Tile tile: New Tile object to be set at given location
         :return: None
         """
-        self._background_board[x][y] = tile
+        self._tile_indices[x, y] = self.tile_type(tile.attributes)
+        for name, (_, default) in tile_attribute_grids.items():
+            self._attribute_grids[name][x, y] = tile.get_attribute(name) if name in tile.attributes else default
         self._background_surface.blit(tile.get_attribute("texture"), self.get_screen_position(x, y))
         self._updated_tiles.append(tile)
 
     def get_tile(self, x, y):
         """
-        Returns tile at grid position (x,y)
+        Returns tile at grid position (x,y), as a view of the tile type's attributes
         :param int x: X coordinate of the tile to be returned
         :param int y: Y coordinate of the tile to be returned
-        :return: Tile at grid position (x, y)
+        :return: Tile at grid position (x, y) or None if it has not been set
         :rtype: Tile
         """
-        return self._background_board[x][y]
+        index = self._tile_indices[x, y]
+        return Tile(x, y, self._tile_types[index]) if index >= 0 else None
+
+    def get_attribute_at(self, attribute_name, x, y):
+        """
+        Returns attribute of the tile at screen position (x,y). Positions outside the board use the nearest tile
+        :param str attribute_name: Name of the attribute (one of tile_attribute_grids)
+        :param float x: X coordinate of the position on the screen
+        :param float y: Y coordinate of the position on the screen
+        :return: Value of the attribute
+        """
+        grid_x = min(max(int(x / self._scale), 0), self._width - 1)
+        grid_y = min(max(int(y / self._scale), 0), self._height - 1)
+        return self._attribute_grids[attribute_name][grid_x, grid_y]
+
+    def get_attributes_at(self, attribute_name, xs, ys):
+        """
+        Returns attribute of the tiles at many screen positions at once. Positions outside the board use the nearest tile
+        :param str attribute_name: Name of the attribute (one of tile_attribute_grids)
+        :param np.ndarray xs: X coordinates of the positions on the screen
+        :param np.ndarray ys: Y coordinates of the positions on the screen
+        :return: Values of the attribute, one for every position
+        :rtype: np.ndarray
+        """
+        grid_x = np.clip((np.asarray(xs) / self._scale).astype(np.intp), 0, self._width - 1)
+        grid_y = np.clip((np.asarray(ys) / self._scale).astype(np.intp), 0, self._height - 1)
+        return self._attribute_grids[attribute_name][grid_x, grid_y]
 
     def get_screen_position(self, x, y):
         """
@@ -62,17 +133,83 @@ class BackgroundBoard:
         :param screen: Screen we blit the board on
         :param draw_all: If the function should draw all the tiles no matter if they were update since last function call
         :type draw_all: bool or None
-        :return: None
+        :return: Parts of the screen that were drawn
+        :rtype: List[pygame.Rect]
         """
-        if draw_all:
-            screen.blit(self._background_surface, (0, 0))
+        if draw_all or self._redraw_all:
+            drawn = [screen.blit(self._background_surface, (0, 0))]
         else:
+            drawn = []
             for tile in self._updated_tiles:
                 # we could do something fancy here, e.g. not blitting individual textures,
                 # but instead blitting parts of self._background_surface, but I don't think it's necessary
-                screen.blit(tile.get_attribute("texture"), self.get_screen_position(tile.x, tile.y))
+                drawn.append(screen.blit(tile.get_attribute("texture"), self.get_screen_position(tile.x, tile.y)))
+
+        self._updated_tiles = []
+        self._redraw_all = False
+        return drawn
+
+    def load_tiles(self, palette, tile_indices, background_cache=None):
+        """
+        Fills the board from a tile palette. Every palette resource is loaded once, the attribute grids are filled by
+        indexing the palette's values and the background surface is redrawn with a single blits call
+        (or copied from the background cache, if it has already been rendered)
+        :param List[str] palette: Resource names of the tiles
+        :param np.ndarray tile_indices: Palette indices of the tiles, indexed [x, y] with the grid position
+        :param BackgroundCache background_cache: Cache of rendered backgrounds, None - always render
+        :return: None
+        """
+        self._width, self._height = tile_indices.shape
+        resources = [self._game.load_resource(resource_name) for resource_name in palette]
+        self._tile_types = []
+        self._tile_type_indices = {}
+        self._tile_indices = np.array([self.tile_type(resource) for resource in resources],
+                                      dtype=np.int32)[tile_indices]
+        self._attribute_grids = {name: np.array([resource.get(name, default) for resource in resources],
+                                                dtype=dtype)[tile_indices]
+                                 for name, (dtype, default) in tile_attribute_grids.items()}
 
         self._updated_tiles = []
+        self._redraw_all = True
+
+        size = self._background_surface.get_size()
+        key = background_cache.key(resources, tile_indices, self._scale, size) if background_cache is not None else None
+        background = background_cache.get(key, size) if key is not None else None
+        if background is not None:
+            self._background_surface.blit(background, (0, 0))
+            return
+
+        # every texture is blended onto the empty (black) background once, so the blits only copy opaque pixels
+        self._background_surface.fill((0, 0, 0))
+        textures = []
+        for resource in resources:
+            texture = pygame.Surface(resource["texture"].get_size()).convert(self._background_surface)
+            texture.blit(resource["texture"], (0, 0))
+            textures.append(texture)
+        scale = self._scale
+        self._background_surface.blits([(textures[index], (x * scale, y * scale))
+                                        for x, column in enumerate(tile_indices.tolist())
+                                        for y, index in enumerate(column)],
+                                       doreturn=False)
+        if key is not None:
+            background_cache.store(key, self._background_surface)
+
+    def tile_indices(self):
+        """
+        Returns the board as a tile palette, in the order the tiles first appear row by row, and an index array
+        :return: Palette (resource names) and palette indices of the tiles indexed [x, y]
+        :rtype: (List[str], np.ndarray)
+        """
+        if (self._tile_indices < 0).any():
+            raise ValueError("Not all tiles of the board are set")
+        types, first, inverse = np.unique(self._tile_indices.T.ravel(), return_index=True, return_inverse=True)
+        order = np.argsort(first)
+        palette = {}  # {"tile_filename": index, ...}, types of the same resource share an index
+        type_to_palette = np.empty(len(types), dtype=np.int64)
+        type_to_palette[order] = [palette.setdefault(self._tile_types[tile_type]["resource_name"], len(palette))
+                                  for tile_type in types[order].tolist()]
+        tile_indices = type_to_palette[inverse].reshape(self._height, self._width).T
+        return list(palette), tile_indices
 
     def serialize(self):
         """
@@ -85,49 +222,24 @@ class BackgroundBoard:
             "width": self._width,
             "height": self._height,
         }
-        tiles_to_chars = {}
-        # dict containing {"tile_filename" : "C", ...} (C is a char representing the tile in tiles_string)
-
-        tiles_string = ""  # string representing all the tiles on the board
-
-        tile_char = 32  # decimal value of tile char
+        palette, tile_indices = self.tile_indices()
+        if len(palette) > 127 - 32:
+            raise OverflowError("Too many different tiles")
 
-        for y in range(self._height):
-            for x in range(self._width):
-                tile_type = self._background_board[x][y].get_attribute("resource_name")
-                char = tiles_to_chars.get(tile_type)
-                if char is None:
-                    if tile_char == 127:
-                        raise OverflowError("Too many different tiles")
-                    char = chr(tile_char)
-                    tiles_to_chars[tile_type] = char
-                    tile_char += 1
-                tiles_string += char
-
-        chars_to_tiles = {value: key for key, value in tiles_to_chars.items()}  # inverting the dict
-
-        board_data["tiles"] = chars_to_tiles
-        board_data["tiles_string"] = tiles_string
+        # every tile is represented by a char in tiles_string, starting from chr(32)
+        board_data["tiles"] = {chr(32 + i): tile_file for i, tile_file in enumerate(palette)}
+        board_data["tiles_string"] = (tile_indices.T + 32).astype(np.uint8).tobytes().decode("ascii")
 
         return board_data
 
-    def deserialize(self, board_data):
+    def deserialize(self, board_data, background_cache=None):
         """
         Deserializes the board from a dict object
         :param dict board_data: Dictionary containing serialized board
+        :param BackgroundCache background_cache: Cache of rendered backgrounds, None - always render
         :return: None
         """
-
-        self._width = board_data["width"]
-        self._height = board_data["height"]
-
-        for x in range(self._width):
-            for y in range(self._height):
-                char = board_data["tiles_string"][x + y * self._width]
-                tile_file = board_data["tiles"][char]
-                tile_attributes = self._game.load_resource(tile_file)
-                tile = Tile(x, y, tile_attributes)
-                self.set_tile(x, y, tile)
+        self.load_tiles(*tiles_from_board_data(board_data), background_cache)
 
     @property
     def width(self):
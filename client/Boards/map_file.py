@@ -0,0 +1,184 @@
+import argparse
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+# File header: magic, format version, size of one tile index (1 or 2 bytes), width, height (tiles),
+# number of palette entries, number of spawn points, size and SHA-256 of the JSON map the map was converted from
+map_file_header = struct.Struct("<4sHBxHHHHQ32s")
+map_file_magic = b"TMAP"
+map_file_version = 2
+no_source_stamp = (0, bytes(32))
+map_file_extension = ".tmap"
+# Palette entry: length of the UTF-8 resource name that follows
+palette_entry_header = struct.Struct("<H")
+# Spawn points are stored as (x, y, angle) rows: grid position and rotation in degrees
+spawn_point_dtype = np.dtype("<f8")
+index_dtypes = {1: np.dtype("<u1"), 2: np.dtype("<u2")}
+
+
+def source_stamp(filename):
+    """
+    Returns what a binary map stores about the JSON map it was converted from
+    :param str filename: Name of the JSON map
+    :return: Size and SHA-256 digest of the file
+    :rtype: (int, bytes)
+    """
+    with open(filename, "rb") as file:
+        data = file.read()
+    return len(data), hashlib.sha256(data).digest()
+
+
+def save_binary_map(filename, palette, tile_indices, spawn_points, stamp=no_source_stamp):
+    """
+    Saves a map in the binary format: header, tile palette, spawn points and the tile index array. The file is
+    replaced at once, so it is never read half-written
+    :param str filename: Name of the file the map will be saved at
+    :param List[str] palette: Resource names of the tiles used on the map
+    :param np.ndarray tile_indices: Palette indices of the tiles, indexed [x, y] with the grid position
+    :param list spawn_points: Spawn points as [x, y, angle] in grid units
+    :param (int, bytes) stamp: source_stamp of the JSON map the map was converted from, if there is one
+    :return: None
+    """
+    if len(palette) > 0xFFFF:
+        raise OverflowError("Too many different tiles")
+    index_size = 1 if len(palette) <= 0x100 else 2
+    width, height = tile_indices.shape
+    spawn_points = np.asarray(spawn_points, dtype=spawn_point_dtype).reshape(-1, 3)
+
+    with open(filename + ".part", "wb") as file:
+        file.write(map_file_header.pack(map_file_magic, map_file_version, index_size, width, height, len(palette),
+                                        len(spawn_points), *stamp))
+        for resource_name in palette:
+            encoded = resource_name.encode("utf-8")
+            file.write(palette_entry_header.pack(len(encoded)))
+            file.write(encoded)
+        file.write(spawn_points.tobytes())
+        # rows of the map one after another, like the tiles_string of the JSON maps
+        file.write(np.ascontiguousarray(tile_indices.T, dtype=index_dtypes[index_size]).tobytes())
+    os.replace(filename + ".part", filename)
+
+
+def load_binary_map(filename):
+    """
+    Loads a map saved by save_binary_map. The tile indices are read with a single array read
+    :param str filename: Name of the file which the map will be loaded from
+    :return: Palette (resource names), palette indices of the tiles indexed [x, y] and spawn points as [x, y, angle]
+    :rtype: (List[str], np.ndarray, List[List[float]])
+    """
+    with open(filename, "rb") as file:
+        data = file.read()
+
+    if len(data) < map_file_header.size:
+        raise ValueError(f"{filename} is not a map of this game version")
+    magic, version, index_size, width, height, palette_size, spawn_count, _, _ = map_file_header.unpack_from(data, 0)
+    if magic != map_file_magic or version != map_file_version or index_size not in index_dtypes:
+        raise ValueError(f"{filename} is not a map of this game version")
+    offset = map_file_header.size
+
+    palette = []
+    for _ in range(palette_size):
+        length, = palette_entry_header.unpack_from(data, offset)
+        offset += palette_entry_header.size
+        palette.append(data[offset:offset + length].decode("utf-8"))
+        offset += length
+
+    spawn_points = np.frombuffer(data, dtype=spawn_point_dtype, count=spawn_count * 3, offset=offset)
+    offset += spawn_points.nbytes
+
+    tile_indices = np.frombuffer(data, dtype=index_dtypes[index_size], count=width * height, offset=offset)
+    tile_indices = tile_indices.reshape(height, width).T
+    if palette_size == 0 or tile_indices.max(initial=0) >= palette_size:
+        raise ValueError(f"{filename} uses tiles missing from its palette")
+    return palette, tile_indices, spawn_points.reshape(-1, 3).tolist()
+
+
+def load_source_stamp(filename):
+    """
+    Reads the source_stamp a binary map was saved with, without reading the rest of the map
+    :param str filename: Name of the binary map
+    :return: Size and SHA-256 digest of the JSON map it was converted from, None if it is not a map of this version
+    :rtype: (int, bytes) | None
+    """
+    with open(filename, "rb") as file:
+        data = file.read(map_file_header.size)
+    if len(data) < map_file_header.size:
+        return None
+    magic, version, _, _, _, _, _, source_size, source_digest = map_file_header.unpack(data)
+    if magic != map_file_magic or version != map_file_version:
+        return None
+    return source_size, source_digest
+
+
+def tiles_from_board_data(board_data):
+    """
+    Converts the board of a JSON map (tiles_string and its chars) into a palette and an index array
+    :param dict board_data: "map_data" of a JSON map
+    :return: Palette (resource names) and palette indices of the tiles indexed [x, y]
+    :rtype: (List[str], np.ndarray)
+    """
+    chars = sorted(board_data["tiles"])
+    palette = [board_data["tiles"][char] for char in chars]
+    char_to_index = np.full(128, -1, dtype=np.int64)  # serialize uses chars 32-126
+    char_to_index[[ord(char) for char in chars]] = np.arange(len(chars))
+
+    codes = np.frombuffer(board_data["tiles_string"].encode("ascii"), dtype=np.uint8)
+    tile_indices = char_to_index[codes]
+    if len(tile_indices) != board_data["width"] * board_data["height"] or (tile_indices < 0).any():
+        raise ValueError("tiles_string does not match the board")
+    return palette, tile_indices.reshape(board_data["height"], board_data["width"]).T
+
+
+def convert_json_map(json_filename, binary_filename=None):
+    """
+    Converts a JSON map (as saved by the map editor) to the binary format
+    :param str json_filename: Name of the JSON map
+    :param str binary_filename: Name of the binary map, by default the JSON map's name with map_file_extension
+    :return: Name of the binary map
+    :rtype: str
+    """
+    if binary_filename is None:
+        binary_filename = os.path.splitext(json_filename)[0] + map_file_extension
+    with open(json_filename, "r") as file:
+        save_data = json.load(file)
+    palette, tile_indices = tiles_from_board_data(save_data["map_data"])
+    save_binary_map(binary_filename, palette, tile_indices, save_data["spawn_points"], source_stamp(json_filename))
+    return binary_filename
+
+
+def map_file_to_load(filename):
+    """
+    Returns the map file that should be loaded. A binary map is loaded if it was converted from the JSON map with the
+    same name as it is now (the size and hash stored in it match), or if there is no JSON map. Otherwise (e.g. the
+    JSON map was edited by hand) the binary map is converted again, and the JSON map is loaded only if that fails.
+    File times are not used, they are not kept by git
+    :param str filename: Name of the map file (binary or JSON map)
+    :return: Name of the map file to be loaded
+    :rtype: str
+    """
+    if not filename.endswith(map_file_extension):
+        return filename
+    json_filename = os.path.splitext(filename)[0] + ".json"
+    if not os.path.exists(json_filename):
+        return filename
+    if os.path.exists(filename) and load_source_stamp(filename) == source_stamp(json_filename):
+        return filename
+    try:
+        return convert_json_map(json_filename, filename)
+    except OSError as e:
+        return json_filename
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converts JSON maps to the binary map format.")
+    parser.add_argument("maps", nargs="+", help="JSON maps, e.g. maps/*.json")
+    args = parser.parse_args()
+    for json_filename in args.maps:
+        print(json_filename, "->", convert_json_map(json_filename))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import asyncio
+import queue
+import socket
+import threading
+from ctypes import *
+
+import constants
+from Networking.connection import Connection
+from Networking.payload_configuration import PayloadConfiguration
+from Networking.payload_information import PayloadInformation
+from Networking.payload_client_preferences import PayloadClientPreferences
+
+
+class AsyncConnection(Connection):
+    """
+    Connection that does all the socket I/O on an asyncio event loop running in a background thread.
+    The game never waits for the network: outgoing messages are handed to the loop and incoming frames are
+    delivered through a queue that is drained once per frame.
+    Attributes:
+        _event_loop: Event loop the streams live on
+        _loop_thread: Thread running the event loop
+        _reader: asyncio.StreamReader of the connection
+        _writer: asyncio.StreamWriter of the connection
+        _read_future: Future of the task reading the information from the server
+        _inbound_queue: Blocks of complete frames received from the server, waiting for the game
+        _connection_lost: Set by the reader task when the server closes or resets the connection
+    """
+    def __init__(self, game, address=constants.default_game_server_ip, port=constants.game_port):
+        super().__init__(game, address, port)
+        self._event_loop = None
+        self._loop_thread = None
+        self._reader = None
+        self._writer = None
+        self._read_future = None
+        self._inbound_queue = queue.Queue()
+        self._connection_lost = False
+
+    def establish_connection(self):
+        """
+        Starts the event loop thread and tries to establish connection with the server.
+        :return: Whether the connection has succeeded or not
+        :rtype: bool
+        """
+        self._event_loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._event_loop.run_forever, daemon=True)
+        self._loop_thread.start()
+        self._connection_lost = False
+        future = asyncio.run_coroutine_threadsafe(asyncio.open_connection(self._address, self._port),
+                                                  self._event_loop)
+        try:
+            self._reader, self._writer = future.result(timeout=constants.socket_timeout)
+        except (TimeoutError, OSError) as err:
+            future.cancel()
+            self.stop_event_loop()
+            return False
+        self._writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return True
+
+    def close_connection(self):
+        """
+        Sends the disconnect information (unless the connection has been lost), closes the connection with the server
+        and stops the event loop
+        :return: None
+        """
+        if self._event_loop is None:
+            return
+        if not self._connection_lost:
+            self.send_disconnect_information()
+            self.flush_information()
+        asyncio.run_coroutine_threadsafe(self.close_writer(), self._event_loop).result(constants.socket_timeout)
+        self.stop_event_loop()
+        self.stop_recording()
+
+    async def close_writer(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except (ConnectionResetError, BrokenPipeError) as e:
+            pass
+
+    def stop_event_loop(self):
+        """
+        Stops the event loop and waits for its thread to finish
+        :return: None
+        """
+        if self._event_loop is None:
+            return
+        if self._read_future is not None:
+            self._read_future.cancel()
+            self._read_future = None
+        self._event_loop.call_soon_threadsafe(self._event_loop.stop)
+        self._loop_thread.join()
+        self._event_loop.close()
+        self._event_loop = None
+        self._loop_thread = None
+
+    # Sending part
+
+    def write(self, data):
+        """
+        Hands data to the stream writer on the event loop thread. Never blocks
+        :param data: Bytes to be sent
+        :return: None
+        :raises ConnectionResetError: If the connection has already been lost
+        """
+        if self._connection_lost or self._event_loop is None:
+            raise ConnectionResetError("Connection with the server has been lost")
+        self._event_loop.call_soon_threadsafe(self._writer.write, bytes(data))
+
+    def send_preferences(self, tank_version, tank_full_hp):
+        try:
+            self.write(PayloadClientPreferences(tank_version, tank_full_hp))
+        except ConnectionResetError as e:
+            self._game.show_server_full_or_busy_screen()
+            return False
+        return True
+
+    def flush_information(self):
+        """
+        Hands all the queued information to the event loop with a single write
+        :return: If handing the information over succeeded, False if the connection has been lost
+        :rtype: bool
+        """
+        try:
+            self._outbound_batch.flush(self.write)
+        except ConnectionResetError as e:
+            return False
+        return True
+
+    # Receiving part
+
+    async def read_information(self):
+        """
+        Reads the stream until the connection is closed and puts every block of complete frames into the inbound queue
+        :return: None
+        """
+        frame_size = sizeof(PayloadInformation)
+        pending = bytearray()
+        try:
+            while True:
+                data = await self._reader.read(constants.receive_buffer_size)
+                if not data:
+                    print("##DEBUG Error - connection closed by the server!")
+                    break
+                pending += data
+                complete_length = len(pending) - len(pending) % frame_size
+                if complete_length:
+                    self._inbound_queue.put(bytes(pending[:complete_length]))
+                    del pending[:complete_length]
+        except (ConnectionResetError, ConnectionAbortedError) as e:
+            pass
+        self._connection_lost = True
+
+    def receive_frames(self):
+        """
+        Yields the blocks of complete frames the reader task has received so far. Never blocks
+        :return: Generator of memoryviews of complete frames
+        :rtype: Iterator[memoryview]
+        """
+        while True:
+            try:
+                frames = self._inbound_queue.get_nowait()
+            except queue.Empty:
+                break
+            yield memoryview(frames)
+
+    @property
+    def connection_lost(self):
+        """
+        True if the server has closed the connection and all the frames received before have been taken from the
+        inbound queue
+        """
+        return self._connection_lost and self._inbound_queue.empty()
+
+    def receive_configuration(self):
+        """
+        Receives the configuration of the game from the server and starts reading the information in the background
+        :return: Width, Height, Scale of the background board, Number of players, This player's ID, X coordinate this player's tank should spawn on, Y coordinate this player's tank should spawn on, number of the map used in this game
+        :rtype: (int, int, int, int, int, int, int, int)
+        """
+        future = asyncio.run_coroutine_threadsafe(self._reader.readexactly(sizeof(PayloadConfiguration)),
+                                                  self._event_loop)
+        try:
+            buff = future.result(timeout=constants.configuration_receive_timeout)
+        except (TimeoutError, asyncio.IncompleteReadError, ConnectionResetError, ConnectionAbortedError) as e:
+            future.cancel()
+            return constants.configuration_receive_error, constants.configuration_receive_error, constants.configuration_receive_error, constants.configuration_receive_error, 0, 0, 0, 0
+        self._read_future = asyncio.run_coroutine_threadsafe(self.read_information(), self._event_loop)
+        payload_in = PayloadConfiguration.from_buffer_copy(buff)
+        return payload_in.width, payload_in.height, payload_in.background_scale, payload_in.player_count, payload_in.player_id, payload_in.tank_spawn_x, payload_in.tank_spawn_y, payload_in.map_number
@@ -1,12 +1,38 @@
 import socket
 from ctypes import *
-from time import sleep
+from time import sleep, monotonic
 
+import numpy as np
 import select
 import constants
 from Networking.payload_configuration import PayloadConfiguration
-from Networking.payload_information import PayloadInformation
+from Networking.payload_information import PayloadInformation, payload_information_dtype
 from Networking.payload_client_preferences import PayloadClientPreferences
+from Networking.outbound_batch import OutboundBatch
+from Networking.recording import MessageRecorder
+
+# Kinds of the received information rows, states first - see Connection.process_received_information_array
+TANK_STATE, PROJECTILE_UPDATE, PROJECTILE_CREATE, DISCONNECT, DEATH, WRONG_TARGET, UNKNOWN = range(7)
+
+
+def create_information_kinds():
+    """
+    Creates the table of information kinds, indexed by the action and the target byte of the information
+    :return: Kind of every action and target
+    :rtype: np.ndarray
+    """
+    kinds = np.full((256, 256), UNKNOWN, dtype=np.int8)
+    for action in (constants.information_update, constants.information_create):
+        kinds[ord(action)] = WRONG_TARGET
+        kinds[ord(action), ord(constants.information_tank)] = TANK_STATE
+    kinds[ord(constants.information_update), ord(constants.information_projectile)] = PROJECTILE_UPDATE
+    kinds[ord(constants.information_create), ord(constants.information_projectile)] = PROJECTILE_CREATE
+    kinds[ord(constants.information_disconnect)] = DISCONNECT
+    kinds[ord(constants.information_death)] = DEATH
+    return kinds
+
+
+information_kinds = create_information_kinds()
 
 
 class Connection:
@@ -18,13 +44,27 @@ class Connection:
         _socket: Socket object used for communication
         _player_id: This client's player ID
         _game: Game object
+        _outbound_batch: Messages waiting to be sent to the server at the end of the frame
+        _receive_buffer: Preallocated buffer the socket is drained into
+        _receive_view: Memoryview of the receive buffer
+        _receive_length: Number of bytes waiting in the receive buffer (at most one partial frame between calls)
+        _connection_lost: Set when the server closes or resets the connection
+        _record_file: File the received information is recorded to, None - not recorded
+        _recorder: MessageRecorder writing the recording, once the configuration has been received
     """
-    def __init__(self, game, address=constants.default_game_server_ip):
-        self._port = 2137
+    def __init__(self, game, address=constants.default_game_server_ip, port=constants.game_port):
+        self._port = port
         self._address = address
         self._socket = None
         self._player_id = None
         self._game = game
+        self._outbound_batch = OutboundBatch(constants.outbound_batch_capacity)
+        self._receive_buffer = bytearray(constants.receive_buffer_size)
+        self._receive_view = memoryview(self._receive_buffer)
+        self._receive_length = 0
+        self._connection_lost = False
+        self._record_file = None
+        self._recorder = None
 
     def establish_connection(self):
         """
@@ -34,6 +74,8 @@ class Connection:
         :raises socket.error: If the socket failed to create
         :raises AttributeError: If the socket failed to create
         """
+        self._receive_length = 0
+        self._connection_lost = False
         try:
             self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self._socket.settimeout(constants.socket_timeout)
@@ -48,11 +90,52 @@ class Connection:
 
     def close_connection(self):
         """
-        Closes the connection with the server
+        Closes the connection with the server. The disconnect information is only sent if the connection has not been
+        lost
         :return: None
         """
-        self.send_disconnect_information()
+        if not self._connection_lost:
+            self.send_disconnect_information()
+            self.flush_information()
         self._socket.close()
+        self.stop_recording()
+
+    def clock(self):
+        """
+        Returns the time the received information is stamped with and the other players' entities are interpolated at
+        :return: Time in seconds
+        :rtype: float
+        """
+        return monotonic()
+
+    # Recording part
+
+    def record_to(self, filename):
+        """
+        Makes the connection record all the information received from the server, once the configuration is received
+        :param str filename: Name of the file the recording is written to
+        :return: None
+        """
+        self._record_file = filename
+
+    def start_recording(self, player_id, map_number):
+        """
+        Starts writing the recording, if a file has been given and the recording has not been started yet
+        :param int player_id: This client's player ID
+        :param int map_number: Number of the map the game is played on
+        :return: None
+        """
+        if self._record_file is not None and self._recorder is None:
+            self._recorder = MessageRecorder(self._record_file, player_id, map_number)
+
+    def stop_recording(self):
+        """
+        Closes the recording, if there is one
+        :return: None
+        """
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
 
     # Sending part
 
@@ -116,9 +199,30 @@ class Connection:
                                      x_location, y_location, projectile_angle, hp,
                                      float(projectile_id), 0, False)
 
+    def send_want_to_change_projectiles(self, projectile_ids, x_locations, y_locations, projectile_angles, hp):
+        """
+        Sends update information about many projectiles at once
+        :param np.ndarray projectile_ids: IDs of the projectiles to be updated
+        :param np.ndarray x_locations: X coordinates of the projectiles' positions
+        :param np.ndarray y_locations: Y coordinates of the projectiles' positions
+        :param np.ndarray projectile_angles: Angles of the projectiles
+        :param float hp: Whether the projectiles exist or should be deleted
+        :return: None
+        """
+        information_arr = np.zeros(len(projectile_ids), dtype=payload_information_dtype)
+        information_arr["action"] = constants.information_update.encode('utf-8')
+        information_arr["type_of"] = constants.information_projectile.encode('utf-8')
+        information_arr["player_id"] = self.player_id
+        information_arr["x_location"] = x_locations
+        information_arr["y_location"] = y_locations
+        information_arr["tank_angle"] = projectile_angles
+        information_arr["hp"] = hp
+        information_arr["turret_angle"] = projectile_ids
+        self.send_information_array(information_arr)
+
     def send_single_information(self, action, type_of, player_id, x_location, y_location, tank_angle, hp, turret_angle, tank_version, shield_active):
         """
-        Sends single information to the server
+        Queues single information to be sent to the server with the next flush_information call
         :param str action: (char) - Action to be taken
         :param str type_of: (char) - Subject of the action
         :param int player_id: ID of the player this action refers to
@@ -127,49 +231,110 @@ class Connection:
         :param float tank_angle: Angle of the subject
         :param float hp: HP of the subject
         :param float turret_angle: Angle of the turret or ID of the projectile
+        :return: If queueing the information succeeded
+        :rtype: bool
+        """
+        if self._outbound_batch.is_full() and not self.flush_information():
+            return False
+        return self._outbound_batch.add(action.encode('utf-8'), type_of.encode('utf-8'), player_id, x_location,
+                                        y_location, tank_angle, hp, turret_angle, tank_version, shield_active)
+
+    def send_information_array(self, information_arr):
+        """
+        Queues many information rows to be sent to the server with the next flush_information call
+        :param np.ndarray information_arr: Information rows (dtype payload_information_dtype)
+        :return: If queueing the information succeeded
+        :rtype: bool
+        """
+        while True:
+            information_arr = information_arr[self._outbound_batch.add_array(information_arr):]
+            if len(information_arr) == 0:
+                return True
+            if not self.flush_information():
+                return False
+
+    def flush_information(self):
+        """
+        Sends all the queued information to the server with a single call. A lost connection is reported by
+        connection_lost, the game decides what to show
         :return: If sending the information succeeded
         :rtype: bool
         """
-        payload_out = PayloadInformation(action.encode('utf-8'), type_of.encode('utf-8'), player_id, x_location,
-                                         y_location, tank_angle, hp,
-                                         turret_angle, tank_version, shield_active)
-        nsent = None
         try:
-            nsent = self._socket.send(payload_out)
-        except ConnectionResetError as e:
-            self._game.show_server_full_or_busy_screen()
-        if nsent:
-            return True
-        return False
+            self._outbound_batch.flush(self._socket.sendall)
+        except (ConnectionResetError, BrokenPipeError) as e:
+            self.handle_connection_lost()
+            return False
+        return True
 
     # Receiving part
 
+    def receive_frames(self):
+        """
+        Drains the socket into the receive buffer and yields the complete frames received so far.
+        Bytes of an incomplete frame are kept in the buffer and completed by the following reads. If the server has
+        closed the connection, everything received before is still yielded and connection_lost is set
+        :return: Generator of memoryviews of complete frames, each valid only until the next iteration
+        :rtype: Iterator[memoryview]
+        """
+        frame_size = sizeof(PayloadInformation)
+        while not self._connection_lost:
+            r, _, _ = select.select([self._socket], [], [], 0)
+            if not r:
+                return
+            try:
+                nread = self._socket.recv_into(self._receive_view[self._receive_length:])
+            except ConnectionResetError as e:
+                self.handle_connection_lost()
+                return
+            if nread == 0:
+                print("##DEBUG Error - connection closed by the server!")
+                self.handle_connection_lost()
+                return
+            self._receive_length += nread
+            complete_length = self._receive_length - self._receive_length % frame_size
+            if complete_length:
+                yield self._receive_view[:complete_length]
+            remaining = self._receive_length - complete_length
+            if remaining and complete_length:
+                self._receive_view[:remaining] = self._receive_view[complete_length:self._receive_length]
+            self._receive_length = remaining
+
+    def handle_connection_lost(self):
+        """
+        Called when the server closes or resets the connection. The game is told by connection_lost,
+        after it has processed the information received before
+        :return: None
+        """
+        self._connection_lost = True
+
     def receive_all_information(self):
         """
         Receives all available information from the server.
         :return: List of the information received from the server
         :rtype: list
         """
-        quit = False
+        frame_size = sizeof(PayloadInformation)
         receivings = []
-        while quit is False:
-            r, _, _ = select.select([self._socket], [], [], 0)
-            if r:
-                buff = None
-                try:
-                    buff = self._socket.recv(sizeof(PayloadInformation))
-                except ConnectionResetError as e:
-                    self._game.show_server_full_or_busy_screen()
-                if len(buff) < 28:
-                    print("##DEBUG Error - received less bytes than expected!")
-                    self._game.show_server_full_or_busy_screen()
-                    return receivings
-                payload_in: PayloadInformation = PayloadInformation.from_buffer_copy(buff)
-                receivings.append(payload_in)
-            else:
-                quit = True
+        for frames in self.receive_frames():
+            for offset in range(0, len(frames), frame_size):
+                receivings.append(PayloadInformation.from_buffer_copy(frames, offset))
         return receivings
 
+    def receive_all_information_array(self):
+        """
+        Receives all available information from the server as one structured array
+        :return: Array of the information received from the server (dtype payload_information_dtype)
+        :rtype: np.ndarray
+        """
+        blocks = [np.frombuffer(frames, dtype=payload_information_dtype).copy() for frames in self.receive_frames()]
+        if not blocks:
+            return np.empty(0, dtype=payload_information_dtype)
+        information_arr = blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+        if self._recorder is not None:
+            self._recorder.record(information_arr)
+        return information_arr
+
     def receive_configuration(self):
         """
         Receives the configuration of the game from the server
@@ -234,6 +399,62 @@ class Connection:
             else:
                 print(f"ERROR: Received wrong command! You wanted to: {received_information.action.decode('utf-8')}")
 
+    def process_received_information_array(self, received_information_arr):
+        """
+        Processes a whole batch of information at once. Tank states and projectile updates do not depend on each other,
+        so every run of consecutive ones is handed to the game in two calls - the tanks first, so new players' tanks
+        exist when their projectiles are updated. Created projectiles, disconnects and deaths end the runs and are
+        handed to the game in the order they arrived. Only the newest state of every tank in a run is applied. Nothing
+        after a death is processed.
+        :param np.ndarray received_information_arr: Information received from the server (dtype payload_information_dtype)
+        :return: None
+        """
+        if len(received_information_arr) == 0:
+            return
+        # projectile updates with hp == constants.projectile_not_exists delete projectiles
+        kinds = information_kinds[received_information_arr["action"].view(np.uint8),
+                                  received_information_arr["type_of"].view(np.uint8)]
+        if kinds.max() <= PROJECTILE_UPDATE:  # usually the whole batch is one run of states
+            run_bounds, run_kinds = [0, len(kinds)], [TANK_STATE]
+        else:
+            runs = np.where(kinds == PROJECTILE_UPDATE, TANK_STATE, kinds)
+            run_bounds = [0] + (np.flatnonzero(runs[1:] != runs[:-1]) + 1).tolist() + [len(runs)]
+            run_kinds = runs[run_bounds[:-1]].tolist()
+        for kind, start, end in zip(run_kinds, run_bounds[:-1], run_bounds[1:]):
+            run = received_information_arr[start:end]
+            if kind == TANK_STATE:
+                is_tank = kinds[start:end] == TANK_STATE
+                tanks = run[is_tank]
+                if len(tanks) > 0:
+                    # The server sends every tank with every answer - only the last state of each player matters
+                    _, last_indexes = np.unique(tanks["player_id"][::-1], return_index=True)
+                    self._game.update_tanks(tanks[np.sort(len(tanks) - 1 - last_indexes)])
+                if len(tanks) < len(run):
+                    self._game.update_projectiles(run[~is_tank])
+            elif kind == PROJECTILE_CREATE:
+                self._game.add_projectiles_from_network(run)
+            elif kind == DISCONNECT:
+                self._game.remove_tanks(run["player_id"].tolist())
+            elif kind == DEATH:
+                self._game.show_death_screen()
+                return
+            elif kind == WRONG_TARGET:
+                print("##ERROR: Received command to update. The target was inappropriate!")
+            else:
+                for action in run["action"].tolist():
+                    print(f"ERROR: Received wrong command! You wanted to: {action.decode('utf-8')}")
+
+    @property
+    def outbound_stats(self):
+        return self._outbound_batch.stats()
+
+    @property
+    def connection_lost(self):
+        """
+        True if the server has closed the connection and everything it sent before has been received
+        """
+        return self._connection_lost
+
     @property
     def player_id(self):
         return self._player_id
@@ -0,0 +1,105 @@
+import struct
+from ctypes import sizeof
+
+from Networking.payload_information import PayloadInformation
+
+# Same layout as PayloadInformation: two chars, padding, int32, five floats, int32, bool, padding
+payload_information_struct = struct.Struct("<ccxxifffffi?3x")
+assert payload_information_struct.size == sizeof(PayloadInformation)
+
+
+class OutboundBatch:
+    """
+    Collects the information sent to the server during one frame and sends it with a single call
+    Attributes:
+        _capacity: Number of messages the buffer can hold before it has to be flushed
+        _buffer: Preallocated buffer the messages are packed into
+        _length: Number of bytes waiting in the buffer
+        _flush_count: Number of flushes that sent anything
+        _messages_flushed: Number of messages sent in total
+        _bytes_flushed: Number of bytes sent in total
+        _largest_batch: Highest number of messages sent by a single flush
+    """
+    def __init__(self, capacity):
+        self._capacity = capacity
+        self._buffer = bytearray(capacity * payload_information_struct.size)
+        self._view = memoryview(self._buffer)
+        self._length = 0
+
+        self._flush_count = 0
+        self._messages_flushed = 0
+        self._bytes_flushed = 0
+        self._largest_batch = 0
+
+    def add(self, action, type_of, player_id, x_location, y_location, tank_angle, hp, turret_angle, tank_version,
+            shield_active):
+        """
+        Packs single information into the buffer
+        :param bytes action: (char) - Action to be taken
+        :param bytes type_of: (char) - Subject of the action
+        :return: False if the buffer is full and has to be flushed first, True otherwise
+        :rtype: bool
+        """
+        if self.is_full():
+            return False
+        payload_information_struct.pack_into(self._buffer, self._length, action, type_of, player_id, x_location,
+                                             y_location, tank_angle, hp, turret_angle, tank_version, shield_active)
+        self._length += payload_information_struct.size
+        return True
+
+    def add_array(self, information_arr):
+        """
+        Copies as many information rows as fit into the buffer
+        :param np.ndarray information_arr: Information rows (dtype payload_information_dtype)
+        :return: Number of rows added
+        :rtype: int
+        """
+        count = min(len(information_arr), (len(self._buffer) - self._length) // payload_information_struct.size)
+        end = self._length + count * payload_information_struct.size
+        self._buffer[self._length:end] = information_arr[:count].tobytes()
+        self._length = end
+        return count
+
+    def flush(self, send):
+        """
+        Hands everything that is waiting in the buffer to a single send call and empties the buffer
+        :param Callable[[memoryview], None] send: Function sending the whole given buffer (e.g. socket.sendall)
+        :return: None
+        :raises ConnectionResetError: If the server has closed the connection
+        """
+        if self._length == 0:
+            return
+        messages = self.pending_messages
+        try:
+            send(self._view[:self._length])
+        finally:
+            self._length = 0
+        self._flush_count += 1
+        self._messages_flushed += messages
+        self._bytes_flushed += messages * payload_information_struct.size
+        self._largest_batch = max(self._largest_batch, messages)
+
+    def is_full(self):
+        return self._length == len(self._buffer)
+
+    def stats(self):
+        """
+        Returns the flush statistics
+        :return: Dictionary with flush_count, messages_flushed, bytes_flushed, largest_batch and average_batch
+        :rtype: dict
+        """
+        return {
+            "flush_count": self._flush_count,
+            "messages_flushed": self._messages_flushed,
+            "bytes_flushed": self._bytes_flushed,
+            "largest_batch": self._largest_batch,
+            "average_batch": self._messages_flushed / self._flush_count if self._flush_count else 0.0,
+        }
+
+    @property
+    def pending_messages(self):
+        return self._length // payload_information_struct.size
+
+    @property
+    def capacity(self):
+        return self._capacity
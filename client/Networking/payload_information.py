@@ -1,5 +1,7 @@
 from ctypes import *
 
+import numpy as np
+
 
 class PayloadInformation(Structure):
     """
@@ -17,3 +19,7 @@ class PayloadInformation(Structure):
         ("tank_version", c_int32),
         ("shield_active", c_bool),
     ]
+
+
+# NumPy view of the same layout (padding included), used to decode whole batches of information at once
+payload_information_dtype = np.dtype(PayloadInformation)
@@ -0,0 +1,140 @@
+import mmap
+import struct
+import time
+from ctypes import sizeof
+
+import numpy as np
+
+from Networking.payload_information import PayloadInformation, payload_information_dtype
+
+# File header: magic, size of one frame, this client's player ID, map number
+recording_header = struct.Struct("<8sIii")
+recording_magic = b"TANKREC1"
+# Chunk header: seconds since the recording started (monotonic clock), number of frames that follow
+chunk_header = struct.Struct("<dI")
+
+
+class MessageRecorder:
+    """
+    Appends the information received from the server to a binary log. Every batch becomes one chunk: a header with
+    the time it was received at, followed by the raw PayloadInformation frames
+    Attributes:
+        _file: File the log is written to
+        _start: time.monotonic() the recording started at
+        _frames: Number of frames recorded
+    """
+    def __init__(self, filename, player_id, map_number):
+        self._file = open(filename, "wb")
+        self._file.write(recording_header.pack(recording_magic, sizeof(PayloadInformation), player_id, map_number))
+        self._start = time.monotonic()
+        self._frames = 0
+
+    def record(self, information_arr):
+        """
+        Appends a batch of received information
+        :param np.ndarray information_arr: Information received from the server (dtype payload_information_dtype)
+        :return: None
+        """
+        if len(information_arr) == 0:
+            return
+        self._file.write(chunk_header.pack(time.monotonic() - self._start, len(information_arr)))
+        self._file.write(information_arr.tobytes())
+        self._frames += len(information_arr)
+
+    def close(self):
+        self._file.close()
+
+    @property
+    def frames(self):
+        return self._frames
+
+
+class RecordingReader:
+    """
+    Reads a log written by MessageRecorder. The file is memory-mapped and its chunks are indexed when it is opened, so
+    any chunk can be accessed without reading the ones before it
+    Attributes:
+        _file: Opened log file
+        _map: Memory map of the file
+        _player_id: Player ID of the client that recorded the log
+        _map_number: Map the log was recorded on
+        _times: Times the chunks were received at (seconds since the recording started)
+        _offsets: Offsets of the chunks' frames in the file
+        _counts: Numbers of frames in the chunks
+    """
+    def __init__(self, filename):
+        self._file = open(filename, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, frame_size, self._player_id, self._map_number = recording_header.unpack_from(self._map, 0)
+        if magic != recording_magic or frame_size != sizeof(PayloadInformation):
+            raise ValueError(f"{filename} is not a recording of this game version")
+
+        times, offsets, counts = [], [], []
+        offset = recording_header.size
+        while offset + chunk_header.size <= len(self._map):
+            chunk_time, count = chunk_header.unpack_from(self._map, offset)
+            offset += chunk_header.size
+            if offset + count * frame_size > len(self._map):
+                break  # the recording was cut off in the middle of a chunk
+            times.append(chunk_time)
+            offsets.append(offset)
+            counts.append(count)
+            offset += count * frame_size
+        self._times = np.array(times)
+        self._offsets = np.array(offsets, dtype=np.int64)
+        self._counts = np.array(counts, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._times)
+
+    def chunk_time(self, index):
+        return float(self._times[index])
+
+    def chunk_frames(self, index):
+        """
+        Returns the raw frames of the chunk, without copying them
+        :param int index: Index of the chunk
+        :return: Frames of the chunk
+        :rtype: memoryview
+        """
+        offset = int(self._offsets[index])
+        return memoryview(self._map)[offset:offset + int(self._counts[index]) * sizeof(PayloadInformation)]
+
+    def chunk(self, index):
+        """
+        Returns the information of the chunk
+        :param int index: Index of the chunk
+        :return: Read-only array of the information (dtype payload_information_dtype)
+        :rtype: np.ndarray
+        """
+        return np.frombuffer(self._map, dtype=payload_information_dtype, count=int(self._counts[index]),
+                             offset=int(self._offsets[index]))
+
+    def find(self, chunk_time):
+        """
+        Finds the first chunk received after the given time
+        :param float chunk_time: Seconds since the recording started
+        :return: Index of the chunk, len(self) if there is none
+        :rtype: int
+        """
+        return int(np.searchsorted(self._times, chunk_time, side="right"))
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    @property
+    def player_id(self):
+        return self._player_id
+
+    @property
+    def map_number(self):
+        return self._map_number
+
+    @property
+    def duration(self):
+        return float(self._times[-1]) if len(self._times) > 0 else 0.0
+
+    @property
+    def frame_count(self):
+        return int(self._counts.sum())
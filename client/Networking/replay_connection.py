@@ -0,0 +1,80 @@
+import time
+
+import constants
+from Networking.connection import Connection
+
+
+class ReplayConnection(Connection):
+    """
+    Connection that plays back a recording instead of talking to a server. Received information comes from the
+    recording, sent information is dropped. Its clock is the recording's: the received information is stamped with
+    the times it was recorded at, so the playback does not depend on how long the frames take
+    Attributes:
+        _reader: RecordingReader of the recording
+        _speed: Playback speed (1 - real time, 0 - one recorded chunk per frame, as fast as possible)
+        _next_chunk: Index of the next chunk to be played back
+        _start: time.monotonic() the playback started at
+        _replay_time: Time of the recording played back (seconds since the recording started)
+    """
+    def __init__(self, game, reader, speed=1.0):
+        super().__init__(game)
+        self._reader = reader
+        self._speed = speed
+        self._next_chunk = 0
+        self._start = None
+        self._replay_time = 0.0
+
+    def establish_connection(self):
+        self._receive_length = 0
+        return True
+
+    def send_preferences(self, tank_version, tank_full_hp):
+        return True
+
+    def receive_configuration(self):
+        """
+        Returns the configuration the recording was made with
+        :return: Same values as Connection.receive_configuration
+        :rtype: (int, int, int, int, int, int, int, int)
+        """
+        return (constants.window_width, constants.window_height, constants.background_scale, 1,
+                self._reader.player_id, 0, 0, self._reader.map_number)
+
+    def flush_information(self):
+        self._outbound_batch.flush(lambda data: None)
+
+    def close_connection(self):
+        self.flush_information()
+        self.stop_recording()
+
+    def clock(self):
+        """
+        Returns the time of the recording played back: the time of the last chunk played back if the speed is 0, the
+        time passed since the playback started (scaled by the speed) otherwise. It only changes when chunks are received
+        :return: Seconds since the recording started
+        :rtype: float
+        """
+        return self._replay_time
+
+    def receive_frames(self):
+        """
+        Yields the recorded chunks that are due: all chunks recorded until the time passed since the playback started
+        (scaled by the speed), or exactly one chunk if the speed is 0. Once the whole recording has been played back,
+        the connection is reported as lost
+        :return: Generator of memoryviews of complete frames
+        :rtype: Iterator[memoryview]
+        """
+        if self._next_chunk >= len(self._reader):
+            self.handle_connection_lost()
+            return
+        if self._speed == 0:
+            last_chunk = self._next_chunk + 1
+            self._replay_time = self._reader.chunk_time(self._next_chunk)
+        else:
+            if self._start is None:
+                self._start = time.monotonic() - self._reader.chunk_time(self._next_chunk) / self._speed
+            self._replay_time = (time.monotonic() - self._start) * self._speed
+            last_chunk = self._reader.find(self._replay_time)
+        while self._next_chunk < last_chunk:
+            yield self._reader.chunk_frames(self._next_chunk)
+            self._next_chunk += 1
@@ -0,0 +1,84 @@
+class TankStateFilter:
+    """
+    Decides whether the state of this client's tank has changed enough to be sent to the server.
+    Unchanged states are suppressed, except for a low-rate heartbeat that keeps the server answering.
+    Attributes:
+        _position_quantum: Smallest change of X or Y (in pixels) that is sent
+        _angle_quantum: Smallest change of the tank or turret angle (in degrees) that is sent
+        _hp_quantum: Smallest change of HP that is sent (0 - every change)
+        _heartbeat_interval: Time (in seconds) after which the state is sent even if it has not changed
+        _last_sent: Last state that has been sent (x, y, tank_angle, hp, turret_angle, shield_active)
+        _last_sent_time: Time the last state has been sent at
+    """
+    def __init__(self, position_quantum, angle_quantum, hp_quantum, heartbeat_interval):
+        self._position_quantum = position_quantum
+        self._angle_quantum = angle_quantum
+        self._hp_quantum = hp_quantum
+        self._heartbeat_interval = heartbeat_interval
+
+        self._last_sent = None
+        self._last_sent_time = 0.0
+
+        self._sent_count = 0
+        self._suppressed_count = 0
+        self._heartbeat_count = 0
+
+    @staticmethod
+    def angle_difference(first_angle, second_angle):
+        """
+        Returns the absolute difference between two angles, taking the wrap at 360 degrees into account
+        :param float first_angle: First angle in degrees
+        :param float second_angle: Second angle in degrees
+        :return: Difference in range [0;180]
+        :rtype: float
+        """
+        return abs((first_angle - second_angle + 180) % 360 - 180)
+
+    def has_changed(self, x, y, tank_angle, hp, turret_angle, shield_active):
+        """
+        Checks whether the state differs from the last sent one by at least one quantum
+        :return: If the state has changed
+        :rtype: bool
+        """
+        last_x, last_y, last_tank_angle, last_hp, last_turret_angle, last_shield_active = self._last_sent
+        return abs(x - last_x) >= self._position_quantum or abs(y - last_y) >= self._position_quantum or \
+            self.angle_difference(tank_angle, last_tank_angle) >= self._angle_quantum or \
+            self.angle_difference(turret_angle, last_turret_angle) >= self._angle_quantum or \
+            (hp != last_hp and abs(hp - last_hp) >= self._hp_quantum) or \
+            shield_active != last_shield_active
+
+    def should_send(self, x, y, tank_angle, hp, turret_angle, shield_active, now):
+        """
+        Checks whether the state should be sent and, if so, remembers it as the last sent one
+        :param int x: X coordinate of the tank
+        :param int y: Y coordinate of the tank
+        :param float tank_angle: Angle of the tank
+        :param float hp: HP of the tank
+        :param float turret_angle: Angle of the tank's turret
+        :param bool shield_active: Whether the shield is active
+        :param float now: Current time in seconds (monotonic)
+        :return: If the state should be sent
+        :rtype: bool
+        """
+        if self._last_sent is not None and not self.has_changed(x, y, tank_angle, hp, turret_angle, shield_active):
+            if now - self._last_sent_time < self._heartbeat_interval:
+                self._suppressed_count += 1
+                return False
+            self._heartbeat_count += 1
+
+        self._last_sent = (x, y, tank_angle, hp, turret_angle, shield_active)
+        self._last_sent_time = now
+        self._sent_count += 1
+        return True
+
+    def stats(self):
+        """
+        Returns the send statistics
+        :return: Dictionary with sent, suppressed and heartbeats (heartbeats are included in sent)
+        :rtype: dict
+        """
+        return {
+            "sent": self._sent_count,
+            "suppressed": self._suppressed_count,
+            "heartbeats": self._heartbeat_count,
+        }
@@ -0,0 +1,264 @@
+import queue
+import select
+import socket
+import threading
+
+import numpy as np
+
+import constants
+from Networking.connection import Connection
+from Networking.payload_information import payload_information_dtype
+
+
+class WorldSnapshot:
+    """
+    Newest state of the world received from the server since the last swap. Repeated states of a tank or projectile
+    collapse into the newest one, everything that changes which entities exist (created and deleted projectiles,
+    disconnects) is kept row by row, in arrival order
+    Attributes:
+        rows: Information rows in arrival order. Keys of states are (type, ID, generation), so a state only replaces
+              a state of the same entity received after its last create, delete or disconnect
+        generations: Number of creates, deletes and disconnects received for every (type, ID)
+    """
+    def __init__(self):
+        self.rows = {}
+        self.generations = {}
+
+    def merge(self, information_arr):
+        """
+        Merges a batch of information into the snapshot. Newer states replace older states of the same tank or
+        projectile, other rows are appended
+        :param np.ndarray information_arr: Information received from the server (dtype payload_information_dtype)
+        :return: None
+        """
+        information_arr = information_arr.copy()  # the rows are kept, they must not share the receive buffer
+        actions = information_arr["action"]
+        types_of = information_arr["type_of"]
+        is_update = actions == constants.information_update.encode('utf-8')
+        is_create = actions == constants.information_create.encode('utf-8')
+        is_tank = types_of == constants.information_tank.encode('utf-8')
+        is_projectile = types_of == constants.information_projectile.encode('utf-8')
+        is_tank_state = (is_update | is_create) & is_tank
+        is_tank_event = (actions == constants.information_disconnect.encode('utf-8')) & is_tank
+        is_deleted = information_arr["hp"] == constants.projectile_not_exists
+        is_projectile_state = is_update & is_projectile & ~is_deleted
+        is_projectile_event = (is_create | (is_update & is_deleted)) & is_projectile
+
+        player_ids = information_arr["player_id"].tolist()
+        projectile_ids = information_arr["turret_angle"].astype(np.int32).tolist()
+        for i, row in enumerate(information_arr):
+            if is_tank_state[i] or is_tank_event[i]:
+                entity = (constants.information_tank, player_ids[i])
+            elif is_projectile_state[i] or is_projectile_event[i]:
+                entity = (constants.information_projectile, projectile_ids[i])
+            else:  # deaths and unknown commands
+                self.rows[len(self.rows), None] = row
+                continue
+            generation = self.generations.get(entity, 0)
+            if is_tank_state[i] or is_projectile_state[i]:
+                self.rows[entity + (generation,)] = row
+            else:
+                self.rows[len(self.rows), entity] = row
+                self.generations[entity] = generation + 1
+
+    def to_array(self):
+        """
+        Returns the whole snapshot as one array of information and empties the snapshot
+        :return: Array of the information (dtype payload_information_dtype)
+        :rtype: np.ndarray
+        """
+        information_arr = np.array(list(self.rows.values()), dtype=payload_information_dtype)
+        self.rows.clear()
+        self.generations.clear()
+        return information_arr
+
+
+class ThreadedConnection(Connection):
+    """
+    Connection whose socket is owned by a dedicated I/O thread. The thread receives and decodes the information and
+    merges it into a back snapshot, while the game swaps in the newest snapshot once per frame. Network work overlaps
+    with drawing instead of adding to the frame time. The information is recorded by the I/O thread, as received -
+    before it is merged
+    Attributes:
+        _io_thread: Thread doing all the socket I/O after the configuration has been received
+        _running: Whether the I/O thread should keep running
+        _front_snapshot: Snapshot read by the game
+        _back_snapshot: Snapshot written by the I/O thread
+        _snapshot_lock: Guards the back snapshot, the swap and the recorder
+        _outbound_queue: Blocks of information waiting to be sent by the I/O thread
+        _wakeup_receiver: Socket the I/O thread waits on together with the server socket
+        _wakeup_sender: Socket used to wake the I/O thread up when there is something to send
+        _connection_lost: Set by the I/O thread when the server closes or resets the connection
+    """
+    def __init__(self, game, address=constants.default_game_server_ip, port=constants.game_port):
+        super().__init__(game, address, port)
+        self._io_thread = None
+        self._running = False
+        self._front_snapshot = WorldSnapshot()
+        self._back_snapshot = WorldSnapshot()
+        self._snapshot_lock = threading.Lock()
+        self._outbound_queue = queue.Queue()
+        self._wakeup_receiver = None
+        self._wakeup_sender = None
+        self._connection_lost = False
+
+    def receive_configuration(self):
+        """
+        Receives the configuration of the game from the server, starts the recording (if there is one) and the I/O
+        thread, so everything the thread receives is recorded
+        :return: Width, Height, Scale of the background board, Number of players, This player's ID, X coordinate this player's tank should spawn on, Y coordinate this player's tank should spawn on, number of the map used in this game
+        :rtype: (int, int, int, int, int, int, int, int)
+        """
+        configuration = super().receive_configuration()
+        if configuration[3] != constants.configuration_receive_error:
+            self.start_recording(configuration[4], configuration[7])
+            self.start_io_thread()
+        return configuration
+
+    def start_io_thread(self):
+        """
+        Starts the thread that owns the socket from now on
+        :return: None
+        """
+        self._wakeup_receiver, self._wakeup_sender = socket.socketpair()
+        self._connection_lost = False
+        self._running = True
+        self._io_thread = threading.Thread(target=self.run_io_loop, daemon=True)
+        self._io_thread.start()
+
+    def stop_io_thread(self):
+        """
+        Stops the I/O thread and waits for it to finish. Information queued before is still sent
+        :return: None
+        """
+        if self._io_thread is None:
+            return
+        self._running = False
+        self._wakeup_sender.send(b"\0")
+        self._io_thread.join()
+        self._io_thread = None
+        self._wakeup_receiver.close()
+        self._wakeup_sender.close()
+
+    def close_connection(self):
+        """
+        Sends the disconnect information (unless the connection has been lost), stops the I/O thread and closes the
+        connection with the server
+        :return: None
+        """
+        if not self._connection_lost:
+            self.send_disconnect_information()
+            self.flush_information()
+        self.stop_io_thread()
+        self._socket.close()
+        self.stop_recording()
+
+    def stop_recording(self):
+        """
+        Closes the recording, if there is one. The I/O thread may still be running
+        :return: None
+        """
+        with self._snapshot_lock:
+            super().stop_recording()
+
+    def run_io_loop(self):
+        """
+        Body of the I/O thread. Waits for the server or the game, sends the queued information and merges everything
+        received into the back snapshot
+        :return: None
+        """
+        while self._running and not self._connection_lost:
+            readable, _, _ = select.select([self._socket, self._wakeup_receiver], [], [])
+            if self._wakeup_receiver in readable:
+                self._wakeup_receiver.recv(4096)
+            self.send_queued_information()
+            if self._socket in readable:
+                for frames in super().receive_frames():
+                    information_arr = np.frombuffer(frames, dtype=payload_information_dtype).copy()
+                    with self._snapshot_lock:
+                        if self._recorder is not None:
+                            self._recorder.record(information_arr)
+                        self._back_snapshot.merge(information_arr)
+        self.send_queued_information()
+
+    def send_queued_information(self):
+        """
+        Sends all the blocks of information the game has queued. Runs on the I/O thread
+        :return: None
+        """
+        while True:
+            try:
+                data = self._outbound_queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                self._socket.sendall(data)
+            except (ConnectionResetError, BrokenPipeError) as e:
+                self.handle_connection_lost()
+                return
+
+    def handle_connection_lost(self):
+        """
+        Marks the connection as lost. The game is told by connection_lost, on its own thread
+        :return: None
+        """
+        self._connection_lost = True
+
+    def queue_for_sending(self, data):
+        """
+        Hands data over to the I/O thread. Never blocks
+        :param data: Bytes to be sent
+        :return: None
+        """
+        self._outbound_queue.put(bytes(data))
+        self._wakeup_sender.send(b"\0")
+
+    def flush_information(self):
+        """
+        Hands all the queued information to the I/O thread with a single call. Sends it directly if the I/O thread
+        has not been started yet
+        :return: If handing the information over succeeded, False if the connection has been lost
+        :rtype: bool
+        """
+        if self._io_thread is None:
+            return super().flush_information()
+        if self._connection_lost:
+            return False
+        self._outbound_batch.flush(self.queue_for_sending)
+        return True
+
+    def swap_snapshots(self):
+        """
+        Swaps the front and back snapshots and returns the content of the newest one
+        :return: Array of the newest information (dtype payload_information_dtype)
+        :rtype: np.ndarray
+        """
+        with self._snapshot_lock:
+            self._front_snapshot, self._back_snapshot = self._back_snapshot, self._front_snapshot
+        return self._front_snapshot.to_array()
+
+    def receive_all_information_array(self):
+        """
+        Returns the newest state received by the I/O thread since the last call as one structured array
+        :return: Array of the information received from the server (dtype payload_information_dtype)
+        :rtype: np.ndarray
+        """
+        return self.swap_snapshots()
+
+    @property
+    def connection_lost(self):
+        """
+        True if the server has closed the connection and everything received before has been swapped in
+        """
+        with self._snapshot_lock:
+            return self._connection_lost and not self._back_snapshot.rows
+
+    def receive_frames(self):
+        """
+        Yields the newest snapshot as a block of frames
+        :return: Generator of memoryviews of complete frames
+        :rtype: Iterator[memoryview]
+        """
+        information_arr = self.receive_all_information_array()
+        if len(information_arr) > 0:
+            yield memoryview(information_arr.tobytes())
@@ -0,0 +1,199 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pygame
+
+import constants
+from Boards.map_file import load_binary_map, map_file_extension, map_file_to_load
+
+
+class AssetPipeline:
+    """
+    Loads game resources (json files and their images) on a thread pool. Requesting a resource also requests all
+    resources it references (a tank's turret and shield, a turret's ammo, a projectile's explosion), so the whole
+    tree is decoded in the background. Decoded resources are finished on the main thread by poll(): their images
+    are converted to the display's pixel format, if a display is open
+    Attributes:
+        _executor: Thread pool decoding the resources, created with the first request
+        _workers: Number of threads of the pool
+        _lock: Guards _futures, which is also updated by the pool's threads
+        _futures: Resources being decoded (or decoded, but not finished yet) by file name
+        _resources: Finished resources by file name
+    """
+    def __init__(self, workers=constants.asset_pipeline_workers):
+        self._executor = None
+        self._workers = workers
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._resources = {}
+
+    def request(self, filename):
+        """
+        Starts decoding the resource and the resources it references, unless it has already been requested
+        :param str filename: Name of the resource file
+        :return: None
+        """
+        self.submit(filename, self.decode_resource)
+
+    def request_map(self, filename):
+        """
+        Starts decoding the tiles used by the map
+        :param str filename: Name of the map file (binary or JSON map)
+        :return: None
+        """
+        self.submit(filename, self.decode_map)
+
+    def submit(self, filename, decode):
+        """
+        Runs decode(filename) on the thread pool, unless the file has already been requested
+        :param str filename: Name of the file
+        :param Callable[[str], Any] decode: Function decoding the file
+        :return: None
+        """
+        with self._lock:
+            if filename in self._futures or filename in self._resources:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self._workers, thread_name_prefix="assets")
+            self._futures[filename] = self._executor.submit(decode, filename)
+
+    def request_all(self):
+        """
+        Starts decoding all resources of the game: tank versions, the tiles of all maps and the map editor's tiles
+        :return: None
+        """
+        for filename in constants.tank_versions.values():
+            self.request(filename)
+        for filename in constants.maps.values():
+            self.request_map(filename)
+        for filename in [constants.default_map_editor_tile] + constants.map_editor_tiles:
+            self.request(filename)
+
+    def decode_resource(self, filename):
+        """
+        Reads the resource and decodes its images. Runs on the thread pool
+        :param str filename: Name of the resource file
+        :return: Resource with pygame images instead of image paths
+        :rtype: dict
+        """
+        with open(filename, 'r') as file:
+            resource = json.load(file)
+        for value in resource.values():
+            if isinstance(value, str) and value.endswith(".json"):
+                self.request(value)
+
+        if resource.get("texture"):
+            resource["texture"] = pygame.image.load(resource["texture"])
+        if resource.get("animation_frames"):
+            images = {}  # animations repeat frames, every image is decoded once
+            for i, img_path in enumerate(resource["animation_frames"]):
+                if img_path not in images:
+                    images[img_path] = pygame.image.load(img_path)
+                resource["animation_frames"][i] = images[img_path]
+        resource["resource_name"] = filename
+        return resource
+
+    def decode_map(self, filename):
+        """
+        Reads the map's tile palette and requests its tiles. Runs on the thread pool
+        :param str filename: Name of the map file (binary or JSON map)
+        :return: None
+        """
+        filename = map_file_to_load(filename)
+        if filename.endswith(map_file_extension):
+            palette = load_binary_map(filename)[0]
+        else:
+            with open(filename, 'r') as file:
+                palette = json.load(file)["map_data"]["tiles"].values()
+        for tile_filename in palette:
+            self.request(tile_filename)
+
+    def poll(self):
+        """
+        Finishes all decoded resources without waiting for the others. Has to be called on the main thread
+        :return: None
+        """
+        with self._lock:
+            done = [(filename, future) for filename, future in self._futures.items()
+                    if future.done() and future.exception() is None]
+            for filename, _ in done:
+                del self._futures[filename]
+        for filename, future in done:
+            resource = future.result()
+            # maps only request their tiles, they are kept as None so they are not requested again
+            self._resources[filename] = self.convert(resource) if resource is not None else None
+
+    @staticmethod
+    def convert(resource):
+        """
+        Converts the resource's images to the display's pixel format, so blitting them does not convert every pixel.
+        Does nothing before the display is opened
+        :param dict resource: Decoded resource
+        :return: The resource
+        :rtype: dict
+        """
+        if pygame.display.get_surface() is None:
+            return resource
+        converted = {}  # by id() of the decoded image
+        if resource.get("texture"):
+            resource["texture"] = converted.setdefault(id(resource["texture"]), resource["texture"].convert_alpha())
+        if resource.get("animation_frames"):
+            for i, image in enumerate(resource["animation_frames"]):
+                if id(image) not in converted:
+                    converted[id(image)] = image.convert_alpha()
+                resource["animation_frames"][i] = converted[id(image)]
+        return resource
+
+    def get(self, filename):
+        """
+        Returns the resource. Waits for it if it is still being decoded, loads it if it has not been requested
+        :param str filename: Name of the resource file
+        :return: Loaded resource
+        :rtype: dict
+        """
+        resource = self._resources.get(filename)
+        if resource is not None:
+            return resource
+        self.request(filename)
+        with self._lock:
+            future = self._futures[filename]
+        future.result()  # raises the exception of a failed load
+        self.poll()
+        return self._resources[filename]
+
+    def wait(self):
+        """
+        Waits until all requested resources (and the ones they reference) are decoded, then finishes them
+        :return: None
+        """
+        while True:
+            with self._lock:
+                pending = [future for future in self._futures.values() if not future.done()]
+            if not pending:
+                break
+            wait(pending)
+        self.poll()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def pending(self):
+        """
+        Number of requested resources that have not been decoded yet
+        """
+        with self._lock:
+            return sum(not future.done() for future in self._futures.values())
+
+    @property
+    def ready(self):
+        """
+        True if all requested resources are decoded
+        """
+        return self.pending == 0
+
+    @property
+    def loaded(self):
+        return sum(resource is not None for resource in self._resources.values())
@@ -0,0 +1,97 @@
+import hashlib
+import os
+
+import numpy as np
+import pygame
+
+import constants
+
+
+class BackgroundCache:
+    """
+    Keeps background surfaces of loaded maps, so a map is rendered tile by tile only the first time it is loaded.
+    Surfaces are keyed by a hash of the map's tiles, the tile textures' pixels and the board's scale and size, so a
+    changed map or texture never uses a stale surface. They can be saved to a directory so later launches only load them
+    Attributes:
+        _surfaces: Background surfaces by key
+        _texture_hashes: Hashes of the tile textures by resource name
+        _cache_dir: Directory the surfaces are saved to and loaded from, None if they are only kept in memory
+    """
+    def __init__(self, cache_dir=constants.background_cache_dir):
+        self._surfaces = {}
+        self._texture_hashes = {}
+        self._cache_dir = cache_dir
+
+    def key(self, resources, tile_indices, scale, size):
+        """
+        Returns the key of the background of a map
+        :param List[dict] resources: Loaded tile resources of the map's palette
+        :param np.ndarray tile_indices: Palette indices of the tiles, indexed [x, y] with the grid position
+        :param int scale: Size of a tile (pixels)
+        :param (int, int) size: Size of the background surface
+        :return: Key of the background
+        :rtype: str
+        """
+        digest = hashlib.sha1(repr((scale, size, tile_indices.shape)).encode())
+        for resource in resources:
+            digest.update(self.texture_hash(resource).encode())
+        digest.update(np.ascontiguousarray(tile_indices, dtype=np.uint16).tobytes())
+        return digest.hexdigest()
+
+    def texture_hash(self, resource):
+        """
+        Returns a hash of the resource's texture pixels, computed once per resource
+        :param dict resource: Loaded tile resource
+        :return: Hash of the texture
+        :rtype: str
+        """
+        texture_hash = self._texture_hashes.get(resource["resource_name"])
+        if texture_hash is None:
+            texture = resource["texture"]
+            digest = hashlib.sha1(repr(texture.get_size()).encode())
+            digest.update(pygame.image.tobytes(texture, "RGBA"))
+            texture_hash = digest.hexdigest()
+            self._texture_hashes[resource["resource_name"]] = texture_hash
+        return texture_hash
+
+    def get(self, key, size):
+        """
+        Returns the background with given key, loading it from the cache directory if it is not in memory
+        :param str key: Key of the background
+        :param (int, int) size: Size of the background surface
+        :return: Background surface, shared with all other callers - must not be modified. None if not cached
+        :rtype: pygame.Surface
+        """
+        surface = self._surfaces.get(key)
+        if surface is None and self._cache_dir is not None:
+            path = self.cache_path(key)
+            if os.path.exists(path):
+                with open(path, "rb") as file:
+                    pixels = file.read()
+                if len(pixels) == size[0] * size[1] * 3:  # otherwise the file was cut off
+                    surface = pygame.image.frombytes(pixels, size, "RGB")
+                    self._surfaces[key] = surface
+        return surface
+
+    def store(self, key, surface):
+        """
+        Saves a copy of the background in memory and in the cache directory
+        :param str key: Key of the background
+        :param pygame.Surface surface: Rendered background
+        :return: None
+        """
+        self._surfaces[key] = surface.copy()
+        if self._cache_dir is not None:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            path = self.cache_path(key)
+            temporary_path = f"{path}.{os.getpid()}.tmp"  # other clients may be loading the same map
+            with open(temporary_path, "wb") as file:
+                file.write(pygame.image.tobytes(surface, "RGB"))
+            os.replace(temporary_path, path)
+
+    def cache_path(self, key):
+        return os.path.join(self._cache_dir, key + ".rgb")
+
+    def clear(self):
+        self._surfaces.clear()
+        self._texture_hashes.clear()
@@ -0,0 +1,488 @@
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import sys
+import threading
+import time
+from ctypes import sizeof
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+import constants
+from Boards.background_board import BackgroundBoard
+from Boards.map_file import load_binary_map
+from game import Game
+from Networking.connection import Connection
+from Networking.outbound_batch import OutboundBatch
+from Networking.payload_information import PayloadInformation, payload_information_dtype
+from projectile import Projectile
+from recolor_cache import RecolorCache
+from renderer import TANKS_LAYER, PROJECTILES_LAYER
+
+default_baseline_file = "benchmark_baseline.json"
+
+# name -> (optimized benchmark, benchmark of the path it replaced, reference operations per optimized operation).
+# Both are measured in the same run, so their ratio does not depend on the machine the way absolute times do
+relative_checks = {
+    "payload_encode_batch_vs_ctypes": ("payload_encode_batch", "payload_encode_ctypes", 1),
+    "payload_decode_numpy_vs_ctypes": ("payload_decode_numpy", "payload_decode_ctypes", 1),
+    "process_received_array_vs_scalar": ("process_received_information_array", "process_received_information", 1),
+    "projectiles_1000_vs_10_times_100": ("projectiles_1000", "projectiles_100", 10),
+    "recolor_tank_warm_vs_cold": ("recolor_tank_warm", "recolor_tank_cold", 1),
+    "draw_frame_cached_vs_uncached": ("draw_frame_rotating_tanks", "draw_frame_rotating_tanks_uncached", 1),
+}
+
+# name -> function creating the benchmark. It returns a function running it once and the number of operations it does
+benchmarks = {}
+
+
+def benchmark(name):
+    def register(create):
+        benchmarks[name] = create
+        return create
+    return register
+
+
+class DiscardServer:
+    """
+    Accepts connections on a free local port and throws away everything sent to it, so benchmarked code can send
+    through a real socket
+    Attributes:
+        _socket: Listening socket
+        port: Port the server listens on
+    """
+    def __init__(self):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.bind(("127.0.0.1", 0))
+        self._socket.listen()
+        self.port = self._socket.getsockname()[1]
+        threading.Thread(target=self.accept_clients, daemon=True).start()
+
+    def accept_clients(self):
+        while True:
+            client, _ = self._socket.accept()
+            threading.Thread(target=self.drain, args=(client,), daemon=True).start()
+
+    @staticmethod
+    def drain(client):
+        while client.recv(64 * 1024):
+            pass
+
+
+class PressedKeys:
+    """
+    Stands in for pygame.key.get_pressed() with a fixed set of pressed keys
+    """
+    def __init__(self, *pressed):
+        self._pressed = set(pressed)
+
+    def __getitem__(self, key):
+        return key in self._pressed
+
+
+discard_server = None
+
+
+def create_game(map_no=0):
+    """
+    Creates a headless game with this client's tank on the map, connected to a DiscardServer
+    :param int map_no: Number of the map (key of constants.maps)
+    :return: Game ready to be simulated and drawn
+    :rtype: Game
+    """
+    global discard_server
+    if discard_server is None:
+        discard_server = DiscardServer()
+    game = Game(headless=True)
+    game.init_display()
+    game.my_player_id = 0
+    game.set_tank_version(0)
+    connection = Connection(game, "127.0.0.1", discard_server.port)
+    connection.establish_connection()
+    connection.player_id = 0
+    game.connection = connection
+    game.create_world(map_no)
+    return game
+
+
+def free_positions(game, count):
+    """
+    Returns random screen positions on tiles that do not block movement
+    :param Game game: Game with a loaded map
+    :param int count: Number of positions
+    :return: X and Y coordinates of the positions
+    :rtype: (np.ndarray, np.ndarray)
+    """
+    rng = np.random.default_rng(0)
+    xs, ys = np.empty(0), np.empty(0)
+    while len(xs) < count:
+        candidate_xs = rng.uniform(0, constants.window_width - 1, count)
+        candidate_ys = rng.uniform(0, constants.window_height - 1, count)
+        free = ~game.tiles_block_movement(candidate_xs, candidate_ys)
+        xs, ys = np.concatenate([xs, candidate_xs[free]]), np.concatenate([ys, candidate_ys[free]])
+    return xs[:count], ys[:count]
+
+
+def information_batch(players, projectiles_per_player, action):
+    """
+    Creates a batch of information like the server sends it: all tanks, then all projectiles of the other players
+    :param int players: Number of players (player 0 is this client)
+    :param int projectiles_per_player: Projectiles of every other player
+    :param str action: Action of the projectile rows (constants.information_create or constants.information_update)
+    :return: Batch of information
+    :rtype: np.ndarray
+    """
+    rows = np.zeros(players + (players - 1) * projectiles_per_player, dtype=payload_information_dtype)
+    rng = np.random.default_rng(1)
+    rows["x_location"] = rng.uniform(100, 700, len(rows))
+    rows["y_location"] = rng.uniform(100, 500, len(rows))
+    rows["tank_angle"] = rng.uniform(0, 360, len(rows))
+    rows["action"] = constants.information_update.encode()
+    rows["type_of"] = constants.information_tank.encode()
+    rows["player_id"][:players] = np.arange(players)
+    rows["hp"][:players] = 10
+    projectiles = rows[players:]
+    projectiles["action"] = action.encode()
+    projectiles["type_of"] = constants.information_projectile.encode()
+    projectiles["player_id"] = np.repeat(np.arange(1, players), projectiles_per_player)
+    projectiles["turret_angle"] = projectiles["player_id"] * constants.max_projectile_count + \
+        np.tile(np.arange(projectiles_per_player), players - 1)
+    projectiles["hp"] = constants.projectile_exists
+    return rows
+
+
+@benchmark("payload_encode_batch")
+def create_payload_encode_batch():
+    batch = OutboundBatch(constants.outbound_batch_capacity)
+
+    def run():
+        for i in range(constants.outbound_batch_capacity):
+            batch.add(b"u", b"t", 1, 100.0 + i, 200.0, 90.0, 10.0, 0.0, 0, False)
+        batch.flush(lambda data: None)
+    return run, constants.outbound_batch_capacity
+
+
+@benchmark("payload_encode_ctypes")
+def create_payload_encode_ctypes():
+    def run():
+        for i in range(constants.outbound_batch_capacity):
+            bytes(PayloadInformation(b"u", b"t", 1, 100.0 + i, 200.0, 90.0, 10.0, 0.0, 0, False))
+    return run, constants.outbound_batch_capacity
+
+
+@benchmark("payload_decode_ctypes")
+def create_payload_decode_ctypes():
+    frames = information_batch(8, 31, constants.information_update).tobytes()
+    frame_size = sizeof(PayloadInformation)
+
+    def run():
+        for offset in range(0, len(frames), frame_size):
+            PayloadInformation.from_buffer_copy(frames, offset)
+    return run, len(frames) // frame_size
+
+
+@benchmark("payload_decode_numpy")
+def create_payload_decode_numpy():
+    frames = information_batch(8, 31, constants.information_update).tobytes()
+
+    def run():
+        np.frombuffer(frames, dtype=payload_information_dtype).copy()
+    return run, len(frames) // sizeof(PayloadInformation)
+
+
+def create_process_received(array_version):
+    game = create_game()
+    game.connection.process_received_information_array(information_batch(8, 10, constants.information_create))
+    batch = information_batch(8, 10, constants.information_update)
+    batch["player_id"][0] = 1  # this client's tank is reconciled separately
+    if array_version:
+        return lambda: game.connection.process_received_information_array(batch), len(batch)
+    information = [PayloadInformation.from_buffer_copy(row.tobytes()) for row in batch]
+    return lambda: game.connection.process_received_information(information), len(batch)
+
+
+@benchmark("process_received_information")
+def create_process_received_information():
+    return create_process_received(False)
+
+
+@benchmark("process_received_information_array")
+def create_process_received_information_array():
+    return create_process_received(True)
+
+
+@benchmark("tank_update")
+def create_tank_update():
+    game = create_game()
+    game.my_tank.keyboard_input(PressedKeys(pygame.K_UP, pygame.K_LEFT))
+
+    def run():
+        game.my_tank.update(1 / constants.simulation_tick_rate)
+        game.connection.flush_information()
+    return run, 1
+
+
+def create_projectiles(count):
+    game = create_game()
+    tank = game.my_tank
+    turret_attributes = game.load_resource(tank.turret.resource_name)
+    attributes = dict(game.load_resource(turret_attributes["ammo"]), speed=0, lifetime=1e9)  # they stay where they are
+    for projectile_id, (x, y) in enumerate(zip(*[values.tolist() for values in free_positions(game, count)])):
+        projectile = Projectile(projectile_id, tank, x, y, random.uniform(0, 360), tank.turret, attributes)
+        projectile.attach(game.projectile_engine)
+        game.add_projectile(projectile)
+        game.entities.add_projectile(projectile)
+
+    def run():
+        game.projectile_engine.step(1 / constants.simulation_tick_rate)
+        for sprite in game.renderer.sprites_in(PROJECTILES_LAYER):
+            sprite.update(1 / constants.simulation_tick_rate)
+        game.projectile_engine.interpolate_steps(0.5)
+        game.connection.flush_information()
+    return run, 1
+
+
+for projectile_count in (10, 100, 1000):
+    benchmark(f"projectiles_{projectile_count}")(lambda count=projectile_count: create_projectiles(count))
+
+
+def create_map_benchmark(map_file, deserialize):
+    game = create_game()
+    with open(os.path.splitext(map_file)[0] + ".json", "r") as file:  # the JSON map the binary map was converted from
+        board_data = json.load(file)["map_data"]
+
+    def run_deserialize():
+        board = BackgroundBoard(game, constants.window_width, constants.window_height, constants.background_scale)
+        board.deserialize(board_data)
+
+    board = BackgroundBoard(game, constants.window_width, constants.window_height, constants.background_scale)
+    board.deserialize(board_data)
+    return (run_deserialize if deserialize else board.serialize), 1
+
+
+def create_binary_map_benchmark(map_file):
+    game = create_game()
+
+    def run_load():
+        board = BackgroundBoard(game, constants.window_width, constants.window_height, constants.background_scale)
+        palette, tile_indices, _ = load_binary_map(map_file)
+        board.load_tiles(palette, tile_indices)
+    return run_load, 1
+
+
+for map_file in constants.maps.values():
+    map_name = os.path.splitext(os.path.basename(map_file))[0]
+    benchmark(f"map_deserialize_{map_name}")(lambda map_file=map_file: create_map_benchmark(map_file, True))
+    benchmark(f"map_serialize_{map_name}")(lambda map_file=map_file: create_map_benchmark(map_file, False))
+    benchmark(f"map_load_binary_{map_name}")(lambda map_file=map_file: create_binary_map_benchmark(map_file))
+
+
+@benchmark("swap_channels")
+def create_swap_channels():
+    game = create_game()
+    texture = game.my_tank.original_image
+    return lambda: game.swap_channels(texture, constants.swap_colors[0]), 1
+
+
+@benchmark("recolor_tank_cold")
+def create_recolor_tank_cold():
+    game = create_game()
+    tank = game.my_tank
+
+    def run():
+        cache = RecolorCache(None)
+        cache.recolor(tank.resource_name, tank.original_image, constants.swap_colors[0])
+        cache.recolor(tank.turret.resource_name, tank.turret.original_image, constants.swap_colors[0])
+    return run, 1
+
+
+@benchmark("recolor_tank_warm")
+def create_recolor_tank_warm():
+    game = create_game()
+    return lambda: game.recolor_tank(game.my_tank), 1
+
+
+def create_rotating_tanks_frame(cached):
+    game = create_game()
+    for player_id, (x, y) in enumerate(zip(*[values.tolist() for values in free_positions(game, 15)]), start=1):
+        game.add_new_tank(player_id, x, y, 0, player_id % len(constants.tank_versions))
+    tanks = [sprite for sprite in game.renderer.sprites_in(TANKS_LAYER) if hasattr(sprite, "turret")]
+
+    def run():
+        for tank in tanks:
+            if cached:
+                tank.rotate(7.3)
+            else:
+                tank.image = pygame.transform.rotozoom(tank.original_image, random.uniform(0, 360), 1)
+                tank.rect = tank.image.get_rect(center=tank.rect.center)
+        game.renderer.clear()
+        game.renderer.draw()
+    return run, 1
+
+
+@benchmark("draw_frame_rotating_tanks")
+def create_draw_frame_rotating_tanks():
+    return create_rotating_tanks_frame(True)
+
+
+@benchmark("draw_frame_rotating_tanks_uncached")
+def create_draw_frame_rotating_tanks_uncached():
+    return create_rotating_tanks_frame(False)
+
+
+def measure(run, operations, repeats, min_time):
+    """
+    Measures the best time of one operation
+    :param run: Function running the benchmark once
+    :param int operations: Number of operations one run does
+    :param int repeats: Number of measurements, the best one is kept
+    :param float min_time: Shortest time (in seconds) of one measurement
+    :return: Seconds per operation
+    :rtype: float
+    """
+    run()  # warm-up
+    runs = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(runs):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        runs = max(runs * 2, int(runs * min_time / max(elapsed, 1e-9)))
+    best = elapsed
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(runs):
+            run()
+        best = min(best, time.perf_counter() - start)
+    return best / (runs * operations)
+
+
+def environment():
+    """
+    Describes what the results depend on besides the code. Results are only compared with a baseline recorded in the
+    same environment
+    :return: Python, pygame and NumPy versions, architecture, processor and host name
+    :rtype: dict
+    """
+    processor = platform.processor()
+    if os.path.exists("/proc/cpuinfo"):
+        with open("/proc/cpuinfo", "r") as file:
+            processor = next((line.split(":", 1)[1].strip() for line in file if line.startswith("model name")),
+                             processor)
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": processor,
+        "node": platform.node(),
+    }
+
+
+def check_relative(results):
+    """
+    Checks that the optimized paths are still faster than the paths they replaced, measured in the same run
+    :param dict results: Seconds per operation by benchmark name
+    :return: Check by name: ratio of the optimized time to the reference time and status (slower, faster)
+    :rtype: dict
+    """
+    checks = {}
+    for name, (optimized, reference, scale) in relative_checks.items():
+        if optimized not in results or reference not in results:
+            continue
+        ratio = results[optimized] / (results[reference] * scale)
+        checks[name] = {"ratio": ratio, "status": "slower" if ratio >= 1 else "faster"}
+    return checks
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares the results with the baseline
+    :param dict results: Seconds per operation by benchmark name
+    :param dict baseline: Seconds per operation by benchmark name
+    :param float tolerance: Relative difference still considered the same
+    :return: Comparison by benchmark name: baseline seconds per operation, ratio and status (slower, faster, same)
+    :rtype: dict
+    """
+    comparison = {}
+    for name, seconds in results.items():
+        if name not in baseline:
+            continue
+        ratio = seconds / baseline[name]
+        status = "slower" if ratio > 1 + tolerance else "faster" if ratio < 1 - tolerance else "same"
+        comparison[name] = {"baseline_seconds_per_op": baseline[name], "ratio": ratio, "status": status}
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the client's hot paths without a display "
+                                                 "(run from the client directory)")
+    parser.add_argument("--filter", default="", help="only run benchmarks containing this text")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds per measurement at least")
+    parser.add_argument("--baseline", default=default_baseline_file, help="results to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="relative difference still considered the same")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="exit with 1 if an optimized path is not faster than the one it replaced, or if anything "
+                             "got slower than a baseline recorded in the same environment")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for name, create in benchmarks.items():
+        if args.filter in name:
+            run, operations = create()
+            results[name] = measure(run, operations, args.repeats, args.min_time)
+
+    current_environment = environment()
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r") as file:
+            baseline_report = json.load(file)
+        differences = [f"{key} {baseline_report.get(key)} != {value}" for key, value in current_environment.items()
+                       if baseline_report.get(key) != value]
+        if differences:
+            print(f"Not comparing with {args.baseline}, it was recorded in another environment: "
+                  f"{', '.join(differences)}")
+        else:
+            baseline = baseline_report["results"]
+    comparison = compare(results, baseline, args.tolerance)
+    relative = check_relative(results)
+
+    print(f"{'benchmark':<48} {'us/op':>12} {'baseline':>12} {'ratio':>7}")
+    for name, seconds in results.items():
+        if name in comparison:
+            compared = comparison[name]
+            print(f"{name:<48} {seconds * 1e6:>12.3f} {compared['baseline_seconds_per_op'] * 1e6:>12.3f} "
+                  f"{compared['ratio']:>7.2f} {compared['status']}")
+        else:
+            print(f"{name:<48} {seconds * 1e6:>12.3f}")
+    if relative:
+        print(f"\n{'relative check':<48} {'ratio':>12}")
+        for name, check in relative.items():
+            print(f"{name:<48} {check['ratio']:>12.2f} {check['status']}")
+
+    report = dict(current_environment, results=results, comparison=comparison, relative=relative)
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(dict(current_environment, results=results), file, indent=2)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.fail_on_regression and any(compared["status"] == "slower"
+                                       for compared in list(comparison.values()) + list(relative.values())):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
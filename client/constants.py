@@ -4,6 +4,10 @@ window_height = 600
 window_width = 800
 background_scale = 50
 target_fps = 60
+simulation_tick_rate = 60  # physics steps per second, independent of the frame rate and of the network
+simulation_max_steps_per_frame = 5  # physics steps run in one frame at most - the game slows down instead of freezing
+dirty_rect_full_update_threshold = 0.5  # fraction of the screen - larger changed areas update the whole display at once
+asset_pipeline_workers = 4  # threads decoding resources and their images in the background
 # Menu
 tank_selections = [("Classic", 0), ("Archer", 1), ("Laser", 2)]
 tank_versions = {
@@ -25,6 +29,20 @@ shield_bar_filled_color = "#0077ff"
 shield_bar_empty_color = "#cccccc"
 # tank colors (swapping rgb channels)
 swap_colors = [[1, 2, 0], [1, 0, 2], [0, 2, 1], [2, 1, 0], [2, 0, 1]]
+recolor_cache_dir = None  # e.g. "./cache/recolor" - recolored tank textures are saved there and reused by later launches
+background_cache_dir = "./cache/background"  # rendered map backgrounds are saved there, None - kept only in memory
+
+# rotated images cache
+rotation_cache_resolution = 1.0  # degrees - images are rotated by angles rounded to a multiple of this
+rotation_cache_max_bytes = 64 * 1024 * 1024  # least recently used images are dropped above this size
+rotation_cache_prewarm = False  # rotate the loaded tank versions' images by all angles when the game starts
+
+# frame profiler
+frame_profiler_window = 3600  # last frames kept for the histograms
+frame_profiler_histogram_edges_ms = [0.25, 0.5, 1, 2, 4, 8, 16, 33, 66, 100]  # upper edges of the histogram buckets
+frame_profiler_overlay_frames = 60  # the overlay shows averages over this many last frames
+frame_profiler_overlay_refresh_sec = 0.5
+frame_profiler_overlay_font_size = 18
 
 death_screen_display_time_sec = 3
 server_full_or_busy_screen_display_time_sec = 2
@@ -34,6 +52,11 @@ object_collision_damage = 0.5
 object_collision_cooldown = 0.5
 object_collision_speed_multiplier = 0.5
 
+"""Interpolation of remote tanks and projectiles"""
+interpolation_delay_sec = 0.1  # remote entities are rendered this far in the past, between two received states
+interpolation_max_extrapolation_sec = 0.25  # longest time a remote entity keeps moving without new states
+interpolation_buffer_size = 32
+
 """Projectiles constants"""
 max_projectile_count = 20
 projectile_exists = 1
@@ -45,7 +68,14 @@ default_game_server_ip = "192.168.135.125"
 configuration_receive_timeout = 1
 configuration_receive_error = -1
 socket_timeout = 100.00
+connection_mode = "blocking"  # "blocking", "async" (asyncio event loop thread) or "threaded" (I/O thread + snapshots)
 full_server = -99
+outbound_batch_capacity = 64  # messages sent to the server with one call at most
+tank_send_position_quantum = 0.5  # pixels - smaller moves of this client's tank are not sent
+tank_send_angle_quantum = 0.5  # degrees - smaller rotations of the tank or turret are not sent
+tank_send_hp_quantum = 0.0  # every HP change is sent
+tank_send_heartbeat_sec = 0.1  # unchanged tank state is still sent this often
+receive_buffer_size = 64 * 1024  # bytes drained from the socket per receive_all_information call at most
 default_cache_save_file = "game_cookies.txt"
 
 """For information.action"""
@@ -62,10 +92,10 @@ information_projectile = 'p'
 default_map_editor_tile = "./resources/grass.json"
 map_editor_tiles = ["./resources/grass.json", "./resources/asphalt.json", "./resources/house.json"]
 spawn_point_rotation_angle = 22.5
-maps = {
-    0: "./maps/tank_prix.json",
-    1: "./maps/city.json",
-    2: "./maps/all_your_base_are_belong_to_us.json",
-    3: "./maps/flower.json",
-    2137: "./maps/2137.json"
+maps = {  # binary maps, converted from the JSON maps of the editor with "python -m Boards.map_file maps/*.json"
+    0: "./maps/tank_prix.tmap",
+    1: "./maps/city.tmap",
+    2: "./maps/all_your_base_are_belong_to_us.tmap",
+    3: "./maps/flower.tmap",
+    2137: "./maps/2137.tmap"
 }
@@ -0,0 +1,123 @@
+class EntityRegistry:
+    """
+    Indexes all tanks and projectiles in the game, so every lookup, insert and removal takes constant time
+    Attributes:
+        _tanks: Tanks by ID of the player they belong to
+        _projectiles: Projectiles by their (global) ID
+        _projectiles_by_owner: Projectiles by ID of the player that owns them, then by projectile ID
+    """
+    def __init__(self):
+        self._tanks = {}
+        self._projectiles = {}
+        self._projectiles_by_owner = {}
+
+    def add_tank(self, tank):
+        """
+        Adds the tank, replacing the previous tank of the same player
+        :param Tank tank: Tank to be added
+        :return: None
+        """
+        self._tanks[tank.player_no] = tank
+
+    def get_tank(self, player_id):
+        """
+        Returns tank with given player ID
+        :param int player_id: ID of the player the tank belongs to
+        :return: Tank with given player ID or None if not found
+        :rtype: Tank
+        """
+        return self._tanks.get(player_id)
+
+    def get_tanks(self, player_ids):
+        """
+        Returns tanks with given player IDs
+        :param List[int] player_ids: IDs of the players the tanks belong to
+        :return: Tank of every player, None for players without a tank
+        :rtype: List[Tank]
+        """
+        return list(map(self._tanks.get, player_ids))
+
+    def remove_tank(self, player_id):
+        """
+        Removes the tank of the given player. The tank's projectiles are not removed
+        :param int player_id: ID of the player the tank belongs to
+        :return: Removed tank or None if not found
+        :rtype: Tank
+        """
+        return self._tanks.pop(player_id, None)
+
+    def tanks(self):
+        """
+        Returns all the tanks
+        :return: View of the tanks
+        :rtype: Iterable[Tank]
+        """
+        return self._tanks.values()
+
+    def add_projectile(self, projectile):
+        """
+        Adds the projectile. A previous projectile with the same ID is killed, so it is neither drawn nor simulated
+        anymore
+        :param Projectile projectile: Projectile to be added
+        :return: None
+        """
+        replaced = self.remove_projectile(projectile.id)
+        if replaced is not None and replaced is not projectile:
+            replaced.kill()
+        self._projectiles[projectile.id] = projectile
+        self._projectiles_by_owner.setdefault(projectile.owner.player_no, {})[projectile.id] = projectile
+
+    def get_projectile(self, projectile_id):
+        """
+        Returns projectile with given ID
+        :param int projectile_id: ID of the projectile
+        :return: Projectile with given ID or None if not found
+        :rtype: Projectile
+        """
+        return self._projectiles.get(projectile_id)
+
+    def get_projectiles(self, projectile_ids):
+        """
+        Returns projectiles with given IDs
+        :param List[int] projectile_ids: IDs of the projectiles
+        :return: Projectile with every ID, None for IDs not found
+        :rtype: List[Projectile]
+        """
+        return list(map(self._projectiles.get, projectile_ids))
+
+    def remove_projectile(self, projectile_id):
+        """
+        Removes projectile with given ID
+        :param int projectile_id: ID of the projectile
+        :return: Removed projectile or None if not found
+        :rtype: Projectile
+        """
+        projectile = self._projectiles.pop(projectile_id, None)
+        if projectile is not None:
+            del self._projectiles_by_owner[projectile.owner.player_no][projectile_id]
+        return projectile
+
+    def remove_projectiles_of(self, player_id):
+        """
+        Removes all projectiles owned by the given player
+        :param int player_id: ID of the player that owns the projectiles
+        :return: Removed projectiles
+        :rtype: List[Projectile]
+        """
+        owned = self._projectiles_by_owner.pop(player_id, {})
+        for projectile_id in owned:
+            del self._projectiles[projectile_id]
+        return list(owned.values())
+
+    def projectiles(self):
+        """
+        Returns all the projectiles
+        :return: View of the projectiles
+        :rtype: Iterable[Projectile]
+        """
+        return self._projectiles.values()
+
+    def clear(self):
+        self._tanks.clear()
+        self._projectiles.clear()
+        self._projectiles_by_owner.clear()
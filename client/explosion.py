@@ -2,6 +2,7 @@ import pygame
 from math import sin, cos, pi
 
 import constants
+from rotation_cache import rotation_cache
 
 
 class Explosion(pygame.sprite.Sprite):
@@ -20,7 +21,7 @@ class Explosion(pygame.sprite.Sprite):
 
         if attributes["inherit_angle"]:
             for i, image in enumerate(self._animation_frames):
-                self._animation_frames[i] = pygame.transform.rotozoom(image, angle, 1)
+                self._animation_frames[i] = rotation_cache.rotate(image, angle)
 
         self.image = self._animation_frames[0]
 
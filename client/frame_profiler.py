@@ -0,0 +1,181 @@
+import csv
+import json
+import time
+
+import numpy as np
+import pygame
+
+import constants
+
+# Phases of a frame, in the order they run in Game.play
+PHASES = ("tick", "events", "receive", "process", "update", "clear", "draw", "flush", "flip")
+# Numbers counted every frame
+COUNTERS = ("received_messages", "sent_messages", "simulation_steps", "tanks", "projectiles")
+
+
+class FrameProfiler:
+    """
+    Measures how long each phase of every frame takes and counts messages and entities per frame. The last frames are
+    kept in a rolling window, summarized as histograms and exported to CSV or JSON
+    Attributes:
+        _columns: Indexes of the phases and counters in a frame record
+        _records: Records of the last frames (phase times in milliseconds, then counters), used as a ring buffer
+        _frames: Number of finished frames
+        _current: Record of the current frame
+        _last_mark: time.perf_counter() of the end of the last measured phase
+    """
+    def __init__(self, window=constants.frame_profiler_window):
+        self._columns = {name: index for index, name in enumerate(PHASES + COUNTERS)}
+        self._records = np.zeros((window, len(self._columns)))
+        self._frames = 0
+        self._current = np.zeros(len(self._columns))
+        self._last_mark = time.perf_counter()
+
+    def start_frame(self):
+        """
+        Starts measuring a new frame
+        :return: None
+        """
+        self._current[:] = 0
+        self._last_mark = time.perf_counter()
+
+    def mark(self, phase):
+        """
+        Ends the phase - the time since the previous phase ended is added to it
+        :param str phase: Name of the phase, one of PHASES
+        :return: None
+        """
+        now = time.perf_counter()
+        self._current[self._columns[phase]] += (now - self._last_mark) * 1000
+        self._last_mark = now
+
+    def count(self, counter, value):
+        """
+        Adds the value to the counter of the current frame
+        :param str counter: Name of the counter, one of COUNTERS
+        :param int value: Value to be added
+        :return: None
+        """
+        self._current[self._columns[counter]] += value
+
+    def end_frame(self):
+        """
+        Stores the record of the current frame in the rolling window
+        :return: None
+        """
+        self._records[self._frames % len(self._records)] = self._current
+        self._frames += 1
+
+    def last_records(self, frames=None):
+        """
+        Returns the records of the last frames, from the oldest
+        :param int frames: Number of frames, None - all frames in the window
+        :return: Array with one row per frame and one column per phase and counter
+        :rtype: np.ndarray
+        """
+        stored = min(self._frames, len(self._records))
+        if frames is None or frames > stored:
+            frames = stored
+        end = self._frames % len(self._records)
+        indexes = (np.arange(end - frames, end)) % len(self._records)
+        return self._records[indexes]
+
+    def averages(self, frames):
+        """
+        Returns average phase times and counters over the last frames
+        :param int frames: Number of frames
+        :return: Averages by phase and counter name
+        :rtype: dict
+        """
+        records = self.last_records(frames)
+        if len(records) == 0:
+            return {name: 0.0 for name in self._columns}
+        means = records.mean(axis=0)
+        return {name: float(means[index]) for name, index in self._columns.items()}
+
+    def summary(self):
+        """
+        Summarizes the frames in the window: percentiles and histograms of the phase times, averages and maxima of
+        the counters
+        :return: Summary that can be saved as JSON
+        :rtype: dict
+        """
+        records = self.last_records()
+        edges = constants.frame_profiler_histogram_edges_ms
+        summary = {"frames": len(records), "phases": {}, "counters": {}}
+        if len(records) == 0:
+            return summary
+        totals = records[:, [self._columns[phase] for phase in PHASES]].sum(axis=1)
+        for name, column in [(phase, records[:, self._columns[phase]]) for phase in PHASES] + [("total", totals)]:
+            counts, _ = np.histogram(column, bins=[0.0] + edges + [np.inf])
+            summary["phases"][name] = {
+                "mean_ms": float(column.mean()),
+                "p50_ms": float(np.percentile(column, 50)),
+                "p90_ms": float(np.percentile(column, 90)),
+                "p99_ms": float(np.percentile(column, 99)),
+                "max_ms": float(column.max()),
+                "histogram": {"upper_edges_ms": edges + ["inf"], "counts": counts.tolist()},
+            }
+        for counter in COUNTERS:
+            column = records[:, self._columns[counter]]
+            summary["counters"][counter] = {"mean": float(column.mean()), "max": float(column.max())}
+        return summary
+
+    def dump(self, filename):
+        """
+        Saves the frames in the window to a file. CSV files get one row per frame, other files get the JSON summary
+        :param str filename: Name of the file
+        :return: None
+        """
+        if filename.endswith(".csv"):
+            with open(filename, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(["frame"] + [phase + "_ms" for phase in PHASES] + list(COUNTERS))
+                first_frame = self._frames - len(self.last_records())
+                for frame, record in enumerate(self.last_records().tolist(), start=first_frame):
+                    writer.writerow([frame] + [round(value, 4) for value in record])
+        else:
+            with open(filename, "w") as file:
+                json.dump(self.summary(), file, indent=2)
+
+
+class FrameProfilerOverlay(pygame.sprite.Sprite):
+    """
+    Shows the average phase times and counters of the last frames in the corner of the screen
+    Attributes:
+        _profiler: FrameProfiler the values come from
+        _font: Font the values are written with
+        _refresh_in: Time left until the values are written again
+    """
+    def __init__(self, profiler):
+        super().__init__()
+        self._profiler = profiler
+        self._font = pygame.font.Font(None, constants.frame_profiler_overlay_font_size)
+        self._refresh_in = 0
+        self.image = pygame.Surface((1, 1))
+        self.rect = self.image.get_rect()
+
+    def update(self, delta_time):
+        """
+        Overrides the method from pygame.sprite.Sprite
+        Writes the values again every constants.frame_profiler_overlay_refresh_sec
+        :param float delta_time: Time elapsed since last call of this function
+        :return: None
+        """
+        self._refresh_in -= delta_time
+        if self._refresh_in > 0:
+            return
+        self._refresh_in = constants.frame_profiler_overlay_refresh_sec
+
+        averages = self._profiler.averages(constants.frame_profiler_overlay_frames)
+        lines = [f"{phase:>8} {averages[phase]:6.2f} ms" for phase in PHASES]
+        lines.append(f"{'total':>8} {sum(averages[phase] for phase in PHASES):6.2f} ms")
+        lines += [f"{counter} {averages[counter]:.1f}" for counter in COUNTERS]
+        rendered = [self._font.render(line, True, "#ffffff") for line in lines]
+
+        line_height = self._font.get_linesize()
+        self.image = pygame.Surface((max(line.get_width() for line in rendered) + 8, line_height * len(lines) + 8))
+        self.image.fill("#000000")
+        for i, line in enumerate(rendered):
+            self.image.blit(line, (4, 4 + i * line_height))
+        self.rect = self.image.get_rect(topleft=(0, 0))
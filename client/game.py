@@ -1,11 +1,28 @@
+import os
 import time
 
 import pygame_menu.themes
 
 from Boards.background_board import BackgroundBoard
+from Boards.map_file import load_binary_map, map_file_extension, map_file_to_load
+from renderer import Renderer, TANKS_LAYER, TURRETS_LAYER, PROJECTILES_LAYER, EXPLOSIONS_LAYER, HP_BARS_LAYER, \
+    OVERLAY_LAYER
+from frame_profiler import FrameProfiler, FrameProfilerOverlay
 from Networking.connection import Connection
+from Networking.async_connection import AsyncConnection
+from Networking.threaded_connection import ThreadedConnection
+from Networking.tank_state_filter import TankStateFilter
+from Networking.recording import RecordingReader
+from Networking.replay_connection import ReplayConnection
 from tank import Tank
 from explosion import Explosion
+from entity_registry import EntityRegistry
+from rotation_cache import rotation_cache
+from recolor_cache import RecolorCache
+from background_cache import BackgroundCache
+from asset_pipeline import AssetPipeline
+from projectile_engine import ProjectileEngine
+from snapshot_arrays import SnapshotArrays
 import pygame
 import sys
 import constants
@@ -22,9 +39,10 @@ class Game:
         ...other
     """
 
-    def __init__(self):
+    def __init__(self, headless=False):
+        self._headless = headless  # no window, menu or drawing - server address and tank version are set beforehand
         self._screen = None
-        self._resources = {}  # loaded jsons of game resources (tiles, tanks, projectiles, etc)
+        self._assets = AssetPipeline()  # loaded jsons of game resources (tiles, tanks, projectiles, etc)
         self._width = constants.window_width
         self._height = constants.window_height
         self._player_count = None
@@ -34,17 +52,22 @@ class Game:
         # Connection related variables
         self._connection = None
         self._server_address = constants.default_game_server_ip
+        self._tank_state_filter = None  # suppresses sending the tank state when it has not changed
+        self._record_file = None  # file the received information is recorded to, None - not recorded
+        self._replay_reader = None  # recording played back instead of connecting to a server, None - no playback
+        self._replay_speed = 1.0
 
         # Tank related variables
         self._my_tank = None  # For easier access
         self._my_tank_sprite = None
-        self._tanks = None
+        self._entities = EntityRegistry()  # all tanks and projectiles, indexed by player ID and projectile ID
         self._tanks_sprites = None
-        self._tanks_sprites_group = None
-        self._turrets_sprites_group = None
-        self._projectiles_sprites_group = None
-        self._explosions_sprites_group = None
-        self._hp_bars_sprites_group = None
+        self._renderer = None  # draws tanks, turrets, projectiles, explosions and hp bars from one layered group
+        self._projectile_engine = None  # simulates this player's projectiles
+        self._remote_tank_states = None  # states of the other players' tanks received from the server
+        self._remote_projectile_states = None  # positions of the other players' projectiles received from the server
+        self._recolor_cache = RecolorCache()  # tank textures recolored for each player
+        self._background_cache = BackgroundCache()  # rendered backgrounds of the loaded maps, reused when rejoining
 
         # Background - here are objects to be displayed. Only int sizes are allowed
         self._background_board = None
@@ -53,6 +76,12 @@ class Game:
         self._spawn_points = None
 
         self._clock = None
+        self._frame_rate = constants.target_fps  # 0 - unthrottled
+        self._fixed_frame_time = None  # if set, every frame simulates this many seconds, no matter how long it took
+        self._run_until = None  # time.monotonic() the game quits at, None - never
+        self._profiler = FrameProfiler()  # times of the phases of the last frames
+        self._profiler_overlay = None  # shows the frame times on the screen, toggled with F3
+        self._profile_file = None  # file the frame times are saved to when the game quits, None - not saved
         self._menu = None
         self._in_menu = True
 
@@ -99,7 +128,7 @@ class Game:
         """
         self._in_menu = True
         self._menu.enable()
-        self._menu.mainloop(self._screen)
+        self._menu.mainloop(self._screen, bgfun=self._assets.poll)  # finishes the assets loaded meanwhile
 
     def change_server_ip(self, ip):
         """
@@ -109,21 +138,11 @@ class Game:
         """
         self._server_address = ip
 
-    def setup(self):
+    def setup_menu(self):
         """
-        Initializes all the variables
-        Initializes graphics
-        Initializes connection with the server
-        Prepares the map and tanks
-        :return: True if succeeded else False
-        :rtype: bool
+        Creates the menu with the last used server IP and shows it
+        :return: None
         """
-        pygame.init()
-        pygame.display.set_caption("Project - Distracted Programming")
-
-        self._screen = pygame.display.set_mode((self._width, self._height + constants.bar_height))
-        self._clock = pygame.time.Clock()
-
         self._server_address = self.load_default_ip()
         if self._server_address is None:
             self._server_address = constants.default_game_server_ip
@@ -148,8 +167,50 @@ class Game:
         self._menu.add.button("Quit", exit_game_button)
         self.display_menu()
 
+    def init_display(self):
+        """
+        Initializes pygame and opens the window (with the dummy video driver in headless mode)
+        :return: None
+        """
+        if self._headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
+        pygame.init()
+        pygame.display.set_caption("Project - Distracted Programming")
+
+        self._screen = pygame.display.set_mode((self._width, self._height + constants.bar_height))
+        self._clock = pygame.time.Clock()
+
+    def setup(self):
+        """
+        Initializes all the variables
+        Initializes graphics
+        Initializes connection with the server
+        Prepares the map and tanks
+        :return: True if succeeded else False
+        :rtype: bool
+        """
+        self.init_display()
+        self._assets.request_all()
+
+        if self._headless:
+            if self._tank_version is None:
+                self._tank_version = 0
+        else:
+            self.setup_menu()
+        self._assets.wait()  # so the game loop never waits for assets
+
         """initializes all variables, loads data from server"""
-        self._connection = Connection(self, self._server_address)
+        if self._replay_reader is not None:
+            self._connection = ReplayConnection(self, self._replay_reader, self._replay_speed)
+        elif constants.connection_mode == "async":
+            self._connection = AsyncConnection(self, self._server_address)
+        elif constants.connection_mode == "threaded":
+            self._connection = ThreadedConnection(self, self._server_address)
+        else:
+            self._connection = Connection(self, self._server_address)
+        if self._record_file is not None:
+            self._connection.record_to(self._record_file)
         if not self._connection.establish_connection():
             self.show_server_full_or_busy_screen()
             return False
@@ -159,10 +220,29 @@ class Game:
         if self._player_count == constants.configuration_receive_error:
             self.show_server_full_or_busy_screen()
             return False
-        self._player_count = 1  # This variable is modified within other functions that will be used to add existing players
         self._connection.player_id = self._my_player_id
+        self._connection.start_recording(self._my_player_id, map_no)
+        self.create_world(map_no)
+        self.send_tank_position(self._my_tank.x, self._my_tank.y, self._my_tank.angle,
+                                self._my_tank.hp, self._my_tank.turret.angle, self._my_tank.shield_active)
+        # sending the correct tank position (determined from spawn point) to the server
+
+        return True
+
+    def create_world(self, map_no):
+        """
+        Loads the map and creates this client's tank at its spawn point. my_player_id has to be set before
+        :param int map_no: Number of the map (key of constants.maps)
+        :return: None
+        """
+        self._player_count = 1  # This variable is modified within other functions that will be used to add existing players
+        self._tank_state_filter = TankStateFilter(constants.tank_send_position_quantum,
+                                                  constants.tank_send_angle_quantum, constants.tank_send_hp_quantum,
+                                                  constants.tank_send_heartbeat_sec)
 
         self._background_board = BackgroundBoard(self, self._width, self._height, self._background_scale)
+        if constants.rotation_cache_prewarm:
+            self.prewarm_rotation_cache()
 
         self.load_map(constants.maps[map_no])
 
@@ -173,27 +253,20 @@ class Game:
         my_spawn_point = self._spawn_points[self._my_player_id % len(self._spawn_points)]
         tank_spawn_x, tank_spawn_y, tank_spawn_angle = my_spawn_point[0], my_spawn_point[1], my_spawn_point[2]
 
-        # todo - I want to somehow merge all these different sprite groups into one big group with different layers.
-        self._tanks_sprites_group = pygame.sprite.Group()
-        self._turrets_sprites_group = pygame.sprite.Group()
-        self._projectiles_sprites_group = pygame.sprite.Group()
-        self._explosions_sprites_group = pygame.sprite.Group()
-        self._hp_bars_sprites_group = pygame.sprite.Group()
+        self._renderer = Renderer(self._screen, self._background_board.background_surface)
 
         # Adding my tank. Opponents tanks will be added later
-        self._tanks = []
+        self._entities = EntityRegistry()
+        self._projectile_engine = ProjectileEngine(self)
+        self._remote_tank_states = SnapshotArrays(4, angle_indexes=(2,))
+        self._remote_projectile_states = SnapshotArrays(2)
         self._my_tank = Tank(self._my_player_id, self, tank_spawn_x, tank_spawn_y, tank_spawn_angle,
                              self.load_resource(constants.tank_versions[self._tank_version]))
-        self.send_tank_position(self._my_tank.x, self._my_tank.y, self._my_tank.angle,
-                                self._my_tank.hp, self._my_tank.turret.angle, self._my_tank.shield_active)
-        # sending the correct tank position (determined from spawn point) to the server
 
-        self._tanks_sprites_group.add(self._my_tank)
-        self._turrets_sprites_group.add(self._my_tank.turret)
-        self._hp_bars_sprites_group.add(self._my_tank.hp_bar)
-        self._tanks.append(self._my_tank)
-
-        return True
+        self._renderer.add(self._my_tank, TANKS_LAYER)
+        self._renderer.add(self._my_tank.turret, TURRETS_LAYER)
+        self._renderer.add(self._my_tank.hp_bar, HP_BARS_LAYER)
+        self._entities.add_tank(self._my_tank)
 
     def get_tank_with_player_id(self, player_id):
         """
@@ -202,10 +275,7 @@ class Game:
         :return: Tank with given player ID or None if not found
         :rtype: Tank
         """
-        for i in self._tanks:
-            if i.player_no == player_id:
-                return i
-        return None
+        return self._entities.get_tank(player_id)
 
     def swap_channels(self, surface, order):
         """
@@ -215,20 +285,7 @@ class Game:
         :return: pygame.Surface
         """
         arr = pygame.surfarray.array3d(surface)
-
-        red = arr[:, :, 0].copy()
-        green = arr[:, :, 1].copy()
-        blue = arr[:, :, 2].copy()
-
-        swaps = [red, green, blue]
-
-        arr[:, :, 0] = swaps[order[0]]
-        arr[:, :, 1] = swaps[order[1]]
-        arr[:, :, 2] = swaps[order[2]]
-
-        new_arr = arr
-
-        return pygame.surfarray.make_surface(new_arr)
+        return pygame.surfarray.make_surface(arr[:, :, order])
 
     def recolor_tank(self, tank):
         """
@@ -236,23 +293,10 @@ class Game:
         :param Tank tank: tank object to be recolored
         :return: None
         """
-        mask = pygame.Surface(tank.original_image.get_size()).convert_alpha()
-        mask.fill("#ffffff")
         swap_order = constants.swap_colors[tank.player_no % len(constants.swap_colors)]
-
-        recolored = self.swap_channels(tank.original_image, swap_order)
-        new_image = tank.original_image.copy()
-        new_image.blit(mask, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
-        new_image.blit(recolored, (0, 0), special_flags=pygame.BLEND_RGB_MULT)
-        tank.original_image = new_image
-
-        mask = pygame.Surface(tank.turret.original_image.get_size()).convert_alpha()
-        mask.fill("#ffffff")
-        recolored = self.swap_channels(tank.turret.original_image, swap_order)
-        new_image = tank.turret.original_image.copy()
-        new_image.blit(mask, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
-        new_image.blit(recolored, (0, 0), special_flags=pygame.BLEND_RGB_MULT)
-        tank.turret.original_image = new_image
+        tank.original_image = self._recolor_cache.recolor(tank.resource_name, tank.original_image, swap_order)
+        tank.turret.original_image = self._recolor_cache.recolor(tank.turret.resource_name,
+                                                                 tank.turret.original_image, swap_order)
 
     def add_new_tank(self, player_id, x, y, tank_angle, tank_version):
         """
@@ -269,46 +313,59 @@ class Game:
         tank = Tank(player_id, self, x, y, tank_angle, self.load_resource(constants.tank_versions[tank_version]))
 
         self.recolor_tank(tank)
-
-        self._tanks_sprites_group.add(tank)
-        self._turrets_sprites_group.add(tank.turret)
-        self._hp_bars_sprites_group.add(tank.hp_bar)
-        self._tanks.append(tank)
+        tank.follow_server(self._remote_tank_states)
+        if constants.rotation_cache_prewarm:
+            rotation_cache.prewarm(tank.original_image)
+            rotation_cache.prewarm(tank.turret.original_image)
+
+        self._renderer.add(tank, TANKS_LAYER)
+        self._renderer.add(tank.turret, TURRETS_LAYER)
+        self._renderer.add(tank.hp_bar, HP_BARS_LAYER)
+        self._entities.add_tank(tank)
         self._player_count += 1
 
+    def prewarm_rotation_cache(self):
+        """
+        Rotates the images of all tank versions (tank, turret, projectile and explosion) by all angles in advance
+        :return: None
+        """
+        for tank_file in constants.tank_versions.values():
+            tank_attributes = self.load_resource(tank_file)
+            turret_attributes = self.load_resource(tank_attributes["turret"])
+            projectile_attributes = self.load_resource(turret_attributes["ammo"])
+            explosion_attributes = self.load_resource(projectile_attributes["explosion"])
+            images = [projectile_attributes["texture"], turret_attributes["texture"], tank_attributes["texture"]]
+            if explosion_attributes["inherit_angle"]:
+                images = explosion_attributes["animation_frames"] + images  # evicted first if the cache is too small
+            for image in images:
+                rotation_cache.prewarm(image)
+
     def load_map(self, filename):
         """
-        Loads map from file
-        :param str filename: Name of the file which the map will be loaded from
+        Loads map from file. A binary map that does not match the JSON map with the same name is converted again first
+        :param str filename: Name of the file which the map will be loaded from (binary or JSON map)
         :return: None
         """
+        filename = map_file_to_load(filename)
+        if filename.endswith(map_file_extension):
+            palette, tile_indices, self._spawn_points = load_binary_map(filename)
+            self._background_board.load_tiles(palette, tile_indices, self._background_cache)
+            return
         with open(filename, 'r') as file:
             save_data = json.load(file)
 
-        self._background_board.deserialize(save_data["map_data"])
+        self._background_board.deserialize(save_data["map_data"], self._background_cache)
         self._spawn_points = save_data["spawn_points"]
 
     def load_resource(self, filename):
         """
-        Loads a json resource file. Automatically converts textures to pygame images
+        Returns a json resource file. Automatically converts textures to pygame images. All resources of the game are
+        loaded in the background while the menu is shown (see AssetPipeline), others are loaded when first used
         :param str filename: Name of the file which the resource will be loaded from
         :return: Loaded resource
         :rtype: dict
         """
-
-        resource = self._resources.get(filename)
-        if resource:
-            return resource
-        with open(filename, 'r') as file:
-            resource = json.load(file)
-        if resource.get("texture"):
-            resource["texture"] = pygame.image.load(resource["texture"])
-        if resource.get("animation_frames"):
-            for i, img_path in enumerate(resource["animation_frames"]):
-                resource["animation_frames"][i] = pygame.image.load(img_path)
-        resource["resource_name"] = filename
-        self._resources[filename] = resource
-        return resource
+        return self._assets.get(filename)
 
     def get_tile_at_screen_position(self, x, y):
         """
@@ -320,6 +377,26 @@ class Game:
         """
         return self._background_board.get_tile(int(x / self._background_scale), int(y / self._background_scale))
 
+    def get_tile_attribute_at_screen_position(self, x, y, attribute_name):
+        """
+        Returns attribute of the tile at the given (x,y) screen position. Costs a single array lookup
+        :param float x: X coordinate of the position
+        :param float y: Y coordinate of the position
+        :param str attribute_name: Name of the attribute to be returned
+        :return: Value of the attribute
+        """
+        return self._background_board.get_attribute_at(attribute_name, x, y)
+
+    def tiles_block_movement(self, xs, ys):
+        """
+        Checks which of the given screen positions are on tiles blocking movement
+        :param np.ndarray xs: X coordinates of the positions
+        :param np.ndarray ys: Y coordinates of the positions
+        :return: Mask of the positions on tiles blocking movement
+        :rtype: np.ndarray
+        """
+        return self._background_board.get_attributes_at("blocks_movement", xs, ys)
+
     def screen_position_to_grid_position(self, x, y):
         """
         Converts screen position (in pixels) to grid position (in tiles)
@@ -349,6 +426,9 @@ class Game:
         Display the screen that the server is full or busy at the moment and returns to the main menu
         :return: None
         """
+        if self._headless:
+            print("##ERROR: Server is full or busy")
+            sys.exit(1)
         finished = False
         time_start = time.time()
         dead_image = pygame.image.load("./Pictures/busy_or_full.png").convert_alpha()
@@ -365,27 +445,42 @@ class Game:
         if self.setup():
             self.play()
 
+    def handle_connection_lost(self):
+        """
+        Closes the connection the server has closed and shows the busy screen. Called after everything the server sent
+        before closing it (e.g. this player's death) has been processed
+        :return: None
+        """
+        self._connection.close_connection()
+        if self._replay_reader is not None:
+            self.exit_game(False)  # the whole recording has been played back
+        self.show_server_full_or_busy_screen()
+
     def show_death_screen(self):
         """
         Displays the screen that this player has died and returns to the main menu
         :return: None
         """
-        self._connection.close_connection()
-        finished = False
-        time_start = time.time()
-        dead_image = pygame.image.load("./Pictures/dead.png").convert_alpha()
-        self._screen.blit(self.surface_to_grayscale(self._screen), (0, 0))
-        self._screen.blit(dead_image, dead_image.get_rect(center=self._screen.get_rect().center))
-        while not finished:
-            for ev in pygame.event.get():
-                if ev.type == pygame.QUIT or (ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE):
+        self._connection.close_connection()  # also closes the recording
+        self._record_file = None  # the next game gets a new player ID, so it is not recorded
+        if self._replay_reader is not None:
+            self.exit_game(False)  # the recording ends here
+        if not self._headless:
+            finished = False
+            time_start = time.time()
+            dead_image = pygame.image.load("./Pictures/dead.png").convert_alpha()
+            self._screen.blit(self.surface_to_grayscale(self._screen), (0, 0))
+            self._screen.blit(dead_image, dead_image.get_rect(center=self._screen.get_rect().center))
+            while not finished:
+                for ev in pygame.event.get():
+                    if ev.type == pygame.QUIT or (ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE):
+                        finished = True
+                pygame.display.flip()
+                if time.time() - time_start > constants.death_screen_display_time_sec:
                     finished = True
-            pygame.display.flip()
-            if time.time() - time_start > constants.death_screen_display_time_sec:
-                finished = True
-            self._clock.tick(constants.target_fps)
-	
-        self.save_default_ip(self._server_address)
+                self._clock.tick(constants.target_fps)
+
+            self.save_default_ip(self._server_address)
         if self.setup():
             self.play()
 
@@ -397,7 +492,13 @@ class Game:
         """
         if should_close_connection:
             self._connection.close_connection()
-        self.save_default_ip(self._server_address)
+        if not self._headless:
+            self.save_default_ip(self._server_address)
+        if self._profile_file is not None:
+            self._profiler.dump(self._profile_file)
+        if self._connection is not None:
+            self._connection.stop_recording()
+        self._assets.shutdown()
         sys.exit(0)
 
     def add_projectile(self, projectile):
@@ -406,7 +507,7 @@ class Game:
         :param Projectile projectile: Projectile to be added to projectiles sprite group
         :return: None
         """
-        self._projectiles_sprites_group.add(projectile)
+        self._renderer.add(projectile, PROJECTILES_LAYER)
 
     def add_hp_bar(self, hp_bar):
         """
@@ -414,7 +515,7 @@ class Game:
         :param HPBar hp_bar: HPBar to be added to hp_bars sprite group
         :return: None
         """
-        self._hp_bars_sprites_group.add(hp_bar)
+        self._renderer.add(hp_bar, HP_BARS_LAYER)
 
     def remove_hp_bar(self, hp_bar):
         """
@@ -452,7 +553,7 @@ class Game:
             tank.turret.remove_all_projectiles()
             tank.turret.kill()
             tank.kill()
-            self._tanks.remove(tank)
+            self._entities.remove_tank(player_id)
             self._player_count -= 1
 
     def update_tank(self, player_id, x_location, y_location, tank_angle, hp, turret_angle, tank_version, shield_active):
@@ -469,6 +570,8 @@ class Game:
         tank = self.get_tank_with_player_id(player_id)
         if tank is None:
             self.add_new_tank(player_id, x_location, y_location, tank_angle, tank_version)
+        elif tank is self._my_tank:
+            tank.reconcile(hp)
         else:
             tank.update_values_from_server(x_location, y_location, tank_angle, hp, turret_angle, shield_active)
 
@@ -501,15 +604,119 @@ class Game:
             projectile = tank.turret.get_projectile_with_id(projectile_id)
 
         if hp == constants.projectile_not_exists:
-            self._explosions_sprites_group.add(Explosion(projectile.x, projectile.y,
-                                                         projectile.angle, projectile.explosion))
+            self._renderer.add(Explosion(projectile.x, projectile.y, projectile.angle, projectile.explosion),
+                               EXPLOSIONS_LAYER)
             self.remove_projectile(player_id, projectile_id)
         elif hp == constants.projectile_exists:
             projectile.update_from_server(x_location, y_location)
 
+    def update_tanks(self, tanks):
+        """
+        Updates the tanks according to a batch of information received from the server. States of the other players'
+        existing tanks are added to the remote tank states at once
+        :param np.ndarray tanks: Tank information rows (dtype payload_information_dtype)
+        :return: None
+        """
+        found = self._entities.get_tanks(tanks["player_id"].tolist())
+        if None in found or self._my_tank in found:  # new tanks and this client's tank are updated one by one
+            remote = np.array([tank is not None and tank is not self._my_tank for tank in found], dtype=bool)
+            others = tanks[~remote]
+            for player_id, x_location, y_location, tank_angle, hp, turret_angle, tank_version, shield_active in zip(
+                    others["player_id"].tolist(), others["x_location"].tolist(), others["y_location"].tolist(),
+                    others["tank_angle"].tolist(), others["hp"].tolist(), others["turret_angle"].tolist(),
+                    others["tank_version"].tolist(), others["shield_active"].tolist()):
+                self.update_tank(player_id, x_location, y_location, tank_angle, hp, turret_angle, tank_version,
+                                 shield_active)
+            found = [tank for tank, is_remote in zip(found, remote.tolist()) if is_remote]
+            tanks = tanks[remote]
+        if not found:
+            return
+
+        self._remote_tank_states.add(np.array([tank.server_slot for tank in found]), self._connection.clock(),
+                                     np.column_stack((tanks["x_location"], tanks["y_location"], tanks["tank_angle"],
+                                                      tanks["turret_angle"])))
+        for tank, hp, shield_active in zip(found, tanks["hp"].tolist(), tanks["shield_active"].tolist()):
+            tank.update_status_from_server(hp, shield_active)
+
+    def remove_tanks(self, player_ids):
+        """
+        Removes tanks of all the given players
+        :param List[int] player_ids: IDs of the players whose tanks should be removed
+        :return: None
+        """
+        for player_id in player_ids:
+            self.remove_tank(player_id)
+
+    def add_projectiles_from_network(self, projectiles):
+        """
+        Adds projectiles created by other players according to a batch of information received from the server
+        :param np.ndarray projectiles: Projectile information rows (dtype payload_information_dtype)
+        :return: None
+        """
+        found = self._entities.get_projectiles(projectiles["turret_angle"].astype(np.int32).tolist())
+        new = np.array([projectile is None or projectile.owner.player_no != player_id
+                        for projectile, player_id in zip(found, projectiles["player_id"].tolist())], dtype=bool)
+        if not new.any():
+            return
+        projectiles = projectiles[new]
+        for player_id, projectile_id, x_location, y_location, projectile_angle in zip(
+                projectiles["player_id"].tolist(), projectiles["turret_angle"].astype(np.int32).tolist(),
+                projectiles["x_location"].tolist(), projectiles["y_location"].tolist(),
+                projectiles["tank_angle"].tolist()):
+            self.add_projectile_from_network(player_id, projectile_id, x_location, y_location, projectile_angle)
+
+    def update_projectiles(self, projectiles):
+        """
+        Updates the projectiles according to a batch of information received from the server. Positions of the other
+        players' existing projectiles are added to the remote projectile states at once, the other rows (deleted and
+        unknown projectiles) are applied one by one, in the order they arrived
+        :param np.ndarray projectiles: Projectile information rows (dtype payload_information_dtype)
+        :return: None
+        """
+        projectile_ids = projectiles["turret_angle"].astype(np.int32)
+        found = self._entities.get_projectiles(projectile_ids.tolist())
+        owners = np.array([-1 if projectile is None else projectile.owner.player_no for projectile in found])
+        moved = (owners == projectiles["player_id"]) & (projectiles["hp"] == constants.projectile_exists)
+        if not moved.all():
+            # all the rows of a projectile that is deleted or created are applied one by one, to keep their order
+            moved &= ~np.isin(projectile_ids, projectile_ids[~moved])
+
+        # this client's projectiles are simulated, not displayed at the positions received
+        slots = [found[i].server_slot for i in np.flatnonzero(moved).tolist()]
+        followed = [slot is not None for slot in slots]
+        if any(followed):
+            positions = projectiles[moved]
+            if not all(followed):
+                slots = [slot for slot in slots if slot is not None]
+                positions = positions[followed]
+            self._remote_projectile_states.add(np.array(slots), self._connection.clock(),
+                                               np.column_stack((positions["x_location"], positions["y_location"])))
+
+        if not moved.all():
+            others = projectiles[~moved]
+            for player_id, projectile_id, x_location, y_location, projectile_angle, hp in zip(
+                    others["player_id"].tolist(), others["turret_angle"].astype(np.int32).tolist(),
+                    others["x_location"].tolist(), others["y_location"].tolist(), others["tank_angle"].tolist(),
+                    others["hp"].tolist()):
+                self.update_projectile(player_id, projectile_id, x_location, y_location, projectile_angle, hp)
+
+    def interpolate_remote_entities(self):
+        """
+        Moves other players' tanks and projectiles to their interpolated state, constants.interpolation_delay_sec
+        in the past (by the connection's clock - the recording's when it is played back)
+        :return: None
+        """
+        render_time = self._connection.clock() - constants.interpolation_delay_sec
+        tanks, states = self._remote_tank_states.sample(render_time)
+        for tank, (x, y, tank_angle, turret_angle) in zip(tanks, states.tolist()):
+            tank.display_server_state(x, y, tank_angle, turret_angle)
+        projectiles, positions = self._remote_projectile_states.sample(render_time)
+        for projectile, (x, y) in zip(projectiles, positions.tolist()):
+            projectile.display_server_position(x, y)
+
     def send_tank_position(self, x_location, y_location, tank_angle, hp, turret_angle, shield_active):
         """
-        Sends calculated position of the tank
+        Sends calculated position of the tank if it has changed since the last send or a heartbeat is due
         :param int x_location: New X coordinate of the tank's position
         :param int y_location: New Y coordinate of the tank's position
         :param float tank_angle: New tank's angle
@@ -517,6 +724,9 @@ class Game:
         :param float turret_angle: New tank's turret's angle
         :return: None
         """
+        if not self._tank_state_filter.should_send(x_location, y_location, tank_angle, hp, turret_angle, shield_active,
+                                                   time.monotonic()):
+            return
         self._connection.send_want_to_change_tank_or_turret(x_location, y_location, tank_angle, hp, turret_angle,
                                                             self._tank_version, shield_active)
 
@@ -543,61 +753,242 @@ class Game:
         """
         self._connection.send_want_to_change_projectile(projectile_id, x_location, y_location, projectile_angle, hp)
 
+    def send_projectile_updates(self, projectile_ids, x_locations, y_locations, projectile_angles, hp):
+        """
+        Sends information to update many projectiles owned by this player at once
+        :param np.ndarray projectile_ids: IDs of the updated projectiles
+        :param np.ndarray x_locations: X coordinates of the projectiles' positions
+        :param np.ndarray y_locations: Y coordinates of the projectiles' positions
+        :param np.ndarray projectile_angles: Angles of the projectiles
+        :param float hp: HP of the projectiles (Exist or not)
+        :return: None
+        """
+        self._connection.send_want_to_change_projectiles(projectile_ids, x_locations, y_locations, projectile_angles,
+                                                         hp)
+
     def play(self):
         """
         Runs the whole game!
         :return: None
         """
         self._background_board.draw(self._screen, draw_all=True)
-        delta_time = 0.0
-        received = False
+        self._renderer.request_full_update()
+        tick = 1 / constants.simulation_tick_rate
+        accumulator = 0.0
+        replaying = self._replay_reader is not None
+        # a recording played back as fast as possible is not throttled, its frames take the recorded time
+        frame_rate = 0 if replaying and self._replay_speed == 0 else self._frame_rate
+        replay_time = self._connection.clock()
         while True:
-            delta_time += self._clock.tick(constants.target_fps) / 1000  # number of seconds passed since the last frame
-
-            self._background_board.draw(self._screen)  # not a performance issue - only draws updated background parts
-            pygame.display.set_caption("Project - Distracted Programming " + str(int(self._clock.get_fps())) + " fps")
+            self._profiler.start_frame()
+            frame_time = self._clock.tick(frame_rate) / 1000  # number of seconds passed since the last frame
+            if self._fixed_frame_time is not None:
+                frame_time = self._fixed_frame_time
+            elif replaying:
+                frame_time, replay_time = self._connection.clock() - replay_time, self._connection.clock()
+            accumulator += frame_time
+            self._profiler.mark("tick")
+
+            if not self._headless:
+                pygame.display.set_caption("Project - Distracted Programming " + str(int(self._clock.get_fps())) +
+                                           " fps")
 
             for ev in pygame.event.get():
                 if ev.type == pygame.QUIT or (ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE):
                     self.exit_game(True)
+                if ev.type == pygame.KEYDOWN and ev.key == pygame.K_F3:
+                    self.toggle_profiler_overlay()
+            if self._run_until is not None and time.monotonic() >= self._run_until:
+                self.exit_game(True)
+            self._profiler.mark("events")
 
             # Receive processed information
-            received_information_arr = self._connection.receive_all_information()
+            received_information_arr = self._connection.receive_all_information_array()
+            self._profiler.mark("receive")
             if len(received_information_arr) > 0:
-                received = True
-                self._connection.process_received_information(received_information_arr)
+                self._connection.process_received_information_array(received_information_arr)
+            if self._connection.connection_lost:
+                self.handle_connection_lost()
+            self._profiler.count("received_messages", len(received_information_arr))
+            self._profiler.mark("process")
 
             keys = pygame.key.get_pressed()
             self._my_tank.keyboard_input(keys)
 
-            # Calculate values and at the same time send to server
-            if received is True:
-                self._tanks_sprites_group.update(delta_time)
-                self._turrets_sprites_group.update(delta_time)
-                self._projectiles_sprites_group.update(delta_time)
-                self._explosions_sprites_group.update(delta_time)
-                self._hp_bars_sprites_group.update()
-                delta_time = 0.0
-                received = False
-
-            self._tanks_sprites_group.clear(self._screen, self._background_board.background_surface)
-            self._turrets_sprites_group.clear(self._screen, self._background_board.background_surface)
-            self._projectiles_sprites_group.clear(self._screen, self._background_board.background_surface)
-            self._explosions_sprites_group.clear(self._screen, self._background_board.background_surface)
-            self._hp_bars_sprites_group.clear(self._screen, self._background_board.background_surface)
+            # Physics runs in fixed steps, no matter how long the frame took or when something was received
+            steps = 0
+            while accumulator >= tick and steps < constants.simulation_max_steps_per_frame:
+                self.simulate(tick)
+                accumulator -= tick
+                steps += 1
+            if steps == constants.simulation_max_steps_per_frame:
+                accumulator = min(accumulator, tick)  # the rest is dropped, so slow frames don't pile up more steps
+
+            # Display the simulated entities between the last two steps, and the other players' between received states
+            self.interpolate_simulated_entities(accumulator / tick)
+            self.interpolate_remote_entities()
+            if self._profiler_overlay is not None:
+                self._profiler_overlay.update(frame_time)
+            self._profiler.count("simulation_steps", steps)
+            self._profiler.count("tanks", len(self._entities.tanks()))
+            self._profiler.count("projectiles", len(self._entities.projectiles()))
+            self._profiler.mark("update")
 
             # Draw all the information on the screen
-            self._tanks_sprites_group.draw(self._screen)
-            self._turrets_sprites_group.draw(self._screen)
-            self._projectiles_sprites_group.draw(self._screen)
-            self._explosions_sprites_group.draw(self._screen)
-            self._hp_bars_sprites_group.draw(self._screen)
+            if not self._headless:
+                self._renderer.clear()
+                # not a performance issue - only draws updated background parts
+                self._renderer.add_dirty_rects(self._background_board.draw(self._screen))
+                self._profiler.mark("clear")
+                self._renderer.draw()
+                self._profiler.mark("draw")
+
+            sent_before = self._connection.outbound_stats["messages_flushed"]
+            self._connection.flush_information()  # everything sent during this frame goes out in one call
+            self._profiler.count("sent_messages", self._connection.outbound_stats["messages_flushed"] - sent_before)
+            self._profiler.mark("flush")
+
+            if not self._headless:
+                self._renderer.update_display()  # only the changed parts of the screen, unless they are too large
+                self._profiler.mark("flip")
+            self._profiler.end_frame()
+
+    def toggle_profiler_overlay(self):
+        """
+        Shows or hides the frame times overlay
+        :return: None
+        """
+        if self._profiler_overlay is None:
+            self._profiler_overlay = FrameProfilerOverlay(self._profiler)
+            self._profiler_overlay.update(0)
+            self._renderer.add(self._profiler_overlay, OVERLAY_LAYER)
+        else:
+            self._profiler_overlay.kill()
+            self._profiler_overlay = None
 
-            pygame.display.flip()
+    def simulate(self, delta_time):
+        """
+        Advances the game by one fixed simulation step: this client's tank is predicted, its projectiles are moved
+        (and sent to the server), other players' tanks, explosions and hp bars are updated
+        :param float delta_time: Length of the simulation step
+        :return: None
+        """
+        self._my_tank.update(delta_time)
+        self._my_tank.turret.update(delta_time)
+        for sprite in self._renderer.sprites_in(TANKS_LAYER):
+            if sprite is not self._my_tank:
+                sprite.update(delta_time)
+        for sprite in self._renderer.sprites_in(TURRETS_LAYER):
+            if sprite is not self._my_tank.turret:
+                sprite.update(delta_time)
+        self._projectile_engine.step(delta_time)
+        for sprite in self._renderer.sprites_in(PROJECTILES_LAYER):
+            sprite.update(delta_time)
+        for sprite in self._renderer.sprites_in(EXPLOSIONS_LAYER):
+            sprite.update(delta_time)
+
+    def interpolate_simulated_entities(self, fraction):
+        """
+        Moves this client's tank and projectiles to their positions between the last two simulation steps
+        :param float fraction: Time passed since the last step, as a fraction of the step length
+        :return: None
+        """
+        self._my_tank.interpolate_steps(fraction)
+        self._projectile_engine.interpolate_steps(fraction)
+        for sprite in self._renderer.sprites_in(HP_BARS_LAYER):
+            sprite.update()
 
     def set_tank_version(self, new_tank_version):
         self._tank_version = new_tank_version
 
+    def set_frame_rate(self, frame_rate, fixed_frame_time=None):
+        """
+        Sets how fast frames are played
+        :param float frame_rate: Frames per second at most, 0 - unthrottled
+        :param float fixed_frame_time: If given, every frame simulates this many seconds, no matter how long it took
+        :return: None
+        """
+        self._frame_rate = frame_rate
+        self._fixed_frame_time = fixed_frame_time
+
+    def save_profile_at_exit(self, filename):
+        """
+        Makes the game save the frame times to a file when it quits
+        :param str filename: Name of the file - CSV (one row per frame) if it ends with .csv, JSON summary otherwise
+        :return: None
+        """
+        self._profile_file = filename
+
+    def record_to(self, filename):
+        """
+        Makes the game record all information received from the server (until this player dies)
+        :param str filename: Name of the file the recording is written to
+        :return: None
+        """
+        self._record_file = filename
+
+    def replay_from(self, filename, speed=1.0):
+        """
+        Makes the game play back a recording instead of connecting to a server. The game quits when it ends
+        :param str filename: Name of the file written by the recorder
+        :param float speed: Playback speed (1 - real time, 0 - one recorded batch per frame, as fast as possible)
+        :return: None
+        """
+        self._replay_reader = RecordingReader(filename)
+        self._replay_speed = speed
+
+    def quit_after(self, seconds):
+        """
+        Makes the game quit (closing the connection) after the given time of playing
+        :param float seconds: Time after which the game quits
+        :return: None
+        """
+        self._run_until = time.monotonic() + seconds
+
+    @property
+    def tank_send_stats(self):
+        return self._tank_state_filter.stats()
+
+    @property
+    def connection(self):
+        return self._connection
+
+    @connection.setter
+    def connection(self, connection):
+        self._connection = connection
+
+    @property
+    def assets(self):
+        return self._assets
+
+    @property
+    def renderer(self):
+        return self._renderer
+
+    @property
+    def my_tank(self):
+        return self._my_tank
+
+    @property
+    def entities(self):
+        return self._entities
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def projectile_engine(self):
+        return self._projectile_engine
+
+    @property
+    def remote_projectile_states(self):
+        return self._remote_projectile_states
+
     @property
     def my_player_id(self):
         return self._my_player_id
@@ -31,7 +31,7 @@ class HPBar(pygame.sprite.Sprite):
         Updates the location of the bar on the screen according to the tank's position
         :return: None
         """
-        self.rect.center = (self._tank.x, self._tank.y - self._y_offset)
+        self.rect.center = (self._tank.rect.centerx, self._tank.rect.centery - self._y_offset)
 
     def update_hp(self, new_hp):
         """
@@ -0,0 +1,236 @@
+import argparse
+import json
+import time
+from collections import deque
+from math import sin, cos, pi
+
+import numpy as np
+
+import constants
+from Networking.connection import Connection
+
+
+class BotClient:
+    """
+    Scripted headless client. Plays the part of Game for its Connection: drives a tank in a circle, fires projectiles
+    and records what the server sends back.
+    Attributes:
+        _bot_no: Number of the bot, used to spread the bots over the map
+        _connection: Connection with the server
+        _player_id: This bot's player ID
+        _alive: Whether the bot is still connected
+        _pending_positions: (x, time) of the tank states sent and not yet seen in the server's answers
+        _projectiles: Projectiles fired by this bot: ID -> (x, y, angle, time of death)
+        ...statistics
+    """
+    def __init__(self, bot_no, address, port, tank_version):
+        self._bot_no = bot_no
+        self._connection = Connection(self, address, port)
+        self._tank_version = tank_version
+        with open(constants.tank_versions[tank_version], "r") as file:
+            self._tank_hp = json.load(file)["hp"]
+        self._player_id = None
+        self._alive = False
+
+        self._center_x = 100 + (bot_no % 7) * 100
+        self._center_y = 150 + (bot_no // 7 % 3) * 150
+        self._tank_angle = 0.0
+        self._tick = 0
+
+        self._pending_positions = deque()
+        self._projectiles = {}
+        self._projectile_next_id = 0
+
+        self.messages_received = 0
+        self.bytes_received = 0
+        self.messages_sent = 0
+        self.latencies = []
+        self.disconnected = False
+        self.died = False
+
+    def connect(self):
+        """
+        Connects to the server and receives the configuration
+        :return: If the bot has joined the game
+        :rtype: bool
+        """
+        if not self._connection.establish_connection():
+            return False
+        self._connection.send_preferences(self._tank_version, self._tank_hp)
+        player_count, self._player_id = self._connection.receive_configuration()[3:5]
+        if player_count == constants.configuration_receive_error:
+            return False
+        self._connection.player_id = self._player_id
+        self._projectile_next_id = self._player_id * constants.max_projectile_count
+        self._alive = True
+        return True
+
+    def step(self, now, tank_rate, fire_interval, projectile_lifetime, projectile_speed):
+        """
+        Sends this tick's tank state, projectile updates and shots
+        :param float now: Current time (monotonic)
+        :param float tank_rate: Number of ticks per second
+        :param float fire_interval: Ticks between shots (0 - never fire)
+        :param float projectile_lifetime: Seconds a projectile flies for
+        :param float projectile_speed: Pixels per second a projectile flies with
+        :return: None
+        """
+        if not self._alive:
+            return
+        self._tick += 1
+        self._tank_angle = (self._tank_angle + 90 / tank_rate) % 360
+        x = self._center_x + 50 * cos(self._tank_angle * pi / 180)
+        y = self._center_y + 50 * sin(self._tank_angle * pi / 180)
+        self._connection.send_want_to_change_tank_or_turret(x, y, self._tank_angle, self._tank_hp, 0.0,
+                                                            self._tank_version, False)
+        self._pending_positions.append((float(np.float32(x)), now))  # the server echoes x back as float32
+        self.messages_sent += 1
+
+        for projectile_id, (projectile_x, projectile_y, angle, death_time) in list(self._projectiles.items()):
+            if now >= death_time:
+                self._connection.send_want_to_change_projectile(projectile_id, projectile_x, projectile_y, angle,
+                                                                constants.projectile_not_exists)
+                del self._projectiles[projectile_id]
+            else:
+                projectile_x -= projectile_speed / tank_rate * sin(angle * pi / 180)
+                projectile_y -= projectile_speed / tank_rate * cos(angle * pi / 180)
+                self._projectiles[projectile_id] = (projectile_x, projectile_y, angle, death_time)
+                self._connection.send_want_to_change_projectile(projectile_id, projectile_x, projectile_y, angle,
+                                                                constants.projectile_exists)
+            self.messages_sent += 1
+
+        if fire_interval and self._tick % fire_interval == 0 and \
+                self._projectile_next_id not in self._projectiles:
+            self._projectiles[self._projectile_next_id] = (x, y - 40, self._tank_angle, now + projectile_lifetime)
+            self._connection.send_want_to_new_projectile(self._projectile_next_id, x, y - 40, self._tank_angle)
+            self.messages_sent += 1
+            self._projectile_next_id += 1
+            if self._projectile_next_id >= (self._player_id + 1) * constants.max_projectile_count:
+                self._projectile_next_id = self._player_id * constants.max_projectile_count
+
+        self._connection.flush_information()
+
+    def receive(self):
+        """
+        Receives and processes everything the server has sent
+        :return: None
+        """
+        if not self._alive:
+            return
+        received_information_arr = self._connection.receive_all_information_array()
+        self.messages_received += len(received_information_arr)
+        self.bytes_received += received_information_arr.nbytes
+        if len(received_information_arr) > 0:
+            self._connection.process_received_information_array(received_information_arr)
+        if self._alive and self._connection.connection_lost:
+            self.show_server_full_or_busy_screen()
+
+    def close(self):
+        if self._alive:
+            self._alive = False
+            self._connection.close_connection()
+
+    # Called by Connection
+
+    def update_tanks(self, tanks):
+        now = time.monotonic()
+        for x_location in tanks["x_location"][tanks["player_id"] == self._player_id].tolist():
+            while self._pending_positions:
+                sent_x, sent_time = self._pending_positions.popleft()
+                if sent_x == x_location:
+                    self.latencies.append(now - sent_time)
+                    break
+
+    def update_projectiles(self, projectiles):
+        mine = projectiles[(projectiles["player_id"] == self._player_id) &
+                           (projectiles["hp"] == constants.projectile_not_exists)]
+        for projectile_id in mine["turret_angle"].astype(np.int32).tolist():
+            self._projectiles.pop(projectile_id, None)  # hit something on the server
+
+    def add_projectiles_from_network(self, projectiles):
+        pass
+
+    def remove_tanks(self, player_ids):
+        pass
+
+    def show_death_screen(self):
+        self.died = True
+        self._alive = False  # the server closes the connection of a dead player itself
+
+    def show_server_full_or_busy_screen(self):
+        if self._alive:
+            self.disconnected = True
+            self._alive = False
+
+    @property
+    def alive(self):
+        return self._alive
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1000 if len(values) > 0 else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Puts load on a game server with scripted headless clients")
+    parser.add_argument("--address", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=constants.game_port)
+    parser.add_argument("--bots", type=int, default=6, help="number of clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--tank-rate", type=float, default=60.0, help="tank updates per second per bot")
+    parser.add_argument("--fire-rate", type=float, default=2.0, help="shots per second per bot (0 - never)")
+    parser.add_argument("--tank-version", type=int, default=0, choices=sorted(constants.tank_versions))
+    parser.add_argument("--projectile-lifetime", type=float, default=1.5, help="seconds")
+    parser.add_argument("--projectile-speed", type=float, default=300.0, help="pixels per second")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    bots = []
+    for bot_no in range(args.bots):
+        bot = BotClient(bot_no, args.address, args.port, args.tank_version)
+        if bot.connect():
+            bots.append(bot)
+        else:
+            print(f"##ERROR: Bot {bot_no} could not join the game")
+    print(f"###INFO: {len(bots)} bots joined")
+
+    tick_time = 1 / args.tank_rate
+    fire_interval = int(round(args.tank_rate / args.fire_rate)) if args.fire_rate > 0 else 0
+    time_start = time.monotonic()
+    next_tick = time_start
+    while time.monotonic() - time_start < args.duration and any(bot.alive for bot in bots):
+        now = time.monotonic()
+        if now >= next_tick:
+            for bot in bots:
+                bot.step(now, args.tank_rate, fire_interval, args.projectile_lifetime, args.projectile_speed)
+            next_tick += tick_time
+        for bot in bots:
+            bot.receive()
+        time.sleep(min(0.001, max(0.0, next_tick - time.monotonic())))
+    elapsed = time.monotonic() - time_start
+    for bot in bots:
+        bot.close()
+
+    latencies = [latency for bot in bots for latency in bot.latencies]
+    report = {
+        "bots": len(bots),
+        "seconds": elapsed,
+        "messages_sent_per_sec": sum(bot.messages_sent for bot in bots) / elapsed,
+        "messages_received_per_sec": sum(bot.messages_received for bot in bots) / elapsed,
+        "bytes_received_per_sec": sum(bot.bytes_received for bot in bots) / elapsed,
+        "latency_ms_p50": percentile(latencies, 50),
+        "latency_ms_p90": percentile(latencies, 90),
+        "latency_ms_p99": percentile(latencies, 99),
+        "latency_samples": len(latencies),
+        "disconnects": sum(bot.disconnected for bot in bots),
+        "deaths": sum(bot.died for bot in bots),
+    }
+    for key, value in report.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
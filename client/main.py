@@ -1,9 +1,44 @@
+import argparse
+
+import constants
 from game import Game
 
 
 def main():
-    my_game = Game()
+    parser = argparse.ArgumentParser(description="Tank game client")
+    parser.add_argument("--headless", action="store_true",
+                        help="no window, menu or drawing - for bots, benchmarks and CI")
+    parser.add_argument("--address", default=constants.default_game_server_ip, help="server address (headless mode)")
+    parser.add_argument("--tank-version", type=int, default=0, choices=sorted(constants.tank_versions),
+                        help="headless mode")
+    parser.add_argument("--fps", type=float, default=constants.target_fps, help="frame rate limit (0 - unthrottled)")
+    parser.add_argument("--fixed-frame-time", type=float,
+                        help="seconds simulated per frame, no matter how long the frame took")
+    parser.add_argument("--duration", type=float, help="quit after this many seconds")
+    parser.add_argument("--profile", help="save frame times to this file at exit (.csv - every frame, else JSON)")
+    parser.add_argument("--record", help="record the information received from the server to this file")
+    parser.add_argument("--replay", help="play back a recording instead of connecting to a server")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="1 - real time, 0 - one recorded batch per frame, as fast as possible")
+    parser.add_argument("--overlay", action="store_true", help="show frame times on the screen (toggled with F3)")
+    args = parser.parse_args()
+
+    my_game = Game(headless=args.headless)
+    if args.headless:
+        my_game.change_server_ip(args.address)
+        my_game.set_tank_version(args.tank_version)
+    my_game.set_frame_rate(args.fps, args.fixed_frame_time)
+    if args.duration is not None:
+        my_game.quit_after(args.duration)
+    if args.record is not None:
+        my_game.record_to(args.record)
+    if args.replay is not None:
+        my_game.replay_from(args.replay, args.replay_speed)
+    if args.profile is not None:
+        my_game.save_profile_at_exit(args.profile)
     if my_game.setup():
+        if args.overlay:
+            my_game.toggle_profiler_overlay()
         my_game.play()
 
 
@@ -1,8 +1,10 @@
 import json
+import os
 
 from game import Game
 from tile import Tile
 from Boards.background_board import BackgroundBoard
+from Boards.map_file import save_binary_map, source_stamp, map_file_extension
 import pygame
 import constants
 
@@ -73,11 +75,11 @@ class MapEditor(Game):
 
     def save(self, filename):
         """
-        Saves the map to the specified file
-        :param str filename: Name of the file the map will be saved at
+        Saves the map to the specified JSON file and to the binary map with the same name, which is the one the game
+        loads
+        :param str filename: Name of the JSON file the map will be saved at
         :return: None
         """
-
         save_data = {
             "spawn_points": self._spawn_points,
             "map_data": self._background_board.serialize()
@@ -85,6 +87,8 @@ class MapEditor(Game):
 
         with open(filename, 'w') as file:
             json.dump(save_data, file)
+        save_binary_map(os.path.splitext(filename)[0] + map_file_extension, *self._background_board.tile_indices(),
+                        self._spawn_points, source_stamp(filename))
 
     def set_cursor_positions(self, grid_x, grid_y, symmetry_x, symmetry_y):
         """
@@ -0,0 +1,4 @@
+from collections import namedtuple
+
+# Movement keys pressed during one frame of this client's tank
+MovementInput = namedtuple("MovementInput", ["forward", "backward", "left", "right", "turret_left", "turret_right"])
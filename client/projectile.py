@@ -1,7 +1,7 @@
 import pygame
-from math import sin, cos, pi
 
 import constants
+from rotation_cache import rotation_cache
 
 
 class Projectile(pygame.sprite.Sprite):
@@ -25,61 +25,89 @@ class Projectile(pygame.sprite.Sprite):
         self._damage = attributes["damage"]
         self._lifetime = attributes["lifetime"]
         self._explosion = self._owner._game.load_resource(attributes["explosion"])
+        # positions received from the server and the projectile's slot in them - only used for other players' projectiles
+        self._server_states = None
+        self._server_slot = None
+        self._engine = None  # ProjectileEngine simulating the projectile - only used for this player's projectiles
+        self._slot = None
 
-        self.image = attributes["texture"]
-        self.image = pygame.transform.rotozoom(self.image, self._angle, 1)
+        self.image = rotation_cache.rotate(attributes["texture"], self._angle)
         self.rect = self.image.get_rect()
         self.rect.center = (self._x, self._y)
 
     def update(self, delta_time):
         """
         Overrides the method from pygame.sprite.Sprite
-        Updates projectiles position
+        Moves the sprite to the projectile's position. This player's projectiles are simulated by the ProjectileEngine
         :param float delta_time: Time elapsed since last call of this function
         :return: None
         """
-
-        if self._owner.player_no == self._turret.game._my_player_id and self._alive:
-            x, y = self.save_my_data()
-            self._lifetime -= delta_time
-            if self._lifetime <= 0 and self._alive:
-                self.die()
-                return
-
-            if self._x < 0 or self._y < 0 or self._x > self._turret.game._width or self._y > self._turret.game._height:
-                self.die()
-                return
-
-            if self._turret.game.get_tile_at_screen_position(self._x, self._y).get_attribute("blocks_movement"):
-                self.die()
-                return
-
-            dx = -self._speed * sin(self._angle * (pi / 180)) * delta_time
-            dy = -self._speed * cos(self._angle * (pi / 180)) * delta_time
-            self._x += dx
-            self._y += dy
-            self._turret.game.send_projectile_update(self._id, self._x, self._y, self._angle,
-                                                     constants.projectile_exists)
-            #self._x, self._y = x, y
+        if self._engine is not None:
+            self._x, self._y = self._engine.position(self._slot)
         self.rect.center = (self._x, self._y)
 
+    def attach(self, engine):
+        """
+        Hands the projectile's movement over to the projectile engine. Only applies to this player's projectiles
+        :param ProjectileEngine engine: Engine that will simulate the projectile
+        :return: None
+        """
+        self._slot = engine.spawn(self, self._speed, self._lifetime)
+        self._engine = engine
+
+    def detach(self):
+        """
+        Stops simulating the projectile in the projectile engine, keeping its last position
+        :return: None
+        """
+        if self._engine is None:
+            return
+        self._x, self._y = self._engine.position(self._slot)
+        self._engine.release(self._slot)
+        self._engine = None
+        self._slot = None
+
+    def kill(self):
+        """
+        Overrides the method from pygame.sprite.Sprite
+        Removes the projectile from all groups and from the projectile engine
+        :return: None
+        """
+        self.detach()
+        if self._server_states is not None:
+            self._server_states.release(self._server_slot)
+            self._server_states = None
+            self._server_slot = None
+        super().kill()
+
+    def follow_server(self, server_states):
+        """
+        Displays the projectile at the positions received from the server. Only applies to other players' projectiles
+        :param SnapshotArrays server_states: Positions received from the server (x, y)
+        :return: None
+        """
+        self._server_slot = server_states.allocate(self)
+        self._server_states = server_states
+
     def update_from_server(self, x, y):
         """
-        Updates coordinates of the projectile according to the information received from server
+        Adds coordinates of the projectile received from server. They are interpolated by the game
         :param int x: X coordinate of the projectile's location
         :param y: Y coordinate of the projectile's location
         :return: None
         """
-        self._x = x
-        self._y = y
+        if self._server_states is not None:
+            self._server_states.add_single(self._server_slot, self._turret.game.connection.clock(), (x, y))
 
-    def save_my_data(self):
+    def display_server_position(self, x, y):
         """
-        Function that returns the location of the projectile
-        :return: (x, y) of the projectile's location
-        :rtype (int, int)
+        Moves the projectile to the position interpolated from the positions received from the server
+        :param float x: X coordinate of the projectile's location
+        :param float y: Y coordinate of the projectile's location
+        :return: None
         """
-        return self._x, self._y
+        self._x, self._y = x, y
+        self.rect.center = (self._x, self._y)
 
     def die(self):
         """
@@ -92,16 +120,28 @@ class Projectile(pygame.sprite.Sprite):
 
     @property
     def x(self):
+        if self._engine is not None:
+            return self._engine.position(self._slot)[0]
         return self._x
 
     @property
     def y(self):
+        if self._engine is not None:
+            return self._engine.position(self._slot)[1]
         return self._y
 
     @property
     def angle(self):
         return self._angle
 
+    @property
+    def owner(self):
+        return self._owner
+
+    @property
+    def server_slot(self):
+        return self._server_slot
+
     @property
     def explosion(self):
         return self._explosion
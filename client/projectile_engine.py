@@ -0,0 +1,152 @@
+import numpy as np
+from math import sin, cos, pi
+
+import constants
+
+
+class ProjectileEngine:
+    """
+    Simulates all projectiles shot by this client at once. Their state is kept in NumPy arrays (struct of arrays) and
+    advanced, expired and bounds-checked with one vectorized step per frame. Projectile sprites only display it.
+    Attributes:
+        _game: Game object
+        _x, _y: Positions of the projectiles
+        _previous_x, _previous_y: Positions of the projectiles before the last step
+        _dx, _dy: Velocities of the projectiles (pixels per second), calculated once when the projectile is shot
+        _angle: Angles of the projectiles
+        _lifetime: Remaining lifetime of the projectiles (seconds)
+        _owner: IDs of the players that own the projectiles
+        _id: IDs of the projectiles
+        _alive: Mask of the slots used by flying projectiles
+        _sprites: Projectile sprites displaying the slots
+    """
+    def __init__(self, game, capacity=constants.max_projectile_count):
+        self._game = game
+        self._x = np.zeros(capacity)
+        self._y = np.zeros(capacity)
+        self._previous_x = np.zeros(capacity)
+        self._previous_y = np.zeros(capacity)
+        self._dx = np.zeros(capacity)
+        self._dy = np.zeros(capacity)
+        self._angle = np.zeros(capacity)
+        self._lifetime = np.zeros(capacity)
+        self._owner = np.zeros(capacity, dtype=np.int32)
+        self._id = np.zeros(capacity, dtype=np.int32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._sprites = [None] * capacity
+
+    def grow(self):
+        """
+        Doubles the number of slots
+        :return: None
+        """
+        capacity = len(self._alive)
+        self._x = np.concatenate([self._x, np.zeros(capacity)])
+        self._y = np.concatenate([self._y, np.zeros(capacity)])
+        self._previous_x = np.concatenate([self._previous_x, np.zeros(capacity)])
+        self._previous_y = np.concatenate([self._previous_y, np.zeros(capacity)])
+        self._dx = np.concatenate([self._dx, np.zeros(capacity)])
+        self._dy = np.concatenate([self._dy, np.zeros(capacity)])
+        self._angle = np.concatenate([self._angle, np.zeros(capacity)])
+        self._lifetime = np.concatenate([self._lifetime, np.zeros(capacity)])
+        self._owner = np.concatenate([self._owner, np.zeros(capacity, dtype=np.int32)])
+        self._id = np.concatenate([self._id, np.zeros(capacity, dtype=np.int32)])
+        self._alive = np.concatenate([self._alive, np.zeros(capacity, dtype=bool)])
+        self._sprites += [None] * capacity
+
+    def spawn(self, projectile, speed, lifetime):
+        """
+        Starts simulating the projectile
+        :param Projectile projectile: Projectile sprite that will display the slot
+        :param float speed: Speed of the projectile (pixels per second)
+        :param float lifetime: Lifetime of the projectile (seconds)
+        :return: Slot the projectile is simulated in
+        :rtype: int
+        """
+        free_slots = np.flatnonzero(~self._alive)
+        if len(free_slots) == 0:
+            self.grow()
+            free_slots = np.flatnonzero(~self._alive)
+        slot = int(free_slots[0])
+
+        self._x[slot] = projectile.x
+        self._y[slot] = projectile.y
+        self._previous_x[slot] = projectile.x
+        self._previous_y[slot] = projectile.y
+        self._dx[slot] = -speed * sin(projectile.angle * (pi / 180))
+        self._dy[slot] = -speed * cos(projectile.angle * (pi / 180))
+        self._angle[slot] = projectile.angle
+        self._lifetime[slot] = lifetime
+        self._owner[slot] = projectile.owner.player_no
+        self._id[slot] = projectile.id
+        self._alive[slot] = True
+        self._sprites[slot] = projectile
+        return slot
+
+    def release(self, slot):
+        """
+        Stops simulating the slot
+        :param int slot: Slot to be released
+        :return: None
+        """
+        self._alive[slot] = False
+        self._sprites[slot] = None
+
+    def step(self, delta_time):
+        """
+        Advances all the projectiles by delta_time. Projectiles that run out of lifetime, leave the screen or are on a
+        tile blocking movement die, the others move and their new positions are queued for the server together
+        :param float delta_time: Time elapsed since the last step
+        :return: None
+        """
+        alive = self._alive
+        if not alive.any():
+            return
+        self._lifetime[alive] -= delta_time
+        expired = alive & (self._lifetime <= 0)
+        outside = alive & ~expired & ((self._x < 0) | (self._y < 0) |
+                                      (self._x > self._game.width) | (self._y > self._game.height))
+        checked = alive & ~expired & ~outside
+        blocked = np.zeros_like(alive)
+        blocked[checked] = self._game.tiles_block_movement(self._x[checked], self._y[checked])
+        moving = checked & ~blocked
+
+        self._previous_x[alive] = self._x[alive]
+        self._previous_y[alive] = self._y[alive]
+        self._x[moving] += self._dx[moving] * delta_time
+        self._y[moving] += self._dy[moving] * delta_time
+
+        for slot in np.flatnonzero(expired | outside | blocked).tolist():
+            projectile = self._sprites[slot]
+            projectile.detach()
+            projectile.die()
+        if moving.any():
+            self._game.send_projectile_updates(self._id[moving], self._x[moving], self._y[moving], self._angle[moving],
+                                               constants.projectile_exists)
+
+    def interpolate_steps(self, fraction):
+        """
+        Displays the projectiles between their positions before and after the last step
+        :param float fraction: Position between the steps, in [0; 1]
+        :return: None
+        """
+        slots = np.flatnonzero(self._alive)
+        if len(slots) == 0:
+            return
+        xs = self._previous_x[slots] + (self._x[slots] - self._previous_x[slots]) * fraction
+        ys = self._previous_y[slots] + (self._y[slots] - self._previous_y[slots]) * fraction
+        for slot, x, y in zip(slots.tolist(), xs.tolist(), ys.tolist()):
+            self._sprites[slot].rect.center = (x, y)
+
+    def position(self, slot):
+        """
+        Returns the position of the projectile in the slot
+        :param int slot: Slot of the projectile
+        :return: (x, y) of the projectile
+        :rtype: (float, float)
+        """
+        return float(self._x[slot]), float(self._y[slot])
+
+    @property
+    def alive_count(self):
+        return int(np.count_nonzero(self._alive))
@@ -0,0 +1,114 @@
+import hashlib
+import os
+
+import numpy as np
+import pygame
+
+import constants
+
+
+class RecolorCache:
+    """
+    Keeps tank textures recolored for every palette in constants.swap_colors. All palette variants of a texture are
+    computed at once, the first time any of them is needed, and can be saved to a directory so later launches only
+    load them
+    Attributes:
+        _variants: Recolored textures by (resource name, swap order)
+        _cache_dir: Directory the recolored textures are saved to and loaded from, None if they are only kept in memory
+    """
+    def __init__(self, cache_dir=constants.recolor_cache_dir):
+        self._variants = {}
+        self._cache_dir = cache_dir
+
+    def recolor(self, resource_name, surface, order):
+        """
+        Returns the texture with its RGB channels swapped to the given order. Alpha is preserved
+        :param str resource_name: Name of the resource the texture comes from
+        :param pygame.Surface surface: Texture of the resource
+        :param List[int] order: New order of channels, one of constants.swap_colors
+        :return: Recolored texture, shared with all other callers - must not be modified
+        :rtype: pygame.Surface
+        """
+        key = (resource_name, tuple(order))
+        variant = self._variants.get(key)
+        if variant is None:
+            self.add_variants(resource_name, surface)
+            variant = self._variants.get(key)
+            if variant is None:  # order not in constants.swap_colors
+                variant = self.create_surface(*self.swap_channels(surface, [order]))[0]
+                self._variants[key] = variant
+        return variant
+
+    def add_variants(self, resource_name, surface):
+        """
+        Computes (or loads from the cache directory) the texture recolored for all orders in constants.swap_colors
+        :param str resource_name: Name of the resource the texture comes from
+        :param pygame.Surface surface: Texture of the resource
+        :return: None
+        """
+        path = self.cache_path(resource_name, surface) if self._cache_dir is not None else None
+        if path is not None and os.path.exists(path):
+            with np.load(path) as data:
+                rgb, alpha = data["rgb"], data["alpha"]
+        else:
+            rgb, alpha = self.swap_channels(surface, constants.swap_colors)
+            if path is not None:
+                os.makedirs(self._cache_dir, exist_ok=True)
+                np.savez(path, rgb=rgb, alpha=alpha)
+        for order, variant in zip(constants.swap_colors, self.create_surface(rgb, alpha)):
+            self._variants[(resource_name, tuple(order))] = variant
+
+    @staticmethod
+    def swap_channels(surface, orders):
+        """
+        Swaps RGB channels of the surface to all the given orders in one pass
+        :param pygame.Surface surface: Surface to swap channels of
+        :param List[List[int]] orders: Orders of channels
+        :return: RGB arrays of shape (len(orders), width, height, 3) and the alpha array of shape (width, height)
+        :rtype: (np.ndarray, np.ndarray)
+        """
+        rgb = pygame.surfarray.pixels3d(surface)
+        swapped = np.moveaxis(rgb[:, :, np.asarray(orders)], 2, 0)  # (width, height, orders, 3) -> (orders, ...)
+        del rgb  # unlocks the surface
+        if surface.get_flags() & pygame.SRCALPHA:
+            alpha = pygame.surfarray.array_alpha(surface)
+        else:
+            alpha = np.full(surface.get_size(), 255, dtype=np.uint8)
+        return swapped, alpha
+
+    @staticmethod
+    def create_surface(rgb, alpha):
+        """
+        Creates surfaces with per pixel alpha from RGB arrays sharing one alpha array
+        :param np.ndarray rgb: RGB arrays of shape (n, width, height, 3)
+        :param np.ndarray alpha: Alpha array of shape (width, height)
+        :return: List of n surfaces
+        :rtype: List[pygame.Surface]
+        """
+        surfaces = []
+        for variant in rgb:
+            surface = pygame.Surface(alpha.shape, pygame.SRCALPHA)
+            pygame.surfarray.blit_array(surface, variant)
+            surface_alpha = pygame.surfarray.pixels_alpha(surface)
+            surface_alpha[:] = alpha
+            del surface_alpha  # unlocks the surface
+            surfaces.append(surface)
+        return surfaces
+
+    def cache_path(self, resource_name, surface):
+        """
+        Returns the path of the file the recolored variants of the texture are saved in. It depends on the texture's
+        pixels and on constants.swap_colors, so changed textures or palettes are never loaded from stale files
+        :param str resource_name: Name of the resource the texture comes from
+        :param pygame.Surface surface: Texture of the resource
+        :return: Path of the file
+        :rtype: str
+        """
+        digest = hashlib.sha1(resource_name.encode())
+        digest.update(repr(constants.swap_colors).encode())
+        digest.update(repr(surface.get_size()).encode())
+        digest.update(pygame.image.tobytes(surface, "RGBA"))
+        return os.path.join(self._cache_dir, digest.hexdigest() + ".npz")
+
+    def clear(self):
+        self._variants.clear()
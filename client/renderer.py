@@ -0,0 +1,89 @@
+import pygame
+
+import constants
+
+# Layers of the sprites, drawn from the lowest
+TANKS_LAYER = 0
+TURRETS_LAYER = 1
+PROJECTILES_LAYER = 2
+EXPLOSIONS_LAYER = 3
+HP_BARS_LAYER = 4
+OVERLAY_LAYER = 5
+
+
+class Renderer:
+    """
+    Draws all the sprites of the game from a single layered group. Only the parts of the display that changed since the
+    last frame are updated, unless they cover a large part of it - then the whole display is flipped at once
+    Attributes:
+        _screen: Screen the sprites are drawn on
+        _background: Surface the sprites are cleared with
+        _sprites: All the sprites, in layers
+        _full_update_threshold: Fraction of the screen area above which the whole display is updated
+        _dirty_rects: Parts of the screen changed since the display was last updated
+        _full_update: If the whole display should be updated next time
+    """
+    def __init__(self, screen, background, full_update_threshold=constants.dirty_rect_full_update_threshold):
+        self._screen = screen
+        self._background = background
+        self._sprites = pygame.sprite.LayeredUpdates()
+        self._full_update_threshold = full_update_threshold
+        self._dirty_rects = []
+        self._full_update = True
+
+    def add(self, sprite, layer):
+        """
+        Adds the sprite to the given layer
+        :param pygame.sprite.Sprite sprite: Sprite to be drawn
+        :param int layer: Layer of the sprite (one of the *_LAYER constants)
+        :return: None
+        """
+        self._sprites.add(sprite, layer=layer)
+
+    def sprites_in(self, layer):
+        """
+        Returns the sprites in the given layer
+        :param int layer: Layer of the sprites (one of the *_LAYER constants)
+        :return: List of the sprites
+        :rtype: List[pygame.sprite.Sprite]
+        """
+        return self._sprites.get_sprites_from_layer(layer)
+
+    def add_dirty_rects(self, rects):
+        """
+        Marks parts of the screen as changed by something else than the sprites (e.g. the background)
+        :param List[pygame.Rect] rects: Changed parts of the screen
+        :return: None
+        """
+        self._dirty_rects.extend(rects)
+
+    def request_full_update(self):
+        self._full_update = True
+
+    def clear(self):
+        """
+        Erases the sprites from their previous positions
+        :return: None
+        """
+        self._sprites.clear(self._screen, self._background)
+
+    def draw(self):
+        """
+        Draws the sprites at their current positions. clear() should be called first
+        :return: None
+        """
+        self._dirty_rects.extend(self._sprites.draw(self._screen))
+
+    def update_display(self):
+        """
+        Updates the changed parts of the display, or the whole display if they are too large
+        :return: None
+        """
+        screen_area = self._screen.get_width() * self._screen.get_height()
+        dirty_area = sum(rect.width * rect.height for rect in self._dirty_rects)
+        if self._full_update or dirty_area > screen_area * self._full_update_threshold:
+            pygame.display.flip()
+        elif self._dirty_rects:
+            pygame.display.update(self._dirty_rects)
+        self._dirty_rects = []
+        self._full_update = False
@@ -0,0 +1,95 @@
+from collections import OrderedDict
+
+import pygame
+
+import constants
+
+
+class RotationCache:
+    """
+    Keeps images rotated by pygame.transform.rotozoom, so rotating the same image by the same angle again is a
+    dictionary lookup. Angles are rounded to a multiple of the resolution, so the number of different images is bounded
+    Attributes:
+        _resolution: Angle step (in degrees) the angles are rounded to
+        _max_bytes: Size of the rotated images (in bytes) above which the least recently used ones are dropped
+        _images: Rotated images by (source surface, angle step index), ordered from the least recently used
+        _bytes: Size of the cached images (in bytes)
+        _hits, _misses, _evictions: Usage statistics
+    """
+    def __init__(self, resolution=constants.rotation_cache_resolution, max_bytes=constants.rotation_cache_max_bytes):
+        self._resolution = resolution
+        self._steps = max(1, round(360 / resolution))
+        self._max_bytes = max_bytes
+        self._images = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def quantize(self, angle):
+        """
+        Rounds the angle to the nearest angle step
+        :param float angle: Angle in degrees
+        :return: Index of the angle step, in [0; 360 / resolution)
+        :rtype: int
+        """
+        return round(angle / self._resolution) % self._steps
+
+    def rotate(self, surface, angle):
+        """
+        Returns the surface rotated by the angle rounded to the resolution
+        :param pygame.Surface surface: Source image, never modified
+        :param float angle: Angle in degrees (counterclockwise, like pygame.transform.rotozoom)
+        :return: Rotated image, shared with all other callers - must not be modified
+        :rtype: pygame.Surface
+        """
+        key = (surface, self.quantize(angle))
+        image = self._images.get(key)
+        if image is not None:
+            self._hits += 1
+            self._images.move_to_end(key)
+            return image
+        self._misses += 1
+        image = pygame.transform.rotozoom(surface, key[1] * self._resolution, 1)
+        self._images[key] = image
+        self._bytes += self.image_size(image)
+        while self._bytes > self._max_bytes and len(self._images) > 1:
+            _, evicted = self._images.popitem(last=False)
+            self._bytes -= self.image_size(evicted)
+            self._evictions += 1
+        return image
+
+    def prewarm(self, surface):
+        """
+        Rotates the surface by all the angle steps in advance
+        :param pygame.Surface surface: Source image
+        :return: None
+        """
+        for step in range(self._steps):
+            self.rotate(surface, step * self._resolution)
+
+    @staticmethod
+    def image_size(image):
+        return image.get_pitch() * image.get_height()
+
+    def clear(self):
+        self._images.clear()
+        self._bytes = 0
+
+    def stats(self):
+        """
+        Returns usage statistics of the cache
+        :return: Dictionary with numbers of hits, misses, evictions, cached images and their size in bytes
+        :rtype: dict
+        """
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "images": len(self._images),
+            "bytes": self._bytes,
+        }
+
+
+# Cache shared by all tanks, turrets, projectiles and explosions
+rotation_cache = RotationCache()
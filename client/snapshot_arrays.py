@@ -0,0 +1,174 @@
+import numpy as np
+
+import constants
+
+
+class SnapshotArrays:
+    """
+    Keeps the last timestamped states of many remote entities in NumPy arrays (one slot per entity), so the states of a
+    whole received batch are added at once and all the entities are interpolated with one vectorized step per frame.
+    Every slot has room for twice the buffer size snapshots, so the older half is dropped only once in size additions
+    Attributes:
+        _times: Times of the snapshots of every slot, ordered. Unused snapshots are infinite
+        _values: Values of the snapshots of every slot
+        _count: Number of snapshots in every slot, 0 for unused slots
+        _first: Oldest snapshot of every slot that can still be needed - older ones were interpolated past
+        _newest_time: Time of the newest snapshot of every slot
+        _used: Mask of the slots used by entities
+        _entities: Entities the slots belong to
+        _size: Number of snapshots kept when a slot is full
+        _angle_indexes: Indexes of the values that are angles in degrees (interpolated the shorter way round)
+        _max_extrapolation: Longest time (in seconds) the state is extrapolated past the newest snapshot
+    """
+    def __init__(self, value_count, angle_indexes=(), size=constants.interpolation_buffer_size,
+                 max_extrapolation=constants.interpolation_max_extrapolation_sec, capacity=constants.max_projectile_count):
+        self._times = np.full((capacity, 2 * size), np.inf)
+        self._values = np.zeros((capacity, 2 * size, value_count))
+        self._count = np.zeros(capacity, dtype=np.intp)
+        self._first = np.zeros(capacity, dtype=np.intp)
+        self._newest_time = np.full(capacity, -np.inf)
+        self._used = np.zeros(capacity, dtype=bool)
+        self._entities = [None] * capacity
+        self._size = size
+        self._angle_indexes = list(angle_indexes)
+        self._max_extrapolation = max_extrapolation
+
+    def grow(self):
+        """
+        Doubles the number of slots
+        :return: None
+        """
+        capacity, width, value_count = self._values.shape
+        self._times = np.concatenate([self._times, np.full((capacity, width), np.inf)])
+        self._values = np.concatenate([self._values, np.zeros((capacity, width, value_count))])
+        self._count = np.concatenate([self._count, np.zeros(capacity, dtype=np.intp)])
+        self._first = np.concatenate([self._first, np.zeros(capacity, dtype=np.intp)])
+        self._newest_time = np.concatenate([self._newest_time, np.full(capacity, -np.inf)])
+        self._used = np.concatenate([self._used, np.zeros(capacity, dtype=bool)])
+        self._entities += [None] * capacity
+
+    def allocate(self, entity):
+        """
+        Reserves an empty slot for the states of the entity
+        :param entity: Entity the states belong to (returned by sample())
+        :return: Slot of the entity
+        :rtype: int
+        """
+        free_slots = np.flatnonzero(~self._used)
+        if len(free_slots) == 0:
+            self.grow()
+            free_slots = np.flatnonzero(~self._used)
+        slot = int(free_slots[0])
+
+        self._times[slot] = np.inf
+        self._count[slot] = 0
+        self._first[slot] = 0
+        self._newest_time[slot] = -np.inf
+        self._used[slot] = True
+        self._entities[slot] = entity
+        return slot
+
+    def release(self, slot):
+        """
+        Frees the slot
+        :param int slot: Slot to be released
+        :return: None
+        """
+        self._count[slot] = 0
+        self._used[slot] = False
+        self._entities[slot] = None
+
+    def drop_oldest(self, slots):
+        """
+        Keeps only the newest size snapshots of the full slots
+        :param np.ndarray slots: Full slots
+        :return: None
+        """
+        self._times[slots, :self._size] = self._times[slots, self._size:]
+        self._times[slots, self._size:] = np.inf
+        self._values[slots, :self._size] = self._values[slots, self._size:]
+        self._count[slots] = self._size
+        self._first[slots] = np.maximum(self._first[slots] - self._size, 0)
+
+    def add(self, slots, snapshot_time, values):
+        """
+        Adds new states of the entities in the slots, all received at the same time. States older than the newest one
+        of their slot are ignored, a state with the same time replaces it. If a slot is given more than once, its last
+        state is used
+        :param np.ndarray slots: Slots of the entities
+        :param float snapshot_time: Time the states were received at
+        :param np.ndarray values: Values describing the states, one row per slot
+        :return: None
+        """
+        newest_times = self._newest_time[slots]
+        if (newest_times >= snapshot_time).any():
+            kept = newest_times <= snapshot_time
+            slots, values = slots[kept], values[kept]
+            replaced = newest_times[kept] == snapshot_time
+            self._count[slots[replaced]] -= 1  # the replaced state is overwritten by the new one
+        count = self._count[slots]
+        if (count == self._times.shape[1]).any():
+            self.drop_oldest(slots[count == self._times.shape[1]])
+            count = self._count[slots]
+
+        self._times[slots, count] = snapshot_time
+        self._values[slots, count] = values
+        self._count[slots] = count + 1
+        self._newest_time[slots] = snapshot_time
+
+    def add_single(self, slot, snapshot_time, values):
+        """
+        Adds a new state of the entity in the slot. A state older than the newest one is ignored, a state with the same
+        time replaces it
+        :param int slot: Slot of the entity
+        :param float snapshot_time: Time the state was received at
+        :param tuple values: Values describing the state
+        :return: None
+        """
+        count = int(self._count[slot])
+        newest_time = float(self._newest_time[slot])
+        if snapshot_time <= newest_time:
+            if snapshot_time == newest_time:
+                self._values[slot, count - 1] = values
+            return
+        if count == self._times.shape[1]:
+            self.drop_oldest([slot])
+            count = self._size
+        self._times[slot, count] = snapshot_time
+        self._values[slot, count] = values
+        self._count[slot] = count + 1
+        self._newest_time[slot] = snapshot_time
+
+    def sample(self, render_time):
+        """
+        Returns the states of all the entities with at least one snapshot at the given time. Interpolates between the
+        two surrounding snapshots and extrapolates past the newest one for at most max_extrapolation seconds
+        :param float render_time: Time the states should be returned for
+        :return: Entities and their states, one row per entity
+        :rtype: (List, np.ndarray)
+        """
+        slots = np.flatnonzero(self._count)
+        if len(slots) == 0:
+            return [], np.empty((0, self._values.shape[2]))
+        times = self._times[slots]
+        count = self._count[slots]
+        # the newest snapshot not after render_time starts the interpolated pair - older ones will never be needed again
+        first = np.clip(np.count_nonzero(times <= render_time, axis=1) - 1, self._first[slots],
+                        np.maximum(count - 2, 0))
+        self._first[slots] = first
+
+        rows = np.arange(len(slots))
+        first_times = times[rows, first]
+        second_times = times[rows, first + 1]
+        first_values = self._values[slots, first]
+        difference = self._values[slots, first + 1] - first_values
+        # a single snapshot is followed by an infinite time, so its fraction is 0
+        fractions = (np.clip(render_time, first_times, second_times + self._max_extrapolation) - first_times) / \
+            (second_times - first_times)
+
+        if self._angle_indexes:
+            difference[:, self._angle_indexes] = (difference[:, self._angle_indexes] + 180) % 360 - 180
+        states = first_values + difference * fractions[:, None]
+        if self._angle_indexes:
+            states[:, self._angle_indexes] %= 360
+        return [self._entities[slot] for slot in slots.tolist()], states
@@ -3,6 +3,8 @@ import pygame
 from math import sin, cos, pi
 from turret import Turret
 from hp_bar import HPBar
+from rotation_cache import rotation_cache
+from prediction import MovementInput
 
 FORWARD = 1
 BACKWARD = 0
@@ -65,6 +67,7 @@ class Tank(pygame.sprite.Sprite):
         self._in_collision = False
         self._collision_cooldown = 0
 
+        self._resource_name = attributes["resource_name"]
         self.image = attributes["texture"]
         self.original_image = attributes["texture"]
         # ^required, because repeatedly rotating the same image decreases its quality and increases size^
@@ -76,6 +79,13 @@ class Tank(pygame.sprite.Sprite):
 
         self.keys = []  # keys pressed by player
 
+        # states received from the server (x, y, angle, turret angle) and the tank's slot in them - only used for other
+        # players' tanks
+        self._server_states = None
+        self._server_slot = None
+        # (x, y, angle) before the last simulation step - only used for this client's tank
+        self._previous_step = (self._x, self._y, self._angle)
+
     # Override
     def kill(self):
         """
@@ -84,8 +94,21 @@ class Tank(pygame.sprite.Sprite):
         """
         self._hp_bar.kill()
         self._turret.kill()
+        if self._server_states is not None:
+            self._server_states.release(self._server_slot)
+            self._server_states = None
+            self._server_slot = None
         super().kill()
 
+    def follow_server(self, server_states):
+        """
+        Displays the tank according to the states received from the server. Only applies to other players' tanks
+        :param SnapshotArrays server_states: States received from the server (x, y, angle, turret angle)
+        :return: None
+        """
+        self._server_slot = server_states.allocate(self)
+        self._server_states = server_states
+
     def keyboard_input(self, keys):
         """
         Receives pressed keys, that will be used to determine user input when updating the tank
@@ -94,20 +117,28 @@ class Tank(pygame.sprite.Sprite):
         """
         self.keys = keys
 
-    def handle_keyboard(self, delta_time):
+    def read_movement_input(self):
         """
-        Controls the tank, based on pressed keys
-        :param float delta_time: Time elapsed since last call of this function
-        :return: If no keys were pressed False else True
-        :rtype: bool
+        Returns the movement keys pressed by the player
+        :return: Pressed movement keys
+        :rtype: MovementInput
         """
-
         if not self.keys:
-            return False
+            return MovementInput(False, False, False, False, False, False)
+        return MovementInput(bool(self.keys[pygame.K_UP]), bool(self.keys[pygame.K_DOWN]),
+                             bool(self.keys[pygame.K_LEFT]), bool(self.keys[pygame.K_RIGHT]),
+                             bool(self.keys[pygame.K_q]), bool(self.keys[pygame.K_e]))
 
+    def handle_movement(self, movement, delta_time):
+        """
+        Controls the tank's velocity, rotation and turret, based on pressed movement keys
+        :param MovementInput movement: Pressed movement keys
+        :param float delta_time: Time the keys were pressed for
+        :return: None
+        """
         # forward/backward movement
         velocity_changed = False
-        if self.keys[pygame.K_UP]:
+        if movement.forward:
             if self._direction == FORWARD or self._velocity.magnitude_squared() == 0:
                 self.accelerate(self._acceleration * delta_time)
             else:
@@ -115,7 +146,7 @@ class Tank(pygame.sprite.Sprite):
                 # if the tank is moving in the opposite direction, treat the input like drag
             velocity_changed = True
 
-        if self.keys[pygame.K_DOWN]:
+        if movement.backward:
             if self._direction == BACKWARD or self._velocity.magnitude_squared() == 0:
                 self.accelerate(-self._deceleration * delta_time)
             else:
@@ -127,16 +158,25 @@ class Tank(pygame.sprite.Sprite):
             self.apply_drag(-self._drag * delta_time)
 
         # turning the tank
-        if self.keys[pygame.K_LEFT]:
+        if movement.left:
             self.rotate(self._turn_rate * delta_time)
-        if self.keys[pygame.K_RIGHT]:
+        if movement.right:
             self.rotate(-self._turn_rate * delta_time)
 
         # controlling the turret
-        if self.keys[pygame.K_q]:
+        if movement.turret_left:
             self.rotate_turret(delta_time)
-        if self.keys[pygame.K_e]:
+        if movement.turret_right:
             self.rotate_turret(-delta_time)
+
+    def handle_action_keys(self):
+        """
+        Shoots and activates the shield, based on pressed keys
+        :return: None
+        """
+        if not self.keys:
+            return
+
         if self.keys[pygame.K_w]:
             self._turret.shoot()
 
@@ -145,8 +185,6 @@ class Tank(pygame.sprite.Sprite):
             if self._shield_current_cooldown <= 0:
                 self.activate_shield()
 
-        return True
-
     def save_my_data(self):
         """
         Returns all the most important variables of the tank
@@ -155,6 +193,64 @@ class Tank(pygame.sprite.Sprite):
         """
         return self._x, self._y, self._angle, self._hp, self._turret.angle
 
+    def simulate(self, movement, delta_time):
+        """
+        Applies movement input and the tank physics for delta_time seconds
+        :param MovementInput movement: Pressed movement keys
+        :param float delta_time: Time to be simulated
+        :return: None
+        """
+        self.handle_movement(movement, delta_time)
+
+        if self._velocity.magnitude_squared() != 0:
+            velocity_magnitude = self._velocity.magnitude()
+            angle_vector = pygame.math.Vector2(-sin(self._angle * (pi / 180)),
+                                               -cos(self._angle * (pi / 180)))
+            angle_vector *= velocity_magnitude
+
+            if self._direction == BACKWARD:
+                angle_vector = angle_vector.rotate(180)
+                # if the tank is moving backward, invert the angle vector to make the interpolation work correctly
+                # (so the tank "front" is now on the back, and the velocity and angle vectors are closer together)
+
+            if self._driftiness > 0:
+                speed_fraction = abs(velocity_magnitude) / (self._max_speed * self._max_speed_multiplier)
+                speed_fraction **= 3
+                # difference between slow and fast drifting is more noticeable when speed_fraction is raised to 3 power
+
+                lerp_factor = self._driftiness * speed_fraction
+                if lerp_factor > 1:
+                    lerp_factor = 1
+                lerp_factor = 1 - (lerp_factor ** delta_time)
+
+                self._velocity = self._velocity.lerp(angle_vector, lerp_factor).normalize() * velocity_magnitude
+            else:
+                self._velocity = angle_vector
+
+            dx = self._velocity.x * delta_time
+            dy = self._velocity.y * delta_time
+
+            self._in_collision = False
+            if self.check_x_move(dx):
+                self._x += dx
+            else:
+                self._in_collision = True
+                self._velocity.x = 0
+            if self.check_y_move(dy):
+                self._y += dy
+            else:
+                self._in_collision = True
+                self._velocity.y = 0
+
+            tile_speed = float(self._game.get_tile_attribute_at_screen_position(self._x, self._y, "move_speed"))
+            self._max_speed_multiplier = tile_speed
+
+            if self._in_collision:
+                self._max_speed_multiplier *= constants.object_collision_speed_multiplier
+                if self._collision_cooldown <= 0:
+                    self._collision_cooldown = constants.object_collision_cooldown
+                    self.offset_hp(-constants.object_collision_damage)
+
     def update(self, delta_time):
         """
         Calculates physics for this client's tank and updates rotation and image position for all tanks
@@ -163,8 +259,7 @@ class Tank(pygame.sprite.Sprite):
         """
         # Calculate physics only for this client's tank
         if self._player_no == self._game.my_player_id:
-            x, y, angle, hp, turret_angle = self.save_my_data()
-
+            self._previous_step = (self._x, self._y, self._angle)
             self._collision_cooldown -= delta_time
 
             if self._shield_active:
@@ -172,60 +267,12 @@ class Tank(pygame.sprite.Sprite):
             else:
                 self._shield_current_cooldown -= delta_time
 
-            self.handle_keyboard(delta_time)
-
-            if self._velocity.magnitude_squared() != 0:
-                velocity_magnitude = self._velocity.magnitude()
-                angle_vector = pygame.math.Vector2(-sin(self._angle * (pi / 180)),
-                                                   -cos(self._angle * (pi / 180)))
-                angle_vector *= velocity_magnitude
-
-                if self._direction == BACKWARD:
-                    angle_vector = angle_vector.rotate(180)
-                    # if the tank is moving backward, invert the angle vector to make the interpolation work correctly
-                    # (so the tank "front" is now on the back, and the velocity and angle vectors are closer together)
-
-                if self._driftiness > 0:
-                    speed_fraction = abs(velocity_magnitude) / (self._max_speed * self._max_speed_multiplier)
-                    speed_fraction **= 3
-                    # difference between slow and fast drifting is more noticeable when speed_fraction is raised to 3 power
-
-                    lerp_factor = self._driftiness * speed_fraction
-                    if lerp_factor > 1:
-                        lerp_factor = 1
-                    lerp_factor = 1 - (lerp_factor ** delta_time)
-
-                    self._velocity = self._velocity.lerp(angle_vector, lerp_factor).normalize() * velocity_magnitude
-                else:
-                    self._velocity = angle_vector
-
-                dx = self._velocity.x * delta_time
-                dy = self._velocity.y * delta_time
-
-                self._in_collision = False
-                if self.check_x_move(dx):
-                    self._x += dx
-                else:
-                    self._in_collision = True
-                    self._velocity.x = 0
-                if self.check_y_move(dy):
-                    self._y += dy
-                else:
-                    self._in_collision = True
-                    self._velocity.y = 0
-
-                tile_speed = self._game.get_tile_at_screen_position(self._x, self._y).get_attribute("move_speed")
-                self._max_speed_multiplier = tile_speed
-
-                if self._in_collision:
-                    self._max_speed_multiplier *= constants.object_collision_speed_multiplier
-                    if self._collision_cooldown <= 0:
-                        self._collision_cooldown = constants.object_collision_cooldown
-                        self.offset_hp(-constants.object_collision_damage)
+            movement = self.read_movement_input()
+            self.handle_action_keys()
+            self.simulate(movement, delta_time)
 
             self._game.send_tank_position(self._x, self._y, self._angle, self._hp, self._turret.angle,
                                           self._shield_active)
-            # self._x, self._y, self._angle, self._hp, self._turret.angle = x, y, angle, hp, turret_angle
 
         # If it's not mine tank
         else:
@@ -284,7 +331,7 @@ class Tank(pygame.sprite.Sprite):
         Rotates the image of the tank that does not belong to this client
         :return: None
         """
-        self.image = pygame.transform.rotozoom(self.original_image, self._angle, 1)
+        self.image = rotation_cache.rotate(self.original_image, self._angle)
         self.rect = self.image.get_rect()
 
     def rotate(self, angle):
@@ -296,7 +343,7 @@ class Tank(pygame.sprite.Sprite):
         self._angle += angle
         self._angle %= 360
 
-        self.image = pygame.transform.rotozoom(self.original_image, self._angle, 1)
+        self.image = rotation_cache.rotate(self.original_image, self._angle)
         self.rect = self.image.get_rect()
         # self.rect.center = (self._x, self._y)
 
@@ -363,7 +410,7 @@ class Tank(pygame.sprite.Sprite):
         """
         if self._y + value < 0 or self._y + value > constants.window_height:
             return False
-        if self._game.get_tile_at_screen_position(self._x, self._y + value).get_attribute("blocks_movement"):
+        if self._game.get_tile_attribute_at_screen_position(self._x, self._y + value, "blocks_movement"):
             return False
         return True
 
@@ -377,13 +424,14 @@ class Tank(pygame.sprite.Sprite):
 
         if self._x + value < 0 or self._x + value > constants.window_width:
             return False
-        if self._game.get_tile_at_screen_position(self._x + value, self._y).get_attribute("blocks_movement"):
+        if self._game.get_tile_attribute_at_screen_position(self._x + value, self._y, "blocks_movement"):
             return False
         return True
 
     def update_values_from_server(self, x, y, tank_angle, hp, turret_angle, shield_active):
         """
-        Updates values of the tank according to the information received from the server
+        Updates values of the tank according to the information received from the server.
+        Position and angles are not applied directly, they are interpolated by the game
         :param int x: New X coordinate of the tank's location
         :param int y: New Y coordinate of the tank's location
         :param float tank_angle: New tank angle
@@ -391,11 +439,18 @@ class Tank(pygame.sprite.Sprite):
         :param float turret_angle: New turret angle
         :return: None
         """
-        self._x = x
-        self._y = y
-        self._angle = tank_angle
+        self._server_states.add_single(self._server_slot, self._game.connection.clock(),
+                                       (x, y, tank_angle, turret_angle))
+        self.update_status_from_server(hp, shield_active)
+
+    def update_status_from_server(self, hp, shield_active):
+        """
+        Updates HP and shield of the tank according to the information received from the server
+        :param float hp: New HP
+        :param bool shield_active: Whether the shield is active
+        :return: None
+        """
         self._hp = hp
-        self._turret.update_from_server(turret_angle)
         if self._shield_active != shield_active:
             if self._shield_active:
                 self.shield_deactivate()
@@ -403,6 +458,58 @@ class Tank(pygame.sprite.Sprite):
                 self.activate_shield()
         self._shield_active = shield_active
 
+    def reconcile(self, hp):
+        """
+        Reconciles this client's predicted tank with the state received from the server.
+        The server is authoritative for HP only - both servers echo the position and angles this client has sent, so
+        they never differ from the prediction they came from and there is nothing to correct
+        :param float hp: HP received from the server
+        :return: None
+        """
+        if hp < self._hp:
+            self._hp = hp
+            self._hp_bar.update_hp(self._hp)
+
+    def interpolate_steps(self, fraction):
+        """
+        Displays this client's tank between its state before and after the last simulation step
+        :param float fraction: Position between the states, in [0; 1]
+        :return: None
+        """
+        previous_x, previous_y, previous_angle = self._previous_step
+        x = previous_x + (self._x - previous_x) * fraction
+        y = previous_y + (self._y - previous_y) * fraction
+        angle = previous_angle + ((self._angle - previous_angle + 180) % 360 - 180) * fraction
+
+        self.image = rotation_cache.rotate(self.original_image, angle)
+        self.rect = self.image.get_rect()
+        self.rect.center = (x, y)
+        self._turret.rect.center = self.rect.center
+        if self._shield_active:
+            self._shield.rect.center = self.rect.center
+
+    def display_server_state(self, x, y, tank_angle, turret_angle):
+        """
+        Moves the tank to the state interpolated from the states received from the server
+        :param float x: X coordinate of the tank's location
+        :param float y: Y coordinate of the tank's location
+        :param float tank_angle: Angle of the tank
+        :param float turret_angle: Angle of the tank's turret
+        :return: None
+        """
+        self._x, self._y, self._angle = x, y, tank_angle
+        self._turret.update_from_server(turret_angle)
+        self.rotate_not_mine()
+        self.rect.center = (self._x, self._y)
+        self._turret.update(0)
+        self._hp_bar.update()
+        if self._shield_active:
+            self._shield.rect.center = self.rect.center
+
+    @property
+    def resource_name(self):
+        return self._resource_name
+
     @property
     def turret(self):
         return self._turret
@@ -411,6 +518,10 @@ class Tank(pygame.sprite.Sprite):
     def player_no(self):
         return self._player_no
 
+    @property
+    def server_slot(self):
+        return self._server_slot
+
     @property
     def hp_bar(self):
         return self._hp_bar
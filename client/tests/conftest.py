@@ -0,0 +1,51 @@
+import os
+import socket
+import sys
+import threading
+
+import pygame
+import pytest
+
+# The client's modules import each other by their top-level names (e.g. "import constants"), like when it is run
+# from the client directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from Networking.payload_configuration import PayloadConfiguration
+
+
+@pytest.fixture
+def display():
+    """
+    Opens a (dummy) display, needed to convert images
+    """
+    pygame.display.init()
+    yield pygame.display.set_mode((1, 1))
+    pygame.display.quit()
+
+
+@pytest.fixture
+def server():
+    """
+    Local server accepting one client. It sends the configuration, then waits for the test to set ready, sends
+    everything the test has put into the outbox and closes the connection
+    :return: Port, outbox (list of bytes) and ready (threading.Event)
+    """
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    outbox = []
+    ready = threading.Event()
+
+    def serve():
+        client, _ = listener.accept()
+        client.sendall(bytes(PayloadConfiguration(800, 600, 50, 1, 1, 0, 0, 0)))
+        ready.wait(5)
+        client.sendall(b"".join(outbox))
+        client.close()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield listener.getsockname()[1], outbox, ready
+    thread.join(5)
+    listener.close()
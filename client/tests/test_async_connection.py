@@ -0,0 +1,42 @@
+import numpy as np
+
+import constants
+from Networking.async_connection import AsyncConnection
+from Networking.payload_information import payload_information_dtype
+from test_connection import FakeGame, frame, receive_until_lost
+
+
+def test_death_then_closed_connection(server):
+    port, outbox, ready = server
+    game = FakeGame()
+    connection = AsyncConnection(game, "127.0.0.1", port)
+    assert connection.establish_connection()
+    assert connection.receive_configuration()[4] == 1
+
+    outbox.append(frame(1) + frame(1, constants.information_death))
+    ready.set()
+    received = receive_until_lost(connection)
+    assert connection.connection_lost
+    assert [row[0] for row in received] == [b"u", b"i"]
+    assert game.calls == []
+
+    connection.process_received_information_array(np.array(received, dtype=payload_information_dtype))
+    assert game.calls == [("update_tanks", [1], [10.0]), ("death",)]
+    connection.close_connection()
+    assert game.calls == [("update_tanks", [1], [10.0]), ("death",)]
+
+
+def test_flush_after_the_connection_closed_does_not_raise(server):
+    port, outbox, ready = server
+    game = FakeGame()
+    connection = AsyncConnection(game, "127.0.0.1", port)
+    assert connection.establish_connection()
+    connection.receive_configuration()
+    ready.set()
+    receive_until_lost(connection)
+
+    connection.send_single_information(constants.information_update, constants.information_tank, 1, 10.0, 20.0, 90.0,
+                                       100.0, 45.0, 1, False)
+    assert not connection.flush_information()
+    connection.close_connection()
+    assert game.calls == []
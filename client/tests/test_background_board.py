@@ -0,0 +1,93 @@
+import glob
+import json
+import os
+
+import numpy as np
+import pygame
+import pytest
+
+from Boards.background_board import BackgroundBoard
+from tile import Tile
+
+maps_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps")
+scale = 8
+
+
+class FakeGame:
+    """
+    Loads every tile resource once, like the asset pipeline
+    """
+    def __init__(self):
+        self.resources = {}
+
+    def load_resource(self, filename):
+        return self.resources.setdefault(filename, {
+            "resource_name": filename,
+            "texture": pygame.Surface((scale, scale)),
+            "blocks_movement": filename.startswith("block"),
+            "move_speed": 0.5,
+        })
+
+
+def create_board(width, height):
+    return BackgroundBoard(FakeGame(), width * scale, height * scale, scale)
+
+
+def test_serialize_deserialize_round_trip(display):
+    board_data = {"width": 3, "height": 2, "tiles": {" ": "grass.json", "!": "block.json", "\"": "water.json"},
+                  "tiles_string": " !\"\"! "}
+    board = create_board(3, 2)
+    board.deserialize(board_data)
+    assert board.serialize() == board_data
+
+    other_board = create_board(3, 2)
+    other_board.deserialize(board.serialize())
+    assert other_board.serialize() == board_data
+
+
+@pytest.mark.parametrize("json_filename", sorted(glob.glob(os.path.join(maps_dir, "*.json"))))
+def test_maps_are_serialized_to_the_same_tiles(display, json_filename):
+    with open(json_filename, "r") as file:
+        board_data = json.load(file)["map_data"]
+    board = create_board(board_data["width"], board_data["height"])
+    board.deserialize(board_data)
+    serialized = board.serialize()
+
+    # characters may be assigned differently, the tile at every position must be the same
+    assert serialized["width"] == board_data["width"]
+    assert serialized["height"] == board_data["height"]
+    assert [serialized["tiles"][char] for char in serialized["tiles_string"]] == \
+        [board_data["tiles"][char] for char in board_data["tiles_string"]]
+
+    other_board = create_board(board_data["width"], board_data["height"])
+    other_board.deserialize(serialized)
+    assert other_board.serialize() == serialized
+
+
+def test_tiles_and_attributes_follow_the_indices(display):
+    board = create_board(2, 2)
+    board.load_tiles(["grass.json", "block.json"], np.array([[0, 1], [1, 0]]))
+    assert board.get_tile(0, 1).get_attribute("resource_name") == "block.json"
+    assert board.get_tile(1, 1).get_attribute("resource_name") == "grass.json"
+    assert not board.get_attribute_at("blocks_movement", 0, 0)
+    assert board.get_attribute_at("blocks_movement", 0, scale)
+    assert board.get_attributes_at("blocks_movement", np.array([0, scale, 100 * scale]),
+                                   np.array([scale, scale, 100 * scale])).tolist() == [True, False, False]
+    assert board.get_attribute_at("visibility", 0, 0) == 255
+
+
+def test_set_tile_updates_the_board(display):
+    board = create_board(2, 1)
+    game = board._game
+    board.load_tiles(["grass.json"], np.zeros((2, 1), dtype=np.int64))
+    board.set_tile(1, 0, Tile(1, 0, game.load_resource("block.json")))
+    assert board.get_attribute_at("blocks_movement", scale, 0)
+    assert board.serialize() == {"width": 2, "height": 1, "tiles": {" ": "grass.json", "!": "block.json"},
+                                 "tiles_string": " !"}
+
+
+def test_unset_tiles_cannot_be_serialized():
+    board = create_board(2, 2)
+    assert board.get_tile(0, 0) is None
+    with pytest.raises(ValueError):
+        board.serialize()
@@ -0,0 +1,182 @@
+import socket
+import time
+
+import numpy as np
+import pytest
+
+import constants
+from Networking.connection import Connection
+from Networking.payload_information import PayloadInformation, payload_information_dtype
+
+
+class FakeGame:
+    """
+    Records the calls the connection makes, in order
+    """
+    def __init__(self):
+        self.calls = []
+
+    def show_server_full_or_busy_screen(self):
+        self.calls.append(("busy",))
+
+    def update_tanks(self, information_arr):
+        self.calls.append(("update_tanks", information_arr["player_id"].tolist(),
+                           information_arr["x_location"].tolist()))
+
+    def add_projectiles_from_network(self, information_arr):
+        self.calls.append(("add_projectiles", information_arr["turret_angle"].astype(int).tolist()))
+
+    def update_projectiles(self, information_arr):
+        self.calls.append(("update_projectiles", information_arr["turret_angle"].astype(int).tolist(),
+                           information_arr["hp"].astype(int).tolist()))
+
+    def remove_tanks(self, player_ids):
+        self.calls.append(("remove_tanks", player_ids))
+
+    def show_death_screen(self):
+        self.calls.append(("death",))
+
+
+def frame(player_id, action=constants.information_update):
+    return bytes(PayloadInformation(action.encode("utf-8"), constants.information_tank.encode("utf-8"), player_id,
+                                    10.0, 20.0, 90.0, 100.0, 45.0, 1, False))
+
+
+def receive(connection):
+    # the yielded views are only valid until the next iteration
+    return [bytes(frames) for frames in connection.receive_frames()]
+
+
+def receive_until_lost(connection, timeout=5):
+    received = []
+    deadline = time.monotonic() + timeout
+    while not connection.connection_lost and time.monotonic() < deadline:
+        received.extend(connection.receive_all_information_array().tolist())
+        time.sleep(0.01)
+    return received
+
+
+@pytest.fixture
+def connection():
+    connection = Connection(FakeGame())
+    connection._socket, server = socket.socketpair()
+    yield connection, server
+    connection._socket.close()
+    server.close()
+
+
+def test_complete_frames_are_yielded(connection):
+    connection, server = connection
+    server.sendall(frame(1) + frame(2))
+    assert b"".join(receive(connection)) == frame(1) + frame(2)
+
+
+def test_partial_frame_is_completed_by_following_reads(connection):
+    connection, server = connection
+    data = frame(1) + frame(2) + frame(3)
+    split = len(frame(1)) + len(frame(2)) // 2
+
+    server.sendall(data[:split])
+    assert b"".join(receive(connection)) == frame(1)
+    server.sendall(data[split:split + 1])
+    assert receive(connection) == []
+    server.sendall(data[split + 1:])
+    assert b"".join(receive(connection)) == frame(2) + frame(3)
+
+
+def test_nothing_is_yielded_without_data(connection):
+    connection, server = connection
+    assert receive(connection) == []
+    assert not connection.connection_lost
+
+
+def test_closed_connection_is_reported(connection):
+    connection, server = connection
+    server.close()
+    assert receive(connection) == []
+    assert connection.connection_lost
+    assert connection._game.calls == []
+
+
+def test_information_received_before_the_connection_closed_is_processed(connection):
+    connection, server = connection
+    # both servers send the death of a player and close its connection right after
+    server.sendall(frame(1) + frame(1, constants.information_death))
+    server.close()
+
+    received_information_arr = connection.receive_all_information_array()
+    assert len(received_information_arr) == 2
+    assert connection.connection_lost
+    assert connection._game.calls == []
+    connection.process_received_information_array(received_information_arr)
+    assert connection._game.calls == [("update_tanks", [1], [10.0]), ("death",)]
+
+    connection.close_connection()  # does not send anything to the closed connection
+    assert connection._game.calls == [("update_tanks", [1], [10.0]), ("death",)]
+
+
+def test_sending_to_a_closed_connection_is_reported(connection):
+    connection, server = connection
+    server.close()
+    connection.send_single_information(constants.information_update, constants.information_tank, 1, 10.0, 20.0, 90.0,
+                                       100.0, 45.0, 1, False)
+    assert not connection.flush_information()
+    assert connection.connection_lost
+    assert connection._game.calls == []
+    connection.close_connection()
+    assert connection._game.calls == []
+
+
+def information(action, type_of, player_id=1, x_location=0.0, hp=100.0, projectile_id=0):
+    return (action.encode("utf-8"), type_of.encode("utf-8"), player_id, x_location, 0.0, 0.0, hp,
+            float(projectile_id), 0, False)
+
+
+def dispatch(*rows):
+    connection = Connection(FakeGame())
+    connection.process_received_information_array(np.array(list(rows), dtype=payload_information_dtype))
+    return connection._game.calls
+
+
+def test_only_newest_tank_states_are_applied():
+    calls = dispatch(information(constants.information_update, constants.information_tank, 1, x_location=1.0),
+                     information(constants.information_update, constants.information_tank, 2, x_location=2.0),
+                     information(constants.information_update, constants.information_tank, 1, x_location=3.0))
+    assert calls == [("update_tanks", [2, 1], [2.0, 3.0])]
+
+
+def test_information_is_dispatched_in_arrival_order():
+    created = information(constants.information_create, constants.information_projectile, projectile_id=5)
+    deleted = information(constants.information_update, constants.information_projectile, projectile_id=5,
+                          hp=constants.projectile_not_exists)
+    calls = dispatch(created, deleted, created,
+                     information(constants.information_disconnect, constants.information_tank, 2),
+                     information(constants.information_update, constants.information_tank, 1))
+    assert calls == [("add_projectiles", [5]),
+                     ("update_projectiles", [5], [constants.projectile_not_exists]),
+                     ("add_projectiles", [5]),
+                     ("remove_tanks", [2]),
+                     ("update_tanks", [1], [0.0])]
+
+
+def test_tank_states_and_projectile_updates_are_dispatched_together():
+    exists = constants.projectile_exists
+    calls = dispatch(information(constants.information_update, constants.information_projectile, 2, hp=exists,
+                                 projectile_id=40),
+                     information(constants.information_update, constants.information_tank, 2, x_location=1.0),
+                     information(constants.information_update, constants.information_projectile, 3, hp=exists,
+                                 projectile_id=60),
+                     information(constants.information_update, constants.information_tank, 3, x_location=2.0))
+    assert calls == [("update_tanks", [2, 3], [1.0, 2.0]),
+                     ("update_projectiles", [40, 60], [exists, exists])]
+
+
+def test_nothing_after_death_is_processed():
+    calls = dispatch(information(constants.information_update, constants.information_tank, 1),
+                     information(constants.information_death, constants.information_tank, 1),
+                     information(constants.information_update, constants.information_tank, 2))
+    assert calls == [("update_tanks", [1], [0.0]), ("death",)]
+
+
+def test_empty_batch_is_ignored():
+    assert dispatch() == []
@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+import pygame
+
+from entity_registry import EntityRegistry
+from projectile import Projectile
+from projectile_engine import ProjectileEngine
+from turret import Turret
+
+projectile_attributes = {
+    "speed": 100.0,
+    "damage": 10.0,
+    "lifetime": 1.0,
+    "explosion": "explosion.json",
+    "texture": pygame.Surface((4, 4)),
+}
+
+
+def create_owner(player_no):
+    return SimpleNamespace(player_no=player_no, _game=SimpleNamespace(load_resource=lambda filename: {}))
+
+
+def create_projectile(projectile_id, owner, group=None):
+    projectile = Projectile(projectile_id, owner, 50.0, 50.0, 0.0, None, projectile_attributes)
+    if group is not None:
+        group.add(projectile)
+    return projectile
+
+
+def test_projectiles_are_indexed_by_id_and_owner():
+    registry = EntityRegistry()
+    first_owner, second_owner = create_owner(1), create_owner(2)
+    first, second, third = (create_projectile(1, first_owner), create_projectile(2, first_owner),
+                            create_projectile(3, second_owner))
+    for projectile in (first, second, third):
+        registry.add_projectile(projectile)
+
+    assert registry.get_projectile(2) is second
+    assert registry.get_projectile(4) is None
+    assert registry.get_projectiles([3, 4, 1]) == [third, None, first]
+    assert sorted(projectile.id for projectile in registry.remove_projectiles_of(1)) == [1, 2]
+    assert registry.get_projectile(1) is None
+    assert registry.get_projectile(3) is third
+    assert registry.remove_projectiles_of(1) == []
+
+
+def test_removed_projectile_is_returned_once():
+    registry = EntityRegistry()
+    projectile = create_projectile(1, create_owner(1))
+    registry.add_projectile(projectile)
+    assert registry.remove_projectile(1) is projectile
+    assert registry.remove_projectile(1) is None
+    assert registry.remove_projectiles_of(1) == []
+
+
+def test_replaced_projectile_is_killed_and_released():
+    registry = EntityRegistry()
+    engine = ProjectileEngine(game=None, capacity=2)
+    group = pygame.sprite.Group()
+    owner = create_owner(1)
+    replaced = create_projectile(1, owner, group)
+    replaced.attach(engine)
+    registry.add_projectile(replaced)
+
+    projectile = create_projectile(1, owner, group)
+    registry.add_projectile(projectile)
+    assert registry.get_projectile(1) is projectile
+    assert not replaced.alive()
+    assert projectile.alive()
+    assert engine.alive_count == 0
+    assert registry.remove_projectiles_of(1) == [projectile]
+
+
+def test_adding_the_same_projectile_again_keeps_it():
+    registry = EntityRegistry()
+    group = pygame.sprite.Group()
+    projectile = create_projectile(1, create_owner(1), group)
+    registry.add_projectile(projectile)
+    registry.add_projectile(projectile)
+    assert registry.get_projectile(1) is projectile
+    assert projectile.alive()
+
+
+def test_turret_ignores_deleting_unknown_projectile():
+    registry = EntityRegistry()
+    turret = SimpleNamespace(_game=SimpleNamespace(entities=registry))
+    Turret.delete_projectile(turret, 1)
+
+    group = pygame.sprite.Group()
+    registry.add_projectile(create_projectile(1, create_owner(1), group))
+    Turret.delete_projectile(turret, 1)
+    assert registry.get_projectile(1) is None
+    assert len(group) == 0
@@ -0,0 +1,150 @@
+import glob
+import json
+import os
+
+import numpy as np
+import pytest
+
+from Boards import map_file
+from Boards.map_file import (save_binary_map, load_binary_map, tiles_from_board_data, convert_json_map,
+                             map_file_to_load, load_source_stamp, source_stamp, map_file_extension)
+
+maps_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps")
+
+
+def test_binary_map_round_trip(tmp_path):
+    filename = str(tmp_path / ("map" + map_file_extension))
+    palette = ["./resources/grass.json", "./resources/water.json", "./resources/house.json"]
+    tile_indices = np.arange(4 * 3).reshape(4, 3) % len(palette)
+    spawn_points = [[1, 2, 90.0], [3.5, 0, 180.0]]
+
+    save_binary_map(filename, palette, tile_indices, spawn_points)
+    loaded_palette, loaded_indices, loaded_spawn_points = load_binary_map(filename)
+    assert loaded_palette == palette
+    assert loaded_indices.shape == (4, 3)
+    assert (loaded_indices == tile_indices).all()
+    assert loaded_spawn_points == spawn_points
+
+
+def test_large_palettes_use_two_byte_indices(tmp_path):
+    filename = str(tmp_path / ("map" + map_file_extension))
+    palette = [f"./resources/tile_{i}.json" for i in range(300)]
+    tile_indices = np.arange(20 * 15).reshape(20, 15)
+
+    save_binary_map(filename, palette, tile_indices, [])
+    loaded_palette, loaded_indices, loaded_spawn_points = load_binary_map(filename)
+    assert loaded_palette == palette
+    assert (loaded_indices == tile_indices).all()
+    assert loaded_spawn_points == []
+
+
+def test_other_files_are_rejected(tmp_path):
+    filename = str(tmp_path / ("map" + map_file_extension))
+    with open(filename, "wb") as file:
+        file.write(b"{}" * 16)
+    with pytest.raises(ValueError):
+        load_binary_map(filename)
+
+
+@pytest.mark.parametrize("json_filename", sorted(glob.glob(os.path.join(maps_dir, "*.json"))))
+def test_converted_maps_match_the_json_maps(tmp_path, json_filename):
+    binary_filename = convert_json_map(json_filename, str(tmp_path / ("map" + map_file_extension)))
+    with open(json_filename, "r") as file:
+        save_data = json.load(file)
+    palette, tile_indices = tiles_from_board_data(save_data["map_data"])
+
+    loaded_palette, loaded_indices, loaded_spawn_points = load_binary_map(binary_filename)
+    assert loaded_palette == palette
+    assert (loaded_indices == tile_indices).all()
+    assert loaded_spawn_points == save_data["spawn_points"]
+
+
+def test_tiles_from_board_data():
+    board_data = {"width": 3, "height": 2, "tiles": {" ": "a.json", "!": "b.json"}, "tiles_string": " ! !! "}
+    palette, tile_indices = tiles_from_board_data(board_data)
+    assert palette == ["a.json", "b.json"]
+    assert tile_indices.tolist() == [[0, 1], [1, 1], [0, 0]]
+
+
+def test_tiles_string_must_match_the_board():
+    with pytest.raises(ValueError):
+        tiles_from_board_data({"width": 2, "height": 2, "tiles": {" ": "a.json"}, "tiles_string": "   "})
+    with pytest.raises(ValueError):
+        tiles_from_board_data({"width": 2, "height": 1, "tiles": {" ": "a.json"}, "tiles_string": " !"})
+
+
+def copy_city_map(tmp_path):
+    json_filename = str(tmp_path / "map.json")
+    with open(os.path.join(maps_dir, "city.json"), "r") as source, open(json_filename, "w") as file:
+        file.write(source.read())
+    return json_filename, str(tmp_path / ("map" + map_file_extension))
+
+
+def test_binary_map_matching_the_json_map_is_loaded_whatever_the_file_times(tmp_path):
+    json_filename, binary_filename = copy_city_map(tmp_path)
+    convert_json_map(json_filename)
+    os.utime(json_filename, (3000, 3000))
+    os.utime(binary_filename, (1000, 1000))
+    assert map_file_to_load(binary_filename) == binary_filename
+    assert os.path.getmtime(binary_filename) == 1000  # not converted again
+    assert map_file_to_load(json_filename) == json_filename
+
+
+def test_binary_map_is_converted_again_when_the_json_map_changes(tmp_path):
+    json_filename, binary_filename = copy_city_map(tmp_path)
+    assert map_file_to_load(binary_filename) == binary_filename  # missing binary map is created
+    assert load_source_stamp(binary_filename) == source_stamp(json_filename)
+
+    with open(json_filename, "r") as file:
+        save_data = json.load(file)
+    save_data["spawn_points"] = [[1, 1, 90.0]]
+    with open(json_filename, "w") as file:
+        json.dump(save_data, file)
+    os.utime(json_filename, (1000, 1000))
+    os.utime(binary_filename, (3000, 3000))
+    assert map_file_to_load(binary_filename) == binary_filename
+    assert load_binary_map(binary_filename)[2] == [[1, 1, 90.0]]
+
+
+def test_json_map_is_loaded_if_the_binary_map_cannot_be_written(tmp_path, monkeypatch):
+    json_filename, binary_filename = copy_city_map(tmp_path)
+
+    def save_read_only(*args):
+        raise PermissionError("read-only installation")
+    monkeypatch.setattr(map_file, "save_binary_map", save_read_only)
+    assert map_file_to_load(binary_filename) == json_filename
+
+
+def test_shipped_binary_maps_match_their_json_maps():
+    for json_filename in glob.glob(os.path.join(maps_dir, "*.json")):
+        binary_filename = os.path.splitext(json_filename)[0] + map_file_extension
+        assert load_source_stamp(binary_filename) == source_stamp(json_filename)
+
+
+def test_binary_map_without_json_map_is_loaded(tmp_path):
+    binary_filename = str(tmp_path / ("map" + map_file_extension))
+    save_binary_map(binary_filename, ["a.json"], np.zeros((2, 2), dtype=np.int64), [])
+    assert map_file_to_load(binary_filename) == binary_filename
+
+
+def test_map_editor_saves_binary_map_next_to_json_map(tmp_path, display):
+    import pygame
+    from Boards.background_board import BackgroundBoard
+    from map_editor import MapEditor
+
+    resources = {}
+    editor = MapEditor()
+    editor.load_resource = lambda filename: resources.setdefault(
+        filename, {"resource_name": filename, "texture": pygame.Surface((8, 8))})
+    editor._background_board = BackgroundBoard(editor, 4 * 8, 3 * 8, 8)
+    palette = ["a.json", "b.json"]
+    tile_indices = np.array([[0, 1, 0], [1, 1, 0], [0, 0, 0], [1, 0, 1]])
+    editor._background_board.load_tiles(palette, tile_indices)
+    editor._spawn_points = [[1, 1, 0.0], [2, 1, 180.0]]
+
+    editor.save(str(tmp_path / "save.json"))
+    saved_palette, saved_indices, saved_spawn_points = load_binary_map(str(tmp_path / ("save" + map_file_extension)))
+    assert saved_palette == palette
+    assert (saved_indices == tile_indices).all()
+    assert saved_spawn_points == editor._spawn_points
+    assert load_source_stamp(str(tmp_path / ("save" + map_file_extension))) == source_stamp(str(tmp_path / "save.json"))
@@ -0,0 +1,85 @@
+import numpy as np
+
+from Networking.outbound_batch import OutboundBatch
+from Networking.payload_information import PayloadInformation, payload_information_dtype
+
+messages = [
+    (b"u", b"t", 1, 10.0, 20.0, 90.0, 100.0, 45.0, 1, False),
+    (b"c", b"p", 2, -1.5, 0.25, 180.0, 1.0, 7.0, 0, False),
+    (b"u", b"t", 3, 0.0, 0.0, 359.5, 0.0, 0.0, 2, True),
+]
+
+
+def test_flush_sends_the_same_bytes_as_structures():
+    batch = OutboundBatch(4)
+    for message in messages:
+        assert batch.add(*message)
+    sent = []
+    batch.flush(lambda data: sent.append(bytes(data)))
+    assert sent == [b"".join(bytes(PayloadInformation(*message)) for message in messages)]
+
+
+def test_full_batch_rejects_messages_until_flushed():
+    batch = OutboundBatch(2)
+    assert batch.add(*messages[0])
+    assert batch.add(*messages[1])
+    assert batch.is_full()
+    assert not batch.add(*messages[2])
+
+    sent = []
+    batch.flush(sent.append)
+    assert batch.pending_messages == 0
+    assert batch.add(*messages[2])
+
+
+def information_array(rows):
+    information_arr = np.zeros(len(rows), dtype=payload_information_dtype)  # zeroes the padding too
+    information_arr[:] = rows
+    return information_arr
+
+
+def test_array_rows_are_added_while_they_fit():
+    batch = OutboundBatch(2)
+    assert batch.add_array(information_array(messages)) == 2
+    assert batch.add_array(information_array(messages[2:])) == 0
+    sent = []
+    batch.flush(lambda data: sent.append(bytes(data)))
+    assert sent == [b"".join(bytes(PayloadInformation(*message)) for message in messages[:2])]
+
+
+def test_empty_batch_is_not_sent():
+    batch = OutboundBatch(2)
+    sent = []
+    batch.flush(sent.append)
+    assert sent == []
+    assert batch.stats()["flush_count"] == 0
+
+
+def test_stats():
+    batch = OutboundBatch(4)
+    for message in messages:
+        batch.add(*message)
+    batch.flush(lambda data: None)
+    batch.add(*messages[0])
+    batch.flush(lambda data: None)
+    assert batch.stats() == {
+        "flush_count": 2,
+        "messages_flushed": 4,
+        "bytes_flushed": 4 * 36,
+        "largest_batch": 3,
+        "average_batch": 2.0,
+    }
+
+
+def test_buffer_is_emptied_when_sending_fails():
+    batch = OutboundBatch(2)
+    batch.add(*messages[0])
+
+    def send(data):
+        raise ConnectionResetError()
+
+    try:
+        batch.flush(send)
+    except ConnectionResetError:
+        pass
+    assert batch.pending_messages == 0
@@ -0,0 +1,28 @@
+from ctypes import sizeof
+
+import numpy as np
+
+from Networking.payload_information import PayloadInformation, payload_information_dtype
+
+
+def test_dtype_matches_structure_layout():
+    assert sizeof(PayloadInformation) == 36
+    assert payload_information_dtype.itemsize == sizeof(PayloadInformation)
+    assert payload_information_dtype.names == tuple(name for name, _ in PayloadInformation._fields_)
+    for name, _ in PayloadInformation._fields_:
+        assert payload_information_dtype.fields[name][1] == getattr(PayloadInformation, name).offset
+
+
+def test_dtype_decodes_structures():
+    information = PayloadInformation(b"c", b"p", 3, 1.5, -2.5, 90.0, 1.0, 7.0, 2, True)
+    row = np.frombuffer(bytes(information) * 2, dtype=payload_information_dtype)[1]
+    assert row["action"] == b"c"
+    assert row["type_of"] == b"p"
+    assert row["player_id"] == 3
+    assert row["x_location"] == 1.5
+    assert row["y_location"] == -2.5
+    assert row["tank_angle"] == 90.0
+    assert row["hp"] == 1.0
+    assert row["turret_angle"] == 7.0
+    assert row["tank_version"] == 2
+    assert row["shield_active"]
@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import constants
+from projectile_engine import ProjectileEngine
+
+
+class FakeGame:
+    def __init__(self, blocked=()):
+        self.width = 800
+        self.height = 600
+        self.blocked = blocked  # (x, y) ranges of tiles blocking movement: [(x_min, x_max, y_min, y_max), ...]
+        self.updates = []
+
+    def tiles_block_movement(self, xs, ys):
+        blocks = np.zeros(len(xs), dtype=bool)
+        for x_min, x_max, y_min, y_max in self.blocked:
+            blocks |= (xs >= x_min) & (xs <= x_max) & (ys >= y_min) & (ys <= y_max)
+        return blocks
+
+    def send_projectile_updates(self, projectile_ids, xs, ys, angles, hp):
+        self.updates += [(projectile_id, x, y, angle, hp) for projectile_id, x, y, angle in
+                         zip(projectile_ids.tolist(), xs.tolist(), ys.tolist(), angles.tolist())]
+
+
+class FakeProjectile:
+    def __init__(self, projectile_id, x, y, angle):
+        self.id = projectile_id
+        self.x = x
+        self.y = y
+        self.angle = angle
+        self.owner = SimpleNamespace(player_no=1)
+        self.rect = SimpleNamespace(center=(x, y))
+        self.engine = None
+        self.slot = None
+        self.died = False
+
+    def attach(self, engine, speed=100.0, lifetime=1.0):
+        self.engine = engine
+        self.slot = engine.spawn(self, speed, lifetime)
+        return self
+
+    def detach(self):
+        self.engine.release(self.slot)
+
+    def die(self):
+        self.died = True
+
+
+def test_step_moves_projectiles_and_sends_their_positions():
+    game = FakeGame()
+    engine = ProjectileEngine(game, capacity=4)
+    up = FakeProjectile(1, 100.0, 100.0, 0.0).attach(engine)
+    left = FakeProjectile(2, 100.0, 100.0, 90.0).attach(engine)
+
+    engine.step(0.5)
+    assert engine.position(up.slot) == pytest.approx((100.0, 50.0))
+    assert engine.position(left.slot) == pytest.approx((50.0, 100.0))
+    assert [(update[0], update[4]) for update in game.updates] == [(1, constants.projectile_exists),
+                                                                   (2, constants.projectile_exists)]
+    assert game.updates[0][1:3] == pytest.approx((100.0, 50.0))
+
+
+def test_expired_projectiles_die_and_free_their_slots():
+    engine = ProjectileEngine(FakeGame(), capacity=4)
+    short = FakeProjectile(1, 100.0, 100.0, 0.0).attach(engine, lifetime=0.1)
+    long = FakeProjectile(2, 100.0, 100.0, 0.0).attach(engine, lifetime=1.0)
+
+    engine.step(0.1)
+    assert short.died
+    assert not long.died
+    assert engine.alive_count == 1
+    # the freed slot is reused
+    assert FakeProjectile(3, 0.0, 0.0, 0.0).attach(engine).slot == short.slot
+
+
+def test_projectiles_outside_the_screen_die():
+    engine = ProjectileEngine(FakeGame(), capacity=2)
+    outside = FakeProjectile(1, -1.0, 100.0, 0.0).attach(engine)
+    engine.step(0.01)
+    assert outside.died
+    assert engine.alive_count == 0
+
+
+def test_blocked_projectiles_die_without_moving():
+    game = FakeGame(blocked=[(90.0, 110.0, 90.0, 110.0)])
+    engine = ProjectileEngine(game, capacity=2)
+    blocked = FakeProjectile(1, 100.0, 100.0, 0.0).attach(engine)
+    free = FakeProjectile(2, 300.0, 300.0, 0.0).attach(engine)
+
+    engine.step(0.1)
+    assert blocked.died
+    assert not free.died
+    assert engine.position(blocked.slot) == (100.0, 100.0)
+    assert [update[0] for update in game.updates] == [2]
+
+
+def test_engine_grows_past_its_capacity():
+    engine = ProjectileEngine(FakeGame(), capacity=2)
+    projectiles = [FakeProjectile(i, 100.0, 100.0 + i, 0.0).attach(engine) for i in range(5)]
+    assert len({projectile.slot for projectile in projectiles}) == 5
+    assert engine.alive_count == 5
+    engine.step(0.1)
+    assert [engine.position(projectile.slot) for projectile in projectiles] == \
+        pytest.approx([(100.0, 90.0 + i) for i in range(5)])
+
+
+def test_released_slots_are_not_simulated():
+    game = FakeGame()
+    engine = ProjectileEngine(game, capacity=2)
+    projectile = FakeProjectile(1, 100.0, 100.0, 0.0).attach(engine)
+    engine.release(projectile.slot)
+    engine.step(0.1)
+    assert engine.alive_count == 0
+    assert game.updates == []
+    assert engine.position(projectile.slot) == (100.0, 100.0)
+
+
+def test_interpolate_steps_displays_positions_between_steps():
+    engine = ProjectileEngine(FakeGame(), capacity=2)
+    projectile = FakeProjectile(1, 100.0, 100.0, 0.0).attach(engine)
+    engine.step(0.5)
+    engine.interpolate_steps(0.5)
+    assert projectile.rect.center == pytest.approx((100.0, 75.0))
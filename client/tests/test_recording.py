@@ -0,0 +1,86 @@
+import socket
+
+import numpy as np
+
+import constants
+from Networking.connection import Connection
+from Networking.payload_information import payload_information_dtype
+from Networking.recording import MessageRecorder, RecordingReader
+from Networking.replay_connection import ReplayConnection
+from Networking.threaded_connection import ThreadedConnection
+from test_connection import FakeGame, frame, receive_until_lost
+
+
+def chunk(*frames):
+    return np.frombuffer(b"".join(frames), dtype=payload_information_dtype).copy()
+
+
+def record(filename, chunks):
+    recorder = MessageRecorder(filename, 3, 2)
+    for information_arr in chunks:
+        recorder.record(information_arr)
+    recorder.record(chunk())  # empty batches are not recorded
+    recorder.close()
+
+
+def test_recording_is_played_back_chunk_by_chunk(tmp_path):
+    chunks = [chunk(frame(1)), chunk(frame(2), frame(4, constants.information_disconnect)), chunk(frame(3))]
+    record(tmp_path / "game.rec", chunks)
+
+    reader = RecordingReader(tmp_path / "game.rec")
+    assert (len(reader), reader.player_id, reader.map_number, reader.frame_count) == (3, 3, 2, 4)
+    connection = ReplayConnection(FakeGame(), reader, speed=0)
+    assert connection.establish_connection()
+    assert connection.receive_configuration()[4:] == (3, 0, 0, 2)
+
+    for index, information_arr in enumerate(chunks):
+        assert connection.receive_all_information_array().tolist() == information_arr.tolist()
+        assert connection.clock() == reader.chunk_time(index)  # the recording's time, not the wall clock
+        assert not connection.connection_lost
+    assert len(connection.receive_all_information_array()) == 0
+    assert connection.connection_lost
+    assert connection._game.calls == []  # the game quits on its own when it sees connection_lost
+    connection.close_connection()
+    reader.close()
+
+
+def test_playback_at_real_time_delivers_all_due_chunks(tmp_path):
+    record(tmp_path / "game.rec", [chunk(frame(1)), chunk(frame(2))])
+    reader = RecordingReader(tmp_path / "game.rec")
+    connection = ReplayConnection(FakeGame(), reader, speed=1e9)
+    assert len(connection.receive_all_information_array()) == 2
+    assert connection.clock() >= reader.duration
+    reader.close()
+
+
+def test_received_information_is_recorded(tmp_path):
+    connection = Connection(FakeGame())
+    connection._socket, server = socket.socketpair()
+    connection.player_id = 1
+    connection.record_to(tmp_path / "game.rec")
+    connection.start_recording(1, 0)
+    server.sendall(frame(1) + frame(2))
+    received_information_arr = connection.receive_all_information_array()
+    server.close()
+    connection.close_connection()
+
+    reader = RecordingReader(tmp_path / "game.rec")
+    assert reader.frame_count == 2
+    assert reader.chunk(0).tolist() == received_information_arr.tolist()
+    reader.close()
+
+
+def test_threaded_connection_records_before_merging(server, tmp_path):
+    port, outbox, ready = server
+    connection = ThreadedConnection(FakeGame(), "127.0.0.1", port)
+    connection.record_to(tmp_path / "game.rec")
+    assert connection.establish_connection()
+    assert connection.receive_configuration()[4] == 1
+    outbox.append(frame(1) + frame(1))
+    ready.set()
+
+    assert len(receive_until_lost(connection)) == 1  # the snapshot keeps only the newest state of the tank
+    connection.close_connection()
+    reader = RecordingReader(tmp_path / "game.rec")
+    assert reader.frame_count == 2  # but the recording has both
+    reader.close()
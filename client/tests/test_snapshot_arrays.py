@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from snapshot_arrays import SnapshotArrays
+
+
+def create_arrays(**kwargs):
+    snapshots = SnapshotArrays(3, angle_indexes=(2,), max_extrapolation=0.5, **kwargs)
+    slot = snapshots.allocate("tank")
+    snapshots.add_single(slot, 1.0, (0.0, 10.0, 350.0))
+    snapshots.add_single(slot, 2.0, (10.0, 30.0, 10.0))
+    return snapshots, slot
+
+
+def sample(snapshots, render_time):
+    entities, states = snapshots.sample(render_time)
+    assert entities == ["tank"]
+    return tuple(states[0].tolist())
+
+
+def test_slots_without_snapshots_have_no_state():
+    snapshots = SnapshotArrays(2)
+    snapshots.allocate("projectile")
+    entities, states = snapshots.sample(1.0)
+    assert entities == [] and states.shape == (0, 2)
+
+
+def test_single_snapshot_is_returned_as_it_is():
+    snapshots = SnapshotArrays(2)
+    snapshots.add_single(snapshots.allocate("tank"), 1.0, (1.0, 2.0))
+    assert sample(snapshots, 0.0) == (1.0, 2.0)
+    assert sample(snapshots, 5.0) == (1.0, 2.0)
+
+
+def test_interpolates_between_snapshots():
+    assert sample(create_arrays()[0], 1.25) == pytest.approx((2.5, 15.0, 355.0))
+
+
+def test_angles_are_interpolated_the_shorter_way_round():
+    assert sample(create_arrays()[0], 1.5)[2] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_time_before_the_oldest_snapshot_returns_it():
+    assert sample(create_arrays()[0], 0.5) == (0.0, 10.0, 350.0)
+
+
+def test_extrapolation_is_bounded():
+    snapshots, _ = create_arrays()
+    assert sample(snapshots, 2.25) == pytest.approx((12.5, 35.0, 15.0))
+    assert sample(snapshots, 2.5) == pytest.approx((15.0, 40.0, 20.0))
+    assert sample(snapshots, 10.0) == pytest.approx((15.0, 40.0, 20.0))
+
+
+def test_older_snapshots_are_ignored():
+    snapshots, slot = create_arrays()
+    snapshots.add_single(slot, 1.5, (100.0, 100.0, 100.0))
+    snapshots.add(np.array([slot]), 1.5, np.array([(100.0, 100.0, 100.0)]))
+    assert sample(snapshots, 1.5) == pytest.approx((5.0, 20.0, 0.0), abs=1e-9)
+
+
+def test_snapshot_with_the_same_time_replaces_the_newest_one():
+    snapshots, slot = create_arrays()
+    snapshots.add_single(slot, 2.0, (20.0, 30.0, 10.0))
+    assert sample(snapshots, 2.0) == pytest.approx((20.0, 30.0, 10.0))
+    snapshots.add(np.array([slot]), 2.0, np.array([(30.0, 30.0, 10.0)]))
+    assert sample(snapshots, 2.0) == pytest.approx((30.0, 30.0, 10.0))
+
+
+def test_consumed_snapshots_are_dropped():
+    snapshots, slot = create_arrays()
+    snapshots.add_single(slot, 3.0, (20.0, 50.0, 30.0))
+    assert sample(snapshots, 2.5) == pytest.approx((15.0, 40.0, 20.0))
+    # the snapshot at 1.0 was dropped by the previous sample
+    assert sample(snapshots, 1.5) == (10.0, 30.0, 10.0)
+
+
+def test_full_slot_drops_its_oldest_snapshots():
+    snapshots = SnapshotArrays(1, size=2)  # room for 4 snapshots
+    slot = snapshots.allocate("projectile")
+    for snapshot_time in (1.0, 2.0, 3.0, 4.0):
+        snapshots.add_single(slot, snapshot_time, (snapshot_time,))
+    snapshots.add(np.array([slot]), 5.0, np.array([(5.0,)]))
+    assert snapshots.sample(1.0)[1].tolist() == [[3.0]]
+    assert snapshots.sample(4.5)[1].tolist() == [[4.5]]
+
+
+def test_batch_is_added_to_all_its_slots():
+    snapshots = SnapshotArrays(2, capacity=1)
+    slots = [snapshots.allocate(name) for name in ("first", "second", "third")]  # grows
+    snapshots.add(np.array(slots), 1.0, np.array([(1.0, 1.0), (2.0, 2.0), (3.0, 3.0)]))
+    # the last state of a slot given twice wins
+    snapshots.add(np.array([slots[0], slots[1], slots[0]]), 2.0, np.array([(5.0, 5.0), (4.0, 4.0), (3.0, 3.0)]))
+    entities, states = snapshots.sample(1.5)
+    assert entities == ["first", "second", "third"]
+    assert states.tolist() == [[2.0, 2.0], [3.0, 3.0], [3.0, 3.0]]
+
+
+def test_released_slot_is_reused_without_its_snapshots():
+    snapshots = SnapshotArrays(2)
+    slot = snapshots.allocate("old")
+    snapshots.add_single(slot, 1.0, (1.0, 2.0))
+    snapshots.release(slot)
+    assert snapshots.allocate("new") == slot
+    assert snapshots.sample(1.0)[0] == []
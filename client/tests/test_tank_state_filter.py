@@ -0,0 +1,56 @@
+from Networking.tank_state_filter import TankStateFilter
+
+state = (100, 200, 90.0, 100.0, 45.0, False)
+
+
+def moved(x=0, y=0, tank_angle=0.0, hp=0.0, turret_angle=0.0, shield_active=None):
+    return (state[0] + x, state[1] + y, state[2] + tank_angle, state[3] + hp, state[4] + turret_angle,
+            state[5] if shield_active is None else shield_active)
+
+
+def create_filter():
+    return TankStateFilter(position_quantum=2, angle_quantum=1.0, hp_quantum=0, heartbeat_interval=0.5)
+
+
+def test_first_state_is_sent():
+    assert create_filter().should_send(*state, now=0.0)
+
+
+def test_changes_below_quanta_are_suppressed():
+    tank_filter = create_filter()
+    tank_filter.should_send(*state, now=0.0)
+    assert not tank_filter.should_send(*moved(x=1, y=-1, tank_angle=0.5, turret_angle=-0.5), now=0.1)
+    assert tank_filter.stats() == {"sent": 1, "suppressed": 1, "heartbeats": 0}
+
+
+def test_changes_of_a_quantum_are_sent():
+    for change in [moved(x=2), moved(y=-2), moved(tank_angle=1.0), moved(turret_angle=-1.0), moved(hp=-1.0),
+                   moved(shield_active=True)]:
+        tank_filter = create_filter()
+        tank_filter.should_send(*state, now=0.0)
+        assert tank_filter.should_send(*change, now=0.1)
+
+
+def test_angles_wrap_around():
+    assert TankStateFilter.angle_difference(359.5, 0.5) == 1.0
+    tank_filter = create_filter()
+    tank_filter.should_send(0, 0, 359.8, 100.0, 0.0, False, now=0.0)
+    assert not tank_filter.should_send(0, 0, 0.2, 100.0, 0.0, False, now=0.1)
+
+
+def test_small_changes_do_not_accumulate():
+    tank_filter = create_filter()
+    tank_filter.should_send(*state, now=0.0)
+    assert not tank_filter.should_send(*moved(x=1), now=0.1)
+    # compared to the last sent state, not to the last suppressed one
+    assert tank_filter.should_send(*moved(x=2), now=0.2)
+
+
+def test_unchanged_state_is_sent_as_heartbeat():
+    tank_filter = create_filter()
+    tank_filter.should_send(*state, now=0.0)
+    assert not tank_filter.should_send(*state, now=0.4)
+    assert tank_filter.should_send(*state, now=0.5)
+    assert not tank_filter.should_send(*state, now=0.9)
+    assert tank_filter.should_send(*state, now=1.0)
+    assert tank_filter.stats() == {"sent": 3, "suppressed": 2, "heartbeats": 2}
@@ -0,0 +1,83 @@
+import numpy as np
+
+import constants
+from Networking.payload_information import payload_information_dtype
+from Networking.threaded_connection import ThreadedConnection, WorldSnapshot
+from test_connection import FakeGame, frame, receive_until_lost
+
+
+def connect(port):
+    connection = ThreadedConnection(FakeGame(), "127.0.0.1", port)
+    assert connection.establish_connection()
+    assert connection.receive_configuration()[4] == 1
+    return connection
+
+
+def test_death_then_closed_connection(server):
+    port, outbox, ready = server
+    connection = connect(port)
+    outbox.append(frame(1) + frame(1, constants.information_death))
+    ready.set()
+
+    received = receive_until_lost(connection)
+    assert connection.connection_lost
+    assert [row[0] for row in received] == [b"u", b"i"]
+    connection.process_received_information_array(np.array(received, dtype=payload_information_dtype))
+    # the death screen closes the connection, which must not report the connection as lost on its own
+    connection.close_connection()
+    assert connection._game.calls == [("update_tanks", [1], [10.0]), ("death",)]
+
+
+def test_flush_after_the_connection_closed_does_not_raise(server):
+    port, outbox, ready = server
+    connection = connect(port)
+    ready.set()
+    receive_until_lost(connection)
+
+    connection.send_single_information(constants.information_update, constants.information_tank, 1, 10.0, 20.0, 90.0,
+                                       100.0, 45.0, 1, False)
+    assert not connection.flush_information()
+    connection.close_connection()
+    assert connection._game.calls == []
+
+
+def test_connection_is_not_lost_before_the_last_snapshot_is_swapped_in():
+    connection = ThreadedConnection(FakeGame())
+    connection._back_snapshot.merge(np.frombuffer(frame(1, constants.information_death),
+                                                  dtype=payload_information_dtype))
+    connection.handle_connection_lost()
+    assert not connection.connection_lost
+    assert len(connection.receive_all_information_array()) == 1
+    assert connection.connection_lost
+
+
+def information(action, type_of, player_id=1, x_location=0.0, hp=100.0, projectile_id=0):
+    return (action.encode("utf-8"), type_of.encode("utf-8"), player_id, x_location, 0.0, 0.0, hp,
+            float(projectile_id), 0, False)
+
+
+def test_snapshot_keeps_only_the_newest_states():
+    snapshot = WorldSnapshot()
+    snapshot.merge(np.array([information(constants.information_update, constants.information_tank, 1, 1.0),
+                             information(constants.information_update, constants.information_tank, 2, 2.0)],
+                            dtype=payload_information_dtype))
+    snapshot.merge(np.array([information(constants.information_update, constants.information_tank, 1, 3.0)],
+                            dtype=payload_information_dtype))
+    information_arr = snapshot.to_array()
+    assert information_arr["player_id"].tolist() == [1, 2]
+    assert information_arr["x_location"].tolist() == [3.0, 2.0]
+    assert len(snapshot.to_array()) == 0
+
+
+def test_snapshot_keeps_creates_and_deletes_in_order():
+    created = information(constants.information_create, constants.information_projectile, projectile_id=5)
+    moved = information(constants.information_update, constants.information_projectile, x_location=1.0,
+                        hp=constants.projectile_exists, projectile_id=5)
+    deleted = information(constants.information_update, constants.information_projectile,
+                          hp=constants.projectile_not_exists, projectile_id=5)
+    snapshot = WorldSnapshot()
+    snapshot.merge(np.array([created, moved, deleted, created, moved], dtype=payload_information_dtype))
+    information_arr = snapshot.to_array()
+    assert information_arr["action"].tolist() == [b"c", b"u", b"u", b"c", b"u"]
+    assert information_arr["hp"].tolist() == [100.0, constants.projectile_exists, constants.projectile_not_exists,
+                                              100.0, constants.projectile_exists]
@@ -1,11 +1,13 @@
 class Tile:
     """
-    Represents single tile on the map
+    Represents single tile on the map. Boards do not keep Tile objects, they return them as views of the tile type
     Attributes:
         _x: X coordinate of the tile's location
         _y: Y coordinate of the tile's location
         _attributes: Dict containing the texture, movement speed, visibility, etc of a tile
     """
+    __slots__ = ("_x", "_y", "_attributes")
+
     def __init__(self, x, y, attributes):
         self._x = x
         self._y = y
@@ -29,6 +31,11 @@ class Tile:
         """
         self._attributes[attribute_name] = new_value
         # may cause problems with changing all tiles of the same type at once, should probably copy the dict when doing that
+        # the attribute grids of BackgroundBoard are only updated by set_tile, so set the tile again after this
+
+    @property
+    def attributes(self):
+        return self._attributes
 
     @property
     def x(self):
@@ -2,6 +2,7 @@ import pygame
 
 import constants
 from projectile import Projectile
+from rotation_cache import rotation_cache
 from math import sin, cos, pi
 import random
 
@@ -21,8 +22,6 @@ class Turret(pygame.sprite.Sprite):
         self._angle = 0  # angle of the turret relative to tank (doesn't change when tank rotates)
         self._absolute_angle = 0  # absolute angle of the turret (changes when tank rotates)
 
-        self._projectiles = []
-
         self._rotation_speed = attributes["rotation_speed"]
         self._full_rotation = attributes["full_rotation"]
         self._max_left_angle = attributes["max_left_angle"]
@@ -38,6 +37,7 @@ class Turret(pygame.sprite.Sprite):
 
         self._current_cooldown = 0
 
+        self._resource_name = attributes["resource_name"]
         self.image = attributes["texture"]
         self.original_image = attributes["texture"]
         # ^required, because repeatedly rotating the same image decreases its quality and increases size^
@@ -51,18 +51,17 @@ class Turret(pygame.sprite.Sprite):
         """
         Returns projectile with given ID
         :param int id: ID of the projectile to be returned
-        :return: Projectile with given ID
+        :return: Projectile with given ID or None if this turret has not shot it
         :rtype: Projectile
         """
-        for projectile in self._projectiles:
-            if projectile.id == id:
-                return projectile
+        projectile = self._game.entities.get_projectile(id)
+        if projectile is not None and projectile.owner is self._tank:
+            return projectile
         return None
 
     def remove_all_projectiles(self):
-        for projectile in self._projectiles:
+        for projectile in self._game.entities.remove_projectiles_of(self._tank.player_no):
             projectile.kill()
-        self._projectiles.clear()
 
     def delete_projectile(self, id):
         """
@@ -70,9 +69,9 @@ class Turret(pygame.sprite.Sprite):
         :param int id: ID of the projectile to be deleted
         :return: None
         """
-        projectile = self.get_projectile_with_id(id)
-        projectile.kill()
-        self._projectiles.remove(projectile)
+        projectile = self._game.entities.remove_projectile(id)
+        if projectile is not None:
+            projectile.kill()
 
     def update_projectile(self, id, x, y):
         """
@@ -106,8 +105,11 @@ class Turret(pygame.sprite.Sprite):
         """
         projectile = Projectile(projectile_id, self._tank, projectile_x, projectile_y, projectile_angle,
                                 self, self._ammo)
+        if self._tank.player_no != self._game.my_player_id:
+            projectile.follow_server(self._game.remote_projectile_states)
+            projectile.update_from_server(projectile_x, projectile_y)
         self._game.add_projectile(projectile)
-        self._projectiles.append(projectile)
+        self._game.entities.add_projectile(projectile)
 
     def update(self, delta_time):
         """
@@ -119,7 +121,7 @@ class Turret(pygame.sprite.Sprite):
 
         if self._tank.angle + self._angle != self._absolute_angle:
             self._absolute_angle = self._tank.angle + self._angle
-            self.image = pygame.transform.rotozoom(self.original_image, self._absolute_angle, 1)
+            self.image = rotation_cache.rotate(self.original_image, self._absolute_angle)
             self.rect = self.image.get_rect()
 
         self.rect.center = (self._tank.x, self._tank.y)
@@ -139,7 +141,7 @@ class Turret(pygame.sprite.Sprite):
                 self._angle = self._max_right_angle
 
         self._absolute_angle = self._tank.angle + self._angle
-        self.image = pygame.transform.rotozoom(self.original_image, self._absolute_angle, 1)
+        self.image = rotation_cache.rotate(self.original_image, self._absolute_angle)
         self.rect = self.image.get_rect()
         self.rect.center = (self._tank.x, self._tank.y)
 
@@ -172,8 +174,9 @@ class Turret(pygame.sprite.Sprite):
 
                 projectile = Projectile(self._projectile_next_id, self._tank, projectile_x, projectile_y,
                                         projectile_angle, self, self._ammo)
+                projectile.attach(self._game.projectile_engine)
                 self._game.add_projectile(projectile)
-                self._projectiles.append(projectile)
+                self._game.entities.add_projectile(projectile)
                 self._game.send_projectile_add(projectile.id, projectile.x, projectile.y, projectile.angle)
                 self.calculate_next_projectile_id()
 
@@ -188,6 +191,10 @@ class Turret(pygame.sprite.Sprite):
         """
         self._angle = angle
 
+    @property
+    def resource_name(self):
+        return self._resource_name
+
     @property
     def game(self):
         return self._game
@@ -0,0 +1,26 @@
+import argparse
+import asyncio
+
+from . import constants
+from .server import GameServer
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m python_server",
+                                     description="Tanks game server speaking the same protocol as server/main.c")
+    parser.add_argument("map_number", nargs="?", type=int, default=constants.default_map_number,
+                        help="number of the map used in this game")
+    parser.add_argument("--max-players", type=int, default=constants.max_players)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=constants.port)
+    args = parser.parse_args()
+
+    server = GameServer(args.map_number, args.max_players, args.host, args.port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("###INFO: Exiting the server!")
+
+
+if __name__ == "__main__":
+    main()
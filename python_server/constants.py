@@ -0,0 +1,44 @@
+"""Game settings (same as server/constants.h)"""
+max_players = 7
+window_width = 800
+window_height = 600
+background_scale = 50
+default_map_number = 0
+
+"""Communication settings"""
+port = 2137
+client_no_response_sec = 2.0  # the C server gives up after CLIENT_NO_RESPONSE_ITERATION empty reads
+receive_buffer_size = 64 * 1024
+
+"""For information.action"""
+update = b'u'
+create = b'c'
+disconnect = b'd'
+die = b'i'
+
+"""For information.type_of"""
+tank = b't'
+projectile = b'p'
+
+"""Projectiles settings"""
+projectile_exists = 1
+projectile_not_exists = 0
+position_not_required = 0
+information_not_required = 0
+max_projectiles_per_player = 20  # player N owns projectile IDs [N*20;(N+1)*20)
+
+"""Tank settings"""
+default_tank_version = 0
+tank_spawn_point_x = -400.0
+tank_spawn_point_y = -400.0
+empty_hp = 0.0
+default_tank_angle = 0.0
+default_tank_turret_angle = 0.0
+tank_collision_r = 25  # in pixels - tanks are treated as circles when dealing with collisions
+tank_projectile_collision_damage = 2.5
+
+"""States of players returned by calculate_physics"""
+ok = 0
+disconnected = -1
+dead = -2
+connection_lost = -3
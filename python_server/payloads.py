@@ -0,0 +1,45 @@
+from ctypes import *
+
+
+class Information(Structure):
+    """
+    Mirrors struct information (server/information.h)
+    """
+    _fields_ = [
+        ("action", c_char),
+        ("type_of", c_char),
+        ("player_id", c_uint32),
+        ("x_location", c_float),
+        ("y_location", c_float),
+        ("tank_angle", c_float),
+        ("hp", c_float),
+        ("turret_angle", c_float),
+        ("tank_version", c_uint32),
+        ("shield_active", c_bool),
+    ]
+
+
+class Configuration(Structure):
+    """
+    Mirrors struct configuration (server/configuration.h)
+    """
+    _fields_ = [
+        ("width", c_uint32),
+        ("height", c_uint32),
+        ("background_scale", c_uint32),
+        ("players_count", c_uint32),
+        ("player_id", c_uint32),
+        ("tank_spawn_x", c_float),
+        ("tank_spawn_y", c_float),
+        ("map_number", c_uint32),
+    ]
+
+
+class ClientPreferences(Structure):
+    """
+    Mirrors struct client_preferences (server/client_preferences.h)
+    """
+    _fields_ = [
+        ("tank_version", c_uint32),
+        ("tank_max_hp", c_float),
+    ]
@@ -0,0 +1,269 @@
+import asyncio
+import socket
+from ctypes import sizeof
+
+from . import constants
+from .payloads import Information, Configuration, ClientPreferences
+from .world import Tank, Projectile, Player
+
+
+class GameServer:
+    """
+    Game server speaking the same protocol as the C server (server/main.c), running all players on one event loop
+    Attributes:
+        _map_number: Number of the map used in this game
+        _host: Address the server listens on
+        _port: Port the server listens on
+        _players: Connected players, indexed by player ID (None - free ID)
+        _players_count: Number of players that have joined
+        _projectiles: Projectiles in the game, indexed by projectile ID (None - not existing)
+    """
+    def __init__(self, map_number=constants.default_map_number, max_players=constants.max_players, host="0.0.0.0",
+                 port=constants.port):
+        self._map_number = map_number
+        self._host = host
+        self._port = port
+        self._players = [None] * max_players
+        self._players_count = 0
+        self._projectiles = [None] * (max_players * constants.max_projectiles_per_player)
+
+    async def serve_forever(self):
+        """
+        Accepts clients until cancelled
+        :return: None
+        """
+        server = await asyncio.start_server(self.handle_client, self._host, self._port, reuse_address=True,
+                                            backlog=len(self._players))
+        print(f"###INFO: Listening on {self._host}:{self._port}, map number {self._map_number}")
+        async with server:
+            await server.serve_forever()
+
+    def free_player_id(self):
+        """
+        Returns the lowest free player ID
+        :return: Free player ID or None if the server is full
+        :rtype: int
+        """
+        for player_id, player in enumerate(self._players):
+            if player is None:
+                return player_id
+        return None
+
+    def connected_players(self):
+        """
+        Returns all the players whose tank exists
+        :return: List of players
+        :rtype: List[Player]
+        """
+        return [player for player in self._players if player is not None and player.tank is not None]
+
+    async def handle_client(self, reader, writer):
+        """
+        Serves a single client from joining until it disconnects, dies or stops responding
+        :param asyncio.StreamReader reader: Reader of the client's connection
+        :param asyncio.StreamWriter writer: Writer of the client's connection
+        :return: None
+        """
+        address = writer.get_extra_info("peername")
+        player_id = self.free_player_id()
+        if player_id is None:
+            print("##ERROR: Currently server is full of players. Try again later")
+            writer.close()
+            return
+        player = Player(player_id, writer)
+        self._players[player_id] = player
+        writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        try:
+            preferences = ClientPreferences.from_buffer_copy(
+                await asyncio.wait_for(reader.readexactly(sizeof(ClientPreferences)),
+                                       constants.client_no_response_sec))
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError) as e:
+            print(f"##ERROR: Client from {address} has not sent its preferences")
+            self._players[player_id] = None
+            writer.close()
+            return
+
+        player.tank = Tank(player_id, constants.tank_spawn_point_x, constants.tank_spawn_point_y,
+                           constants.default_tank_angle, preferences.tank_max_hp, constants.default_tank_turret_angle,
+                           preferences.tank_version, False)
+        self._players_count += 1
+        writer.write(bytes(Configuration(constants.window_width, constants.window_height,
+                                         constants.background_scale, self._players_count, player_id,
+                                         constants.tank_spawn_point_x, constants.tank_spawn_point_y,
+                                         self._map_number)))
+        self.send_to_others(player_id, player.tank.to_information(constants.create))
+        print(f"###INFO: New client player ID:{player_id} connected from {address}")
+
+        player_state = await self.receive_loop(player, reader)
+
+        if player_state == constants.disconnected:
+            print(f"###INFO: Client player ID:{player_id} connected from {address} disconnected")
+        elif player_state == constants.dead:
+            print(f"###INFO: Client player ID:{player_id} connected from {address} has been reported dead "
+                  f"and has been disconnected")
+            writer.write(bytes(Information(constants.die, constants.tank, player_id, constants.position_not_required,
+                                           constants.position_not_required, constants.default_tank_angle,
+                                           constants.empty_hp, constants.default_tank_turret_angle,
+                                           constants.information_not_required, False)))
+        else:
+            print(f"###ERROR: Client player ID: {player_id} connected from {address} has lost connection with server")
+        self.remove_player(player)
+        try:
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError as e:
+            pass
+
+    async def receive_loop(self, player, reader):
+        """
+        Receives the information from the player and answers every batch with the state of the world
+        :param Player player: Player to be served
+        :param asyncio.StreamReader reader: Reader of the player's connection
+        :return: State of the player after the loop (disconnected, dead or connection_lost)
+        :rtype: int
+        """
+        frame_size = sizeof(Information)
+        pending = bytearray()
+        while True:
+            try:
+                data = await asyncio.wait_for(reader.read(constants.receive_buffer_size),
+                                              constants.client_no_response_sec)
+            except (asyncio.TimeoutError, ConnectionError) as e:
+                return constants.connection_lost
+            if not data:
+                return constants.connection_lost
+            pending += data
+            complete_length = len(pending) - len(pending) % frame_size
+            received = [Information.from_buffer_copy(pending, offset)
+                        for offset in range(0, complete_length, frame_size)]
+            del pending[:complete_length]
+            if not received:
+                continue
+
+            player_state = self.calculate_physics(player, received)
+            if player_state != constants.ok:
+                return player_state
+            self.send_world(player)
+            try:
+                await player.writer.drain()
+            except ConnectionError as e:
+                return constants.connection_lost
+
+    def calculate_physics(self, player, received):
+        """
+        Applies the information received from the player to the world
+        :param Player player: Player the information has been received from
+        :param List[Information] received: Information received from the player
+        :return: State of the player (ok, disconnected or dead)
+        :rtype: int
+        """
+        return_value = constants.ok
+        for data in received:
+            if data.action == constants.create:
+                if data.type_of == constants.projectile:
+                    projectile_id = int(data.turret_angle)
+                    if not 0 <= projectile_id < len(self._projectiles):
+                        continue
+                    projectile = Projectile(projectile_id, data.player_id, data.x_location, data.y_location,
+                                            data.tank_angle, data.hp)
+                    self._projectiles[projectile_id] = projectile
+                    self.send_to_others(data.player_id, projectile.to_information(
+                        constants.create, constants.projectile_exists, projectile.angle))
+                else:
+                    print("##ERROR: Unknown target of command CREATE!")
+            elif data.action == constants.update:
+                if data.type_of == constants.tank:
+                    tank = player.tank
+                    tank.set_values(data.player_id, data.x_location, data.y_location, data.tank_angle,
+                                    min(data.hp, tank.hp), data.turret_angle, data.tank_version, data.shield_active)
+                    if data.hp <= constants.empty_hp:
+                        return_value = constants.dead
+                elif data.type_of == constants.projectile:
+                    projectile_id = int(data.turret_angle)
+                    if not 0 <= projectile_id < len(self._projectiles) or self._projectiles[projectile_id] is None:
+                        continue
+                    projectile = self._projectiles[projectile_id]
+                    if data.hp == constants.projectile_not_exists:
+                        self.delete_projectile(projectile, send_to_owner=True)
+                    else:
+                        projectile.x = data.x_location
+                        projectile.y = data.y_location
+                        self.check_projectile_collisions(projectile)
+                else:
+                    print("##ERROR: Unknown target of command UPDATE!")
+            elif data.action == constants.disconnect:
+                return_value = constants.disconnected
+            else:
+                print("##ERROR: Unknown command received!")
+        return return_value
+
+    def check_projectile_collisions(self, projectile):
+        """
+        Damages the first tank hit by the projectile and deletes the projectile
+        :param Projectile projectile: Projectile to be checked
+        :return: None
+        """
+        for other in self.connected_players():
+            if other.tank.collides_with(projectile):
+                if not other.tank.shield_active:
+                    other.tank.hp -= constants.tank_projectile_collision_damage
+                self.delete_projectile(projectile, send_to_owner=True)
+                return
+
+    def delete_projectile(self, projectile, send_to_owner):
+        """
+        Removes the projectile from the world and tells the players about it
+        :param Projectile projectile: Projectile to be deleted
+        :param bool send_to_owner: Whether the owner of the projectile should be told as well
+        :return: None
+        """
+        information = bytes(projectile.to_information(constants.update, constants.projectile_not_exists,
+                                                      constants.position_not_required))
+        for other in self.connected_players():
+            if send_to_owner or other.player_id != projectile.owner_id:
+                other.sendings.append(information)
+        self._projectiles[projectile.id] = None
+
+    def send_to_others(self, player_id, information):
+        """
+        Queues the information for all the connected players except the given one
+        :param int player_id: ID of the player that should not receive the information
+        :param Information information: Information to be sent
+        :return: None
+        """
+        information = bytes(information)
+        for other in self.connected_players():
+            if other.player_id != player_id:
+                other.sendings.append(information)
+
+    def send_world(self, player):
+        """
+        Sends all tanks, the information queued for the player and all projectiles with a single write (sender)
+        :param Player player: Player the world is sent to
+        :return: None
+        """
+        sending = [bytes(other.tank.to_information(constants.update)) for other in self.connected_players()]
+        sending += player.sendings
+        player.sendings = []
+        sending += [bytes(projectile.to_information(constants.update, constants.projectile_exists, projectile.angle))
+                    for projectile in self._projectiles if projectile is not None]
+        player.writer.write(b"".join(sending))
+
+    def remove_player(self, player):
+        """
+        Removes the player and its projectiles from the world and tells the other players about it
+        :param Player player: Player to be removed
+        :return: None
+        """
+        self._players_count -= 1
+        first_id = player.player_id * constants.max_projectiles_per_player
+        for projectile in self._projectiles[first_id:first_id + constants.max_projectiles_per_player]:
+            if projectile is not None:
+                self.delete_projectile(projectile, send_to_owner=False)
+        self.send_to_others(player.player_id, Information(
+            constants.disconnect, constants.tank, player.player_id, constants.tank_spawn_point_x,
+            constants.tank_spawn_point_y, constants.default_tank_angle, constants.empty_hp,
+            constants.default_tank_turret_angle, constants.default_tank_version, False))
+        self._players[player.player_id] = None
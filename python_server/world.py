@@ -0,0 +1,88 @@
+from . import constants
+from .payloads import Information
+
+
+class Tank:
+    """
+    Represents the state of a player's tank as known by the server (struct tank)
+    """
+    def __init__(self, player_id, x, y, tank_angle, hp, turret_angle, tank_version, shield_active):
+        self.player_id = player_id
+        self.x = x
+        self.y = y
+        self.tank_angle = tank_angle
+        self.hp = hp
+        self.turret_angle = turret_angle
+        self.tank_version = tank_version
+        self.shield_active = shield_active
+
+    def set_values(self, player_id, x, y, tank_angle, hp, turret_angle, tank_version, shield_active):
+        self.player_id = player_id
+        self.x = x
+        self.y = y
+        self.tank_angle = tank_angle
+        self.hp = hp
+        self.turret_angle = turret_angle
+        self.tank_version = tank_version
+        self.shield_active = shield_active
+
+    def collides_with(self, projectile):
+        """
+        Checks if the projectile hits this tank. The tank is treated as a circle of radius tank_collision_r
+        :param Projectile projectile: Projectile to be checked
+        :return: If the projectile hits this tank (never for its own projectiles)
+        :rtype: bool
+        """
+        return self.player_id != projectile.owner_id and \
+            (projectile.x - self.x) ** 2 + (projectile.y - self.y) ** 2 < constants.tank_collision_r ** 2
+
+    def to_information(self, action):
+        """
+        Returns the information describing this tank
+        :param bytes action: Action of the information (update or create)
+        :return: Information about this tank
+        :rtype: Information
+        """
+        return Information(action, constants.tank, self.player_id, self.x, self.y, self.tank_angle, self.hp,
+                           self.turret_angle, self.tank_version, self.shield_active)
+
+
+class Projectile:
+    """
+    Represents a projectile as known by the server (struct projectile). Its position is calculated by the owner
+    """
+    def __init__(self, id, owner_id, x, y, angle, hp):
+        self.id = id
+        self.owner_id = owner_id
+        self.x = x
+        self.y = y
+        self.angle = angle
+        self.hp = hp
+
+    def to_information(self, action, hp, angle):
+        """
+        Returns the information describing this projectile
+        :param bytes action: Action of the information (update or create)
+        :param float hp: Whether the projectile exists or not
+        :param float angle: Angle sent with the information
+        :return: Information about this projectile
+        :rtype: Information
+        """
+        return Information(action, constants.projectile, self.owner_id, self.x, self.y, angle, hp, float(self.id),
+                           constants.information_not_required, False)
+
+
+class Player:
+    """
+    Represents a connected client
+    Attributes:
+        player_id: ID of the player
+        writer: asyncio.StreamWriter of the player's connection
+        tank: Tank of the player, None until the client preferences have been received
+        sendings: Encoded information waiting to be sent to this player with the next world update (global_sendings)
+    """
+    def __init__(self, player_id, writer):
+        self.player_id = player_id
+        self.writer = writer
+        self.tank = None
+        self.sendings = []